@@ -0,0 +1,99 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile, SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Журнал медленных запросов, только для просмотра персоналом."""
+
+    list_display = ('id',
+                    'created',
+                    'duration_ms',
+                    'view',
+                    'call_site',
+                    'fingerprint')
+    list_display_links = ('fingerprint',)
+    search_fields = ('fingerprint', 'view', 'call_site')
+    list_filter = ('view', 'database')
+    readonly_fields = ('created',
+                       'duration_ms',
+                       'database',
+                       'view',
+                       'call_site',
+                       'fingerprint',
+                       'sql',
+                       'plan')
+    empty_value_display = '-пусто-'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Профили запросов персонала с выгрузкой файла pstats."""
+
+    list_display = ('id',
+                    'created',
+                    'method',
+                    'path',
+                    'status',
+                    'duration_ms',
+                    'download_link')
+    list_display_links = ('path',)
+    search_fields = ('path', 'view')
+    list_filter = ('view', 'method')
+    readonly_fields = ('created',
+                       'user_id',
+                       'method',
+                       'path',
+                       'view',
+                       'status',
+                       'duration_ms',
+                       'phases',
+                       'stats',
+                       'download_link')
+    exclude = ('data',)
+    empty_value_display = '-пусто-'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:profile_id>/download/',
+                 self.admin_site.admin_view(self.download),
+                 name='api_requestprofile_download'),
+            *super().get_urls(),
+        ]
+
+    @admin.display(description='Файл профиля')
+    def download_link(self, obj):
+        return format_html(
+            '<a href="{}">{}.prof</a>',
+            reverse('admin:api_requestprofile_download', args=(obj.id,)),
+            obj.id
+        )
+
+    def download(self, request, profile_id):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=profile_id)
+        response = HttpResponse(bytes(profile.data),
+                                content_type='application/octet-stream')
+        response['Content-Disposition'] = (
+            f'attachment; filename="request-{profile.id}.prof"'
+        )
+        return response
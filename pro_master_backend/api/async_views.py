@@ -0,0 +1,292 @@
+import math
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from appointments.models import Schedule
+
+from services.models import Review, ServiceProfile
+
+from .authentication import StatelessReadJWTAuthentication
+from .conditional import (categories_validators,
+                          conditional_response,
+                          make_etag,
+                          review_validators,
+                          service_profile_validators,
+                          set_validators)
+from .db_routers import choose_replica, is_sticky, read_alias
+from .instrumentation import phase
+from .metrics import registry
+from .mixins import (CachedResponseMixin,
+                     ReplicaReadMixin,
+                     SparseFieldsViewMixin)
+from .renderers import CompactJSONRenderer
+
+
+class AsyncReadEndpoint:
+    """Асинхронное чтение маршрута вьюсета для ASGI.
+
+    Обрабатывает GET без фильтров от анонимных пользователей и
+    пользователей с JWT (claims без запроса к БД): аутентификация,
+    лимиты и выбор реплики как во вьюсете, данные через асинхронный
+    ORM и быстрый сериализатор вьюсета, связанные запросы страницы
+    выполняются параллельно. Остальные запросы (запись, фильтры,
+    ошибки, 404, превышение лимита, HTML, компактный JSON) передаются
+    вьюсету DRF.
+    """
+
+    detail = False
+    etag_per_user = False
+    renderer = JSONRenderer()
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.viewset = callback.cls
+        self.basename = callback.initkwargs.get('basename')
+        self.action = callback.actions['get']
+        self.serializer_class = self.viewset.fast_serializer_class
+        self.throttle_scopes = getattr(self.viewset, 'throttle_scopes', {})
+        self.pagination_class = (None if self.detail
+                                 else self.viewset.pagination_class)
+        methods = set(callback.actions) | {'options'}
+        if 'get' in methods:
+            methods.add('head')
+        self.allow = ', '.join(method.upper() for method
+                               in self.viewset.http_method_names
+                               if method in methods)
+
+    def as_view(self):
+        @wraps(self.callback)
+        async def view(request, *args, **kwargs):
+            response = None
+            if self.is_supported(request, kwargs):
+                response = await self.get(request, **kwargs)
+            if response is None:
+                response = await sync_to_async(self.callback)(
+                    request, *args, **kwargs
+                )
+            return response
+
+        return view
+
+    def is_supported(self, request, kwargs):
+        params = {'page'} if self.pagination_class is not None else set()
+        accept = request.headers.get('Accept', '')
+        # Ответы из кеша (RESPONSE_CACHE) и форматы кроме JSON отдаёт вьюсет
+        return (settings.ASYNC_READ_VIEWS
+                and not (settings.RESPONSE_CACHE
+                         and issubclass(self.viewset, CachedResponseMixin))
+                and request.method == 'GET'
+                and 'format' not in kwargs
+                and set(request.GET) <= params
+                and 'text/html' not in accept
+                and CompactJSONRenderer.media_type not in accept)
+
+    def get_queryset(self, **kwargs):
+        queryset = self.viewset.queryset.all()
+        if issubclass(self.viewset, SparseFieldsViewMixin):
+            return self.viewset.select_fields(queryset)
+        return queryset
+
+    async def parent_exists(self, **kwargs):
+        return True
+
+    def get_validators(self, **kwargs):
+        """Версия и дата изменения данных (как у вьюсета) или None."""
+
+        return None
+
+    def authenticate(self, request):
+        """Пользователь запроса или None, если нужен вьюсет DRF."""
+
+        if 'Authorization' not in request.headers:
+            return AnonymousUser()
+        if not settings.USE_JWT:
+            return None
+        authentication = StatelessReadJWTAuthentication()
+        try:
+            raw_token = authentication.get_raw_token(
+                authentication.get_header(request)
+            )
+            if raw_token is None:
+                return None
+            user = authentication.get_token_user(
+                authentication.get_validated_token(raw_token)
+            )
+        except (InvalidToken, exceptions.AuthenticationFailed):
+            return None
+        registry.inc('auth_user_resolutions_total', {'source': 'claims'})
+        return user
+
+    def allow_request(self, request):
+        view = SimpleNamespace(action=self.action,
+                               throttle_scopes=self.throttle_scopes)
+        return all(throttle().allow_request(request, view)
+                   for throttle in self.viewset.throttle_classes)
+
+    async def get(self, request, **kwargs):
+        with phase('auth'):
+            user = self.authenticate(request)
+        if user is None:
+            return None
+        request.user = user
+        # Лимиты без области действия не обращаются к хранилищу
+        if (self.action in self.throttle_scopes
+                and not await sync_to_async(self.allow_request)(request)):
+            return None
+
+        token = None
+        if (settings.DATABASE_REPLICAS
+                and issubclass(self.viewset, ReplicaReadMixin)
+                and not await sync_to_async(is_sticky)(user)):
+            token = read_alias.set(await sync_to_async(choose_replica)())
+        etag = None
+        try:
+            validators = await sync_to_async(self.get_validators)(**kwargs)
+            if validators is not None:
+                etag = make_etag(self.basename, validators[0],
+                                 self.renderer.format,
+                                 user if self.etag_per_user else None)
+                response = conditional_response(request, etag,
+                                                validators[1])
+                if response is not None:
+                    return self.finish(response, etag, validators)
+            data = await self.get_data(request, **kwargs)
+        finally:
+            if token is not None:
+                read_alias.reset(token)
+        if data is None:
+            return None
+
+        with phase('render'):
+            response = HttpResponse(
+                self.renderer.render(data),
+                content_type=self.renderer.media_type
+            )
+        response['Allow'] = self.allow
+        return self.finish(response, etag, validators)
+
+    def finish(self, response, etag, validators):
+        response['Vary'] = 'Accept'
+        if validators is None:
+            return response
+        return set_validators(response, etag, validators[1],
+                              self.etag_per_user)
+
+    async def get_data(self, request, **kwargs):
+        if not await self.parent_exists(**kwargs):
+            return None
+        serializer = self.serializer_class(context={'request': request})
+        queryset = serializer.get_queryset(self.get_queryset(**kwargs))
+
+        if self.detail:
+            try:
+                queryset = queryset.filter(pk=int(kwargs['pk']))
+            except ValueError:
+                return None
+            with phase('serializer'):
+                data = await serializer.ato_representation(queryset)
+            return data[0] if data else None
+
+        if self.pagination_class is None:
+            with phase('serializer'):
+                return await serializer.ato_representation(queryset)
+        return await self.get_page(request, serializer, queryset)
+
+    async def get_page(self, request, serializer, queryset):
+        """Страница в формате PageNumberPagination."""
+
+        try:
+            page_number = int(request.GET.get('page', 1))
+        except ValueError:
+            return None
+        page_size = self.pagination_class.page_size
+        count = await queryset.acount()
+        if not 1 <= page_number <= max(1, math.ceil(count / page_size)):
+            return None
+
+        offset = (page_number - 1) * page_size
+        with phase('serializer'):
+            results = await serializer.ato_representation(
+                queryset[offset:offset + page_size]
+            )
+
+        url = request.build_absolute_uri()
+        next_url = previous_url = None
+        if offset + page_size < count:
+            next_url = replace_query_param(url, 'page', page_number + 1)
+        if page_number == 2:
+            previous_url = remove_query_param(url, 'page')
+        elif page_number > 2:
+            previous_url = replace_query_param(url, 'page', page_number - 1)
+        return {'count': count,
+                'next': next_url,
+                'previous': previous_url,
+                'results': results}
+
+
+class CategoryListEndpoint(AsyncReadEndpoint):
+
+    def get_validators(self, **kwargs):
+        return categories_validators()
+
+
+class ServiceProfileDetailEndpoint(AsyncReadEndpoint):
+    detail = True
+    etag_per_user = True
+
+    def get_validators(self, pk, **kwargs):
+        return service_profile_validators(pk)
+
+
+class NestedEndpoint(AsyncReadEndpoint):
+    """Маршрут, вложенный в профиль сервиса (404 отдаёт вьюсет)."""
+
+    model = None
+
+    async def parent_exists(self, profile_id, **kwargs):
+        return await ServiceProfile.objects.filter(pk=profile_id).aexists()
+
+    def get_queryset(self, profile_id, **kwargs):
+        return self.model.objects.filter(service_profile_id=profile_id)
+
+
+class ReviewListEndpoint(NestedEndpoint):
+    model = Review
+
+    def get_validators(self, profile_id, **kwargs):
+        return review_validators(profile_id)
+
+
+class ScheduleListEndpoint(NestedEndpoint):
+    model = Schedule
+
+
+ENDPOINTS = {
+    'categories-list': CategoryListEndpoint,
+    'service_profiles-list': AsyncReadEndpoint,
+    'service_profiles-detail': ServiceProfileDetailEndpoint,
+    'reviews-list': ReviewListEndpoint,
+    'schedules-list': ScheduleListEndpoint,
+}
+
+
+def async_read_patterns(patterns):
+    """Асинхронные обработчики для маршрутов ENDPOINTS (ASYNC_READ_VIEWS)."""
+
+    for pattern in patterns:
+        endpoint = ENDPOINTS.get(getattr(pattern, 'name', None))
+        if endpoint is not None:
+            pattern.callback = endpoint(pattern.callback).as_view()
+    return patterns
@@ -0,0 +1,66 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import permissions
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from clients.models import ClientProfile
+
+from .metrics import registry
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, восстановленный из claims access-токена без запроса к БД."""
+
+    @cached_property
+    def is_master(self):
+        return self.token.get('is_master', False)
+
+    @cached_property
+    def client_profile_id(self):
+        return self.token.get('client_profile_id')
+
+    @cached_property
+    def client_profile(self):
+        if self.client_profile_id is None:
+            raise ClientProfile.DoesNotExist
+        return ClientProfile(pk=self.client_profile_id, client_id=self.id)
+
+
+class StatelessReadJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без обращения к БД для чтения.
+
+    Для безопасных методов вьюсетов с `stateless_authentication = True`
+    пользователь строится из claims токена, в остальных случаях
+    загружается из БД с проверкой активности.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        view = request.parser_context.get('view')
+        if (request.method in permissions.SAFE_METHODS
+                and getattr(view, 'stateless_authentication', False)):
+            registry.inc('auth_user_resolutions_total', {'source': 'claims'})
+            return self.get_token_user(validated_token), validated_token
+        registry.inc('auth_user_resolutions_total', {'source': 'database'})
+        return self.get_user(validated_token), validated_token
+
+    def get_token_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        return ClaimsUser(validated_token)
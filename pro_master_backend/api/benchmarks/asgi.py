@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+
+from .runner import percentile
+
+
+async def call(application, path, headers=()):
+    """Запрос GET к ASGI-приложению в процессе: (статус, тело)."""
+
+    url = urlsplit(path)
+    scope = {'type': 'http',
+             'asgi': {'version': '3.0'},
+             'http_version': '1.1',
+             'method': 'GET',
+             'scheme': 'http',
+             'path': url.path,
+             'raw_path': url.path.encode(),
+             'query_string': url.query.encode(),
+             'headers': [(b'host', b'testserver'), *headers],
+             'client': ('127.0.0.1', 50000),
+             'server': ('testserver', 80)}
+    messages = iter([{'type': 'http.request', 'body': b''}])
+    disconnected = asyncio.Event()
+    status = None
+    body = []
+
+    async def receive():
+        message = next(messages, None)
+        if message is None:
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+        return message
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            body.append(message.get('body', b''))
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        disconnected.set()
+    return status, b''.join(body)
+
+
+async def run_load(application, paths, requests, concurrency):
+    """Замкнутый цикл: `concurrency` клиентов, всего `requests` запросов."""
+
+    timings = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for number in range(requests):
+        queue.put_nowait(paths[number % len(paths)])
+
+    async def client():
+        while not queue.empty():
+            path = queue.get_nowait()
+            started = time.perf_counter()
+            status, _ = await call(application, path)
+            timings.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {'rps': round(requests / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'statuses': statuses}
+
+
+class QueryDelay:
+    """Задержка каждого SQL-запроса: имитация сетевой БД (I/O-нагрузка)."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self.install)
+        return self
+
+    def __exit__(self, *args):
+        connection_created.disconnect(self.install)
+
+
+def compare(paths):
+    """Сверка ответов асинхронных обработчиков и вьюсетов DRF."""
+
+    application = ASGIHandler()
+    mismatches = []
+    for path in paths:
+        results = []
+        for enabled in (False, True):
+            with override_settings(ASYNC_READ_VIEWS=enabled):
+                status, body = asyncio.run(call(application, path))
+            results.append((status, json.loads(body)))
+        if results[0] != results[1]:
+            mismatches.append(path)
+    return mismatches
@@ -0,0 +1,365 @@
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+
+from api.management.commands.seed import zipf_cum_weights
+from appointments.models import Schedule
+from services.models import ServiceProfile
+
+from .runner import percentile
+from .scenarios import get_auth_header
+
+
+User = get_user_model()
+
+SERVERS = {
+    'runserver': None,
+    'gunicorn': 'gunicorn',
+    'uvicorn': 'uvicorn',
+}
+
+
+class Action:
+    """Действие виртуального пользователя: вес в профиле и запрос."""
+
+    def __init__(self, name, weight, build):
+        self.name = name
+        self.weight = weight
+        self.build = build
+
+
+class LoadData:
+    """Идентификаторы из сгенерированных данных (manage.py seed)."""
+
+    def __init__(self, users=50, profiles=200, schedules=5, skew=1.1):
+        self.headers = [
+            {'Authorization': get_auth_header(user)}
+            for user in User.objects.filter(
+                is_master=False, client_profile__isnull=False
+            ).order_by('id')[:users]
+        ]
+        # Профили создаются в порядке популярности (Ципф в manage.py seed)
+        self.profile_ids = list(ServiceProfile.objects.order_by(
+            'id'
+        ).values_list('id', flat=True)[:profiles])
+        self.profile_weights = zipf_cum_weights(len(self.profile_ids), skew)
+        # Всплеск записей приходится на несколько «горячих» расписаний
+        self.schedules = list(Schedule.objects.order_by('id').values_list(
+            'id', 'service_profile_id', 'start'
+        )[:schedules])
+
+    def profile(self, rng):
+        return rng.choices(self.profile_ids,
+                           cum_weights=self.profile_weights)[0]
+
+
+def browse_actions(data):
+    def get(path):
+        return lambda rng: ('GET', path, None)
+
+    def profile_path(suffix):
+        return lambda rng: (
+            'GET', f'/api/service_profiles/{data.profile(rng)}/{suffix}', None
+        )
+
+    def nested_path(suffix):
+        return lambda rng: (
+            'GET', f'/api/services/{data.profile(rng)}/{suffix}', None
+        )
+
+    return [
+        Action('categories-list', 5, get('/api/categories/')),
+        Action('service_profiles-list', 30, get('/api/service_profiles/')),
+        Action('service_profiles-list-page', 10, lambda rng: (
+            'GET', f'/api/service_profiles/?page={rng.randint(2, 20)}', None
+        )),
+        Action('service_profiles-detail', 25, profile_path('')),
+        Action('reviews-list', 15, nested_path('reviews/')),
+        Action('schedules-list', 10, nested_path('schedules/')),
+    ]
+
+
+def booking_actions(data):
+    def book(rng):
+        schedule_id, profile_id, start = rng.choice(data.schedules)
+        # Время с шагом 15 минут: конкурирующие записи на один слот
+        opening = datetime.datetime.combine(datetime.date.today(), start)
+        slot = opening + datetime.timedelta(minutes=15 * rng.randrange(36))
+        return ('POST',
+                f'/api/services/{profile_id}/schedules/{schedule_id}/'
+                f'appointments/',
+                {'schedule': schedule_id,
+                 'appointment_time': slot.time().isoformat()})
+
+    def appointments(rng):
+        schedule_id, profile_id, _ = rng.choice(data.schedules)
+        return ('GET',
+                f'/api/services/{profile_id}/schedules/{schedule_id}/'
+                f'appointments/',
+                None)
+
+    if not data.schedules:
+        return []
+    return [Action('appointments-create', 60, book),
+            Action('appointments-list', 40, appointments)]
+
+
+def review_actions(data):
+    def post_review(rng):
+        return ('POST',
+                f'/api/services/{data.profile(rng)}/reviews/',
+                {'text': 'Нагрузочный отзыв', 'score': rng.randint(1, 5)})
+
+    def reviews(rng):
+        return ('GET', f'/api/services/{data.profile(rng)}/reviews/', None)
+
+    return [Action('reviews-create', 30, post_review),
+            Action('reviews-list', 70, reviews)]
+
+
+def mixed_actions(data):
+    actions = []
+    for builder, share in ((browse_actions, 80),
+                           (booking_actions, 10),
+                           (review_actions, 10)):
+        group = builder(data)
+        total = sum(action.weight for action in group)
+        actions.extend(Action(action.name, share * action.weight / total,
+                              action.build)
+                       for action in group)
+    return actions
+
+
+PROFILES = {
+    'browse': browse_actions,
+    'booking': booking_actions,
+    'reviews': review_actions,
+    'mixed': mixed_actions,
+}
+
+
+def free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """Приложение в отдельном процессе на локальном порту.
+
+    runserver обслуживает WSGI-приложение в потоках, gunicorn (WSGI)
+    и uvicorn (ASGI) запускаются с заданным числом воркеров, если
+    установлены. Лимиты частоты запросов в сервере отключаются.
+    """
+
+    def __init__(self, server='runserver', workers=1, host='127.0.0.1'):
+        module = SERVERS[server]
+        if module is not None and find_spec(module) is None:
+            raise RuntimeError(f'{module} не установлен')
+        self.host = host
+        self.port = free_port(host)
+        address = f'{host}:{self.port}'
+        if server == 'runserver':
+            self.command = [sys.executable,
+                            str(settings.BASE_DIR / 'manage.py'),
+                            'runserver', '--noreload', address]
+        elif server == 'gunicorn':
+            self.command = [sys.executable, '-m', 'gunicorn',
+                            '--workers', str(workers),
+                            '--bind', address,
+                            'pro_master_backend.wsgi']
+        else:
+            self.command = [sys.executable, '-m', 'uvicorn',
+                            '--workers', str(workers),
+                            '--host', host, '--port', str(self.port),
+                            'pro_master_backend.asgi:application']
+        self.process = None
+
+    def __enter__(self):
+        env = {**os.environ,
+               'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+               'DISABLE_THROTTLING': 'True'}
+        self.process = subprocess.Popen(self.command,
+                                        cwd=settings.BASE_DIR,
+                                        env=env,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('Сервер завершился при запуске')
+            try:
+                socket.create_connection((self.host, self.port), 1).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError('Сервер не запустился за 30 секунд')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+async def send(host, port, method, path, headers, body, timeout):
+    """HTTP/1.1-запрос на отдельном соединении; статус и размер тела."""
+
+    payload = b'' if body is None else json.dumps(body).encode()
+    lines = [f'{method} {path} HTTP/1.1',
+             f'Host: {host}:{port}',
+             'Accept: application/json',
+             'Connection: close',
+             *(f'{name}: {value}' for name, value in headers.items())]
+    if body is not None:
+        lines += ['Content-Type: application/json',
+                  f'Content-Length: {len(payload)}']
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port), timeout
+    )
+    try:
+        writer.write('\r\n'.join(lines).encode() + b'\r\n\r\n' + payload)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ', 2)[1]), len(content)
+
+
+class LockSampler:
+    """Периодический подсчёт ожидающих блокировок в PostgreSQL."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    @property
+    def supported(self):
+        return connection.vendor == 'postgresql'
+
+    def sample(self):
+        # Отдельное соединение потока, не влияющее на основное
+        with connections['default'].cursor() as cursor:
+            while not self.stopped.wait(self.interval):
+                cursor.execute(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE wait_event_type = 'Lock' AND datname = "
+                    "current_database()"
+                )
+                self.samples.append(cursor.fetchone()[0])
+        connections['default'].close()
+
+    def __enter__(self):
+        if self.supported:
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def as_dict(self):
+        if not self.supported:
+            return None
+        waiting = [count for count in self.samples if count]
+        return {'samples': len(self.samples),
+                'samples_with_waits': len(waiting),
+                'max_waiting': max(self.samples, default=0),
+                'avg_waiting': round(sum(self.samples)
+                                     / max(len(self.samples), 1), 2)}
+
+
+class LoadTest:
+    """Замкнутая модель нагрузки: виртуальные пользователи в asyncio."""
+
+    def __init__(self, host, port, actions, headers, concurrency=10,
+                 duration=30, timeout=30, random_seed=42):
+        self.host = host
+        self.port = port
+        self.actions = actions
+        self.weights = [action.weight for action in actions]
+        self.headers = headers or [{}]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.timeout = timeout
+        self.random_seed = random_seed
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    async def user(self, number, deadline):
+        rng = random.Random(self.random_seed + number)
+        headers = self.headers[number % len(self.headers)]
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            action = rng.choices(self.actions, self.weights)[0]
+            method, path, body = action.build(rng)
+            started = time.perf_counter()
+            try:
+                status, _ = await send(self.host, self.port, method, path,
+                                       headers, body, self.timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = 0
+            self.timings[action.name].append(
+                (time.perf_counter() - started) * 1000
+            )
+            self.statuses[action.name][status] += 1
+
+    async def run_users(self):
+        deadline = asyncio.get_running_loop().time() + self.duration
+        await asyncio.gather(*(self.user(number, deadline)
+                               for number in range(self.concurrency)))
+
+    def run(self):
+        started = time.perf_counter()
+        asyncio.run(self.run_users())
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        actions = {}
+        errors_total = 0
+        for name, timings in sorted(self.timings.items()):
+            statuses = self.statuses[name]
+            errors = sum(count for status, count in statuses.items()
+                         if status == 0 or status >= 500)
+            errors_total += errors
+            actions[name] = {
+                'requests': len(timings),
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'p99_ms': round(percentile(timings, 99), 2),
+                'error_rate': round(errors / len(timings), 4),
+                'statuses': {str(status): count
+                             for status, count in sorted(statuses.items())},
+            }
+        timings = [value for values in self.timings.values()
+                   for value in values]
+        total = len(timings)
+        return {'concurrency': self.concurrency,
+                'duration_s': round(elapsed, 2),
+                'requests': total,
+                'rps': round(total / elapsed, 2),
+                'p50_ms': round(percentile(timings, 50), 2) if total else 0,
+                'p95_ms': round(percentile(timings, 95), 2) if total else 0,
+                'p99_ms': round(percentile(timings, 99), 2) if total else 0,
+                'error_rate': (round(errors_total / total, 4) if total
+                               else 0),
+                'actions': actions}
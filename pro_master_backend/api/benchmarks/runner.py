@@ -0,0 +1,84 @@
+import json
+import math
+import time
+
+from django.conf import settings
+from django.test import Client, override_settings
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_scenario(scenario, iterations, warmup):
+    client = Client(headers=scenario.headers, raise_request_exception=False)
+    timings = []
+    queries = size = status = 0
+    for number in range(warmup + iterations):
+        elapsed = 0
+        queries = size = 0
+        for method, path, data in scenario.requests:
+            started = time.perf_counter()
+            response = getattr(client, method)(
+                path, data, content_type='application/json'
+            )
+            elapsed += time.perf_counter() - started
+            metrics = getattr(response, 'request_metrics', None)
+            queries += metrics.query_count if metrics else 0
+            size += len(response.content)
+            status = max(status, response.status_code)
+        if number >= warmup:
+            timings.append(elapsed * 1000)
+    return {'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'queries': queries,
+            'bytes': size,
+            'status': status}
+
+
+def run(scenarios, iterations=20, warmup=2):
+    # Лимиты частоты запросов отключаются на время замеров
+    rest_settings = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+    with override_settings(REST_FRAMEWORK=rest_settings):
+        return {scenario.name: run_scenario(scenario, iterations, warmup)
+                for scenario in scenarios}
+
+
+def compare(baseline, results, threshold):
+    """Список регрессий относительно сохранённой базовой линии."""
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'bytes'):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {metric} {previous[metric]} -> {current[metric]}'
+                )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: queries {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        if (current['status'] >= 400
+                and current['status'] != previous['status']):
+            regressions.append(
+                f'{name}: status {previous["status"]} -> {current["status"]}'
+            )
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save(path, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.authtoken.models import Token
+
+from api.management.commands.seed import SEED_PASSWORD
+from api.serializers import CustomTokenObtainPairSerializer
+from services.models import Favorite, ServiceProfile
+
+
+User = get_user_model()
+
+
+class Scenario:
+    """Сценарий замера: один или несколько последовательных запросов.
+
+    auth - запросы от клиента (True) или от персонала ('staff').
+    """
+
+    def __init__(self, name, requests, auth=False):
+        self.name = name
+        self.requests = requests
+        self.auth = auth
+
+
+def get_auth_header(user):
+    if settings.USE_JWT:
+        token = CustomTokenObtainPairSerializer.get_token(user)
+        return f'Bearer {token.access_token}'
+    return f'Token {Token.objects.get_or_create(user=user)[0].key}'
+
+
+def get_staff_user():
+    """Суперпользователь для маршрутов персонала и админки
+    (manage.py seed их не создаёт)."""
+
+    staff = User.objects.filter(is_superuser=True).order_by('id').first()
+    if staff is None:
+        staff = User.objects.create_superuser(email='bench@example.com',
+                                              password=None)
+    return staff
+
+
+def build_scenarios(profile_id=None):
+    """Сценарии для всех маршрутов api/urls.py на сгенерированных данных."""
+
+    user = User.objects.filter(
+        is_master=False, client_profile__isnull=False
+    ).order_by('id').first()
+    profiles = ServiceProfile.objects.order_by('id')
+    if profile_id is not None:
+        profiles = profiles.filter(pk=profile_id)
+    profile = profiles.first()
+    if user is None or profile is None:
+        return []
+
+    category = profile.categories.first()
+    service = profile.services.first()
+    review = profile.reviews.order_by('id').first()
+    schedule = profile.schedules.order_by('id').first()
+    base = f'/api/services/{profile.id}'
+    # Переключение избранного начинается с профиля не в избранном
+    Favorite.objects.filter(client_profile__client=user,
+                            service_profile=profile).delete()
+
+    def get(path):
+        return ('get', path, None)
+
+    scenarios = [
+        Scenario('categories-list', [get('/api/categories/')]),
+        Scenario('services-list', [get('/api/services/')]),
+        Scenario('service_profiles-list', [get('/api/service_profiles/')]),
+        Scenario('service_profiles-list-auth',
+                 [get('/api/service_profiles/')], auth=True),
+        Scenario('service_profiles-list-is_favorited',
+                 [get('/api/service_profiles/?is_favorited=true')],
+                 auth=True),
+        Scenario('service_profiles-detail',
+                 [get(f'/api/service_profiles/{profile.id}/')]),
+        Scenario('images-list', [get(f'{base}/images/')]),
+        Scenario('reviews-list', [get(f'{base}/reviews/')]),
+        Scenario('schedules-list', [get(f'{base}/schedules/')]),
+        Scenario('clients-list', [get('/api/clients/')], auth=True),
+        Scenario('users-me', [get('/api/users/me/')], auth=True),
+        Scenario('users-list', [get('/api/users/')], auth='staff'),
+        Scenario('favorite-toggle', [
+            ('post', f'/api/service_profiles/{profile.id}/favorite/', None),
+            ('delete', f'/api/service_profiles/{profile.id}/favorite/', None),
+        ], auth=True),
+        Scenario('token-login', [
+            ('post',
+             '/api/auth/jwt/create/' if settings.USE_JWT
+             else '/api/auth/token/login/',
+             {'email': user.email, 'password': SEED_PASSWORD}),
+        ]),
+    ]
+    if category is not None:
+        scenarios.append(Scenario(
+            'service_profiles-list-categories',
+            [get(f'/api/service_profiles/?categories={category.name}')]
+        ))
+    if service is not None:
+        scenarios.append(Scenario(
+            'service_profiles-list-services',
+            [get(f'/api/service_profiles/?services={service.name}')]
+        ))
+    if review is not None:
+        scenarios.append(Scenario(
+            'comments-list', [get(f'{base}/reviews/{review.id}/comments/')]
+        ))
+    if schedule is not None:
+        scenarios.append(Scenario(
+            'appointments-list',
+            [get(f'{base}/schedules/{schedule.id}/appointments/')]
+        ))
+    staff = get_staff_user()
+    for scenario in scenarios:
+        if scenario.auth == 'staff':
+            scenario.headers = {'Authorization': get_auth_header(staff)}
+        elif scenario.auth:
+            scenario.headers = {'Authorization': get_auth_header(user)}
+        else:
+            scenario.headers = {}
+    return scenarios
@@ -0,0 +1,103 @@
+import json
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.fast_serializers import (CategoryFastSerializer,
+                                  ReviewFastSerializer,
+                                  ScheduleFastSerializer,
+                                  ServiceProfileFastSerializer)
+from api.serializers import (CategorySerializer,
+                             ReviewSerializer,
+                             ScheduleSerializer,
+                             ServiceProfileSerializer)
+from api.views import ServiceProfileViewSet
+from appointments.models import Schedule
+from services.models import Category, Review
+
+
+def get_context(user=None, params=None):
+    request = Request(RequestFactory().get('/api/', params or {}))
+    request.user = user or AnonymousUser()
+    return {'request': request}
+
+
+def get_cases(rows):
+    """Пары (обычный сериализатор, быстрый сериализатор) с данными."""
+
+    profiles = ServiceProfileViewSet.select_fields(
+        ServiceProfileViewSet.queryset.all()
+    )
+    review = Review.objects.order_by('service_profile_id').first()
+    reviews = Review.objects.filter(
+        service_profile_id=getattr(review, 'service_profile_id', None)
+    ).select_related('author')
+    categories = Category.objects.all()
+    schedules = Schedule.objects.select_related('service_profile')
+    return (
+        ('ServiceProfileSerializer', ServiceProfileSerializer,
+         ServiceProfileFastSerializer, profiles[:rows]),
+        ('ReviewSerializer', ReviewSerializer,
+         ReviewFastSerializer, reviews[:rows]),
+        ('CategorySerializer', CategorySerializer,
+         CategoryFastSerializer, categories[:rows]),
+        ('ScheduleSerializer', ScheduleSerializer,
+         ScheduleFastSerializer, schedules[:rows]),
+    )
+
+
+def measure(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            data = func()
+            timings.append(time.perf_counter() - started)
+    return data, min(timings) * 1000, len(context.captured_queries)
+
+
+def as_json(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+def run(rows=10, iterations=5, user=None, params=None, names=None):
+    """Замер обычных и быстрых сериализаторов и сверка их вывода.
+
+    params - параметры запроса в контексте (?fields=, ?omit=, ?expand=),
+    names - имена проверяемых сериализаторов (None - все).
+    """
+
+    results = []
+    for name, serializer_class, fast_class, queryset in get_cases(rows):
+        if names and name not in names:
+            continue
+        context = get_context(user, params)
+        # Выборка страницы не входит в замер, только сериализация
+        instances = list(queryset)
+        # Новый запрос на итерацию: загрузчики запоминают значения
+        data, drf_ms, drf_queries = measure(
+            lambda: serializer_class(
+                instances, many=True, context=get_context(user, params)
+            ).data,
+            iterations
+        )
+        fast = fast_class(context)
+        rows = list(fast.get_queryset(queryset))
+        fast_data, fast_ms, fast_queries = measure(
+            lambda: fast.to_representation(rows),
+            iterations
+        )
+        results.append({'name': name,
+                        'rows': len(data),
+                        'drf_ms': drf_ms,
+                        'drf_queries': drf_queries,
+                        'fast_ms': fast_ms,
+                        'fast_queries': fast_queries,
+                        'matches': as_json(data) == as_json(fast_data)})
+    return results
@@ -0,0 +1,128 @@
+import json
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+
+
+IMPORT_TIME_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+# Запуск рабочего процесса: импорт приложения WSGI и URLconf, прогрев,
+# первый запрос; результат - JSON в stdout
+STARTUP_SCRIPT = '''
+import json
+import time
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+loaded = time.perf_counter()
+if {warm}:
+    from api.warmup import warm_up
+    warm_up()
+warmed = time.perf_counter()
+from django.test import Client
+client = Client(raise_request_exception=False)
+requested = time.perf_counter()
+status = client.get({path!r}).status_code
+finished = time.perf_counter()
+print(json.dumps({{
+    'startup_ms': round((loaded - started) * 1000, 2),
+    'warmup_ms': round((warmed - loaded) * 1000, 2),
+    'first_request_ms': round((finished - requested) * 1000, 2),
+    'status': status,
+}}))
+'''
+
+
+class ImportRecord:
+    """Строка отчёта python -X importtime (времена в микросекундах)."""
+
+    def __init__(self, self_us, cumulative_us, depth, name):
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+        self.name = name
+
+    @property
+    def package(self):
+        return self.name.partition('.')[0]
+
+
+def parse_import_time(output):
+    """Записи отчёта importtime в порядке вывода (вложенные - раньше)."""
+
+    records = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            records.append(ImportRecord(int(match[1]),
+                                        int(match[2]),
+                                        (len(match[3]) - 1) // 2,
+                                        match[4]))
+    return records
+
+
+def run_process(warm, path, import_time=False):
+    options = ['-X', 'importtime'] if import_time else []
+    process = subprocess.run(
+        [sys.executable, *options, '-c',
+         STARTUP_SCRIPT.format(warm=warm, path=path)],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout.splitlines()[-1]), process.stderr
+
+
+def get_project_packages():
+    base_dir = str(settings.BASE_DIR)
+    return {config.name.partition('.')[0]
+            for config in apps.get_app_configs()
+            if config.path.startswith(base_dir)} | {'pro_master_backend'}
+
+
+def import_audit(records, top=15):
+    """Сводка импорта: пакеты по собственному времени и тяжёлые
+    зависимости, импортируемые модулями проекта."""
+
+    packages = Counter()
+    for record in records:
+        packages[record.package] += record.self_us
+    project = get_project_packages()
+
+    # Прямые зависимости модулей проекта из сторонних пакетов:
+    # importtime выводит вложенные импорты перед импортирующим модулем
+    dependencies = []
+    for index, record in enumerate(records):
+        if record.package not in project:
+            continue
+        for child in reversed(records[:index]):
+            if child.depth <= record.depth:
+                break
+            if (child.depth == record.depth + 1
+                    and child.package not in project):
+                dependencies.append((record.name, child.name,
+                                     child.cumulative_us))
+    dependencies.sort(key=lambda item: -item[2])
+    return {
+        'total_ms': round(sum(packages.values()) / 1000, 2),
+        'packages': [(name, round(us / 1000, 2))
+                     for name, us in packages.most_common(top)],
+        'dependencies': [(module, dependency, round(us / 1000, 2))
+                         for module, dependency, us in dependencies[:top]],
+    }
+
+
+def run(path, top=15):
+    """Отчёт об импорте и запуск процесса без прогрева и с прогревом."""
+
+    _, output = run_process(False, path, import_time=True)
+    return {
+        'imports': import_audit(parse_import_time(output), top),
+        'cold': run_process(False, path)[0],
+        'warm': run_process(True, path)[0],
+    }
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# Бэкенды кеша, не разделяемые между процессами
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.database, Tags.caches)
+def check_replica_sticky_cache(app_configs, **kwargs):
+    """Чтение с реплик требует общего кеша отметок записи.
+
+    Иначе после записи следующий запрос пользователя, попавший
+    в другой воркер, читает с реплики и не видит своих изменений.
+    """
+
+    if not settings.DATABASE_REPLICAS:
+        return []
+    alias = settings.REPLICA_STICKY_CACHE_ALIAS
+    if not alias:
+        return [Error(
+            'При чтении с реплик (DB_REPLICA_HOSTS) не задан '
+            'REPLICA_STICKY_CACHE_ALIAS',
+            hint='Укажите кеш, общий для всех воркеров '
+                 '(Redis, Memcached)',
+            id='api.E001',
+        )]
+    if alias not in settings.CACHES:
+        return [Error(
+            f'REPLICA_STICKY_CACHE_ALIAS: кеш {alias!r} '
+            f'не описан в CACHES',
+            id='api.E002',
+        )]
+    if settings.CACHES[alias]['BACKEND'] in LOCAL_CACHE_BACKENDS:
+        return [Error(
+            f'REPLICA_STICKY_CACHE_ALIAS: кеш {alias!r} '
+            f'локален для процесса',
+            hint='Укажите кеш, общий для всех воркеров '
+                 '(Redis, Memcached)',
+            id='api.E003',
+        )]
+    return []
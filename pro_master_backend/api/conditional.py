@@ -0,0 +1,85 @@
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from services.models import CatalogueVersion, ServiceProfile
+
+
+def get_catalogue_versions(*names):
+    """Версии справочников: [(версия, дата изменения), ...] в порядке names."""
+
+    versions = {name: (version, updated_at) for name, version, updated_at
+                in CatalogueVersion.objects.filter(
+                    name__in=names
+                ).values_list('name', 'version', 'updated_at')}
+    result = []
+    for name in names:
+        if name not in versions:
+            version = CatalogueVersion.objects.get_or_create(name=name)[0]
+            versions[name] = (version.version, version.updated_at)
+        result.append(versions[name])
+    return result
+
+
+def combine(versions):
+    """Валидатор из нескольких версий: (строка версий, последнее изменение)."""
+
+    return ('.'.join(str(version) for version, _ in versions),
+            max(updated_at for _, updated_at in versions))
+
+
+def categories_validators(**kwargs):
+    return combine(get_catalogue_versions(CatalogueVersion.CATEGORIES))
+
+
+def service_profile_validators(profile_id,
+                               catalogues=(CatalogueVersion.CATEGORIES,
+                                           CatalogueVersion.SERVICES),
+                               **kwargs):
+    """Версия профиля и справочников, данные которых входят в профиль."""
+
+    try:
+        profile = ServiceProfile.objects.filter(pk=profile_id).values_list(
+            'version', 'updated_at'
+        ).first()
+    except ValueError:
+        return None
+    if profile is None:
+        return None
+    return combine([profile, *get_catalogue_versions(*catalogues)])
+
+
+def review_validators(profile_id, **kwargs):
+    """Версия профиля и данных клиентов - авторов отзывов и комментариев."""
+
+    return service_profile_validators(
+        profile_id, (CatalogueVersion.CATEGORIES,
+                     CatalogueVersion.SERVICES,
+                     CatalogueVersion.CLIENTS)
+    )
+
+
+def make_etag(prefix, version, format, user=None):
+    parts = [prefix, version, format]
+    if user is not None and not (user.is_anonymous or user.is_master):
+        # Поле is_favorited зависит от пользователя
+        parts.append(f'u{user.pk}')
+    return '"{}"'.format('-'.join(map(str, parts)))
+
+
+def conditional_response(request, etag, last_modified=None):
+    """Ответ 304 (412) по заголовкам If-* запроса или None."""
+
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    return get_conditional_response(request, etag=etag,
+                                    last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified=None, per_user=False):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        if per_user:
+            patch_vary_headers(response, ('Authorization',))
+    return response
@@ -0,0 +1,150 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import (iscoroutinefunction,
+                          markcoroutinefunction,
+                          sync_to_async)
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from rest_framework import permissions
+
+from .tracing import span
+
+
+read_alias = ContextVar('read_alias', default=None)
+
+# Псевдоним реплики: (время проверки, отставание в секундах или None)
+_lag_checks = {}
+
+LAG_QUERIES = {
+    'postgresql': ('SELECT COALESCE(EXTRACT(EPOCH FROM now() - '
+                   'pg_last_xact_replay_timestamp()), 0)'),
+}
+
+
+def sticky_key(user_id):
+    return f'db_sticky_{user_id}'
+
+
+def get_sticky_cache():
+    """Общий кеш отметок записи (REPLICA_STICKY_CACHE_ALIAS).
+
+    Отметка должна быть видна всем воркерам: следующий запрос
+    пользователя может попасть в другой процесс.
+    """
+
+    return caches[settings.REPLICA_STICKY_CACHE_ALIAS or 'default']
+
+
+def mark_sticky(user):
+    """Чтение пользователя с основной БД в течение REPLICA_STICKY_SECONDS."""
+
+    if user is not None and user.is_authenticated:
+        with span('cache.set', **{'cache.alias': 'sticky'}):
+            get_sticky_cache().set(sticky_key(user.pk), True,
+                                   settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user):
+    if user is None or not user.is_authenticated:
+        return False
+    with span('cache.get', **{'cache.alias': 'sticky'}):
+        return get_sticky_cache().get(sticky_key(user.pk), False)
+
+
+def get_replica_lag(alias):
+    """Отставание реплики в секундах (кешируется в процессе)."""
+
+    now = time.monotonic()
+    checked = _lag_checks.get(alias)
+    if checked is not None and now - checked[0] < (
+            settings.REPLICA_LAG_CHECK_INTERVAL):
+        return checked[1]
+
+    connection = connections[alias]
+    query = LAG_QUERIES.get(connection.vendor)
+    try:
+        if query is None:
+            # Копия той же БД (локальная проверка на SQLite)
+            connection.ensure_connection()
+            lag = 0.0
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                lag = float(cursor.fetchone()[0])
+    except DatabaseError:
+        lag = None
+    _lag_checks[alias] = (now, lag)
+    return lag
+
+
+def choose_replica():
+    """Случайная реплика с допустимым отставанием или None."""
+
+    healthy = []
+    for alias in settings.DATABASE_REPLICAS:
+        lag = get_replica_lag(alias)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS:
+            healthy.append(alias)
+    return random.choice(healthy) if healthy else None
+
+
+class ReplicaRouter:
+    """Маршрутизатор: чтение вьюсетов ReplicaReadMixin с реплик.
+
+    Реплика выбирается на время запроса (контекстная переменная
+    read_alias); внутри транзакции основной БД и вне таких запросов
+    все обращения идут в основную БД. Миграции применяются только
+    к основной БД.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaStickinessMiddleware:
+    """Закрепление чтения за основной БД после успешной записи."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def is_write(request, response):
+        return (request.method not in permissions.SAFE_METHODS
+                and response.status_code < 400)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.is_write(request, response):
+            # request.user заменяется пользователем DRF после аутентификации
+            mark_sticky(getattr(request, 'user', None))
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.is_write(request, response):
+            await sync_to_async(mark_sticky)(getattr(request, 'user', None))
+        return response
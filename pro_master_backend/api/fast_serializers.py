@@ -0,0 +1,552 @@
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+
+from rest_framework import serializers
+
+from services.models import (Category,
+                             Comment,
+                             Employee,
+                             Favorite,
+                             Image,
+                             Review,
+                             ServiceProfile,
+                             ServiceProfileCategory,
+                             ServiceProfileService)
+
+from .utils import get_requested_expand, get_requested_fields
+
+
+format_date = serializers.DateTimeField(format='%d.%m.%Y').to_representation
+
+CLIENT_PROFILE_FIELDS = ('id',
+                         'client_id',
+                         'client__email',
+                         'client__phone_number',
+                         'client__is_master',
+                         'profile_name',
+                         'first_name',
+                         'last_name')
+
+
+def prefixed(prefix, fields):
+    return tuple(f'{prefix}__{field}' for field in fields)
+
+
+def as_string(value):
+    return None if value is None else str(value)
+
+
+def group_rows(rows):
+    """Группировка строк values_list по первому столбцу с сохранением порядка."""
+
+    groups = defaultdict(list)
+    for key, *values in rows:
+        groups[key].append(values)
+    return groups
+
+
+def count_by(queryset, field):
+    return (queryset.order_by().values(field)
+            .annotate(count=Count('id')).values_list(field, 'count'))
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(max_workers=settings.ASYNC_READ_DB_THREADS,
+                              thread_name_prefix='async-read-db')
+
+
+def fetch(queryset):
+    try:
+        return list(queryset)
+    finally:
+        # Соединение потока пула не сохраняется (CONN_MAX_AGE): иначе
+        # каждый из ASYNC_READ_DB_THREADS потоков каждого воркера
+        # держал бы открытое соединение с БД
+        connections[queryset.db].close()
+
+
+async def alist(queryset):
+    """Загрузка queryset в пуле потоков со своими соединениями.
+
+    Асинхронный ORM Django 4.2 выполняет запросы в одном потоке
+    запроса, поэтому независимые запросы, собранные через
+    asyncio.gather, шли бы последовательно. Соединение открывается
+    на время запроса и закрывается после него.
+    """
+
+    return await sync_to_async(fetch, thread_sensitive=False,
+                               executor=get_executor())(queryset)
+
+
+class FastListSerializer:
+    """Быстрый сериализатор списков только для чтения.
+
+    Строит ответ напрямую из строк `.values()`, не создавая экземпляры
+    моделей и поля DRF; связанные данные загружаются одним запросом
+    на тип связи для всей страницы. Запросы связей независимы друг
+    от друга (get_related), поэтому в асинхронном режиме выполняются
+    параллельно. Формат ответа совпадает с обычным сериализатором
+    (проверяется в manage.py bench_serializers).
+
+    Поля ответа `fields` выбираются параметрами ?fields= и ?omit=:
+    столбцы `field_values` и связанные данные невыбранных полей
+    не загружаются, значения не вычисляются. Связи `expandable_fields`
+    возвращаются как id, ?expand= встраивает их (столбцы `expand_values`).
+    """
+
+    fields = ()
+    value_fields = ()
+    field_values = {}
+    expandable_fields = ()
+    expand_values = {}
+
+    def __init__(self, context):
+        self.context = context
+        self.request = context.get('request')
+        self.requested_fields = None
+        self.expand = set()
+        if self.request is not None:
+            self.requested_fields = get_requested_fields(self.request,
+                                                         self.fields)
+            self.expand = get_requested_expand(self.request,
+                                               self.expandable_fields)
+
+    def wants(self, *fields):
+        return (self.requested_fields is None
+                or not self.requested_fields.isdisjoint(fields))
+
+    def expands(self, path):
+        return self.wants(path.split('.')[0]) and path in self.expand
+
+    def get_value_fields(self):
+        kept = set()
+        skipped = set()
+        for field, values in self.field_values.items():
+            (kept if self.wants(field) else skipped).update(values)
+        for path, values in self.expand_values.items():
+            (kept if self.expands(path) else skipped).update(values)
+        return tuple(value for value in self.value_fields
+                     if value in kept or value not in skipped)
+
+    def get_queryset(self, queryset):
+        return queryset.select_related(None).prefetch_related(
+            None
+        ).values(*self.get_value_fields())
+
+    def file_url(self, storage, name):
+        if not name:
+            return None
+        url = storage.url(name)
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+    def client_profile(self, values):
+        """ClientProfileContextSerializer из значений CLIENT_PROFILE_FIELDS."""
+
+        (profile_id, client_id, email, phone_number, is_master,
+         profile_name, first_name, last_name) = values
+        return {'id': profile_id,
+                'client': {'id': client_id,
+                           'email': email,
+                           'phone_number': as_string(phone_number),
+                           'is_master': is_master},
+                'profile_name': profile_name,
+                'first_name': first_name,
+                'last_name': last_name}
+
+    def get_related(self, rows):
+        """Запросы связанных данных страницы: {имя: queryset}."""
+
+        return {}
+
+    def get_field_getters(self, related):
+        """Функции значений полей ответа по строке: {поле: функция}."""
+
+        raise NotImplementedError('.get_field_getters() must be overridden')
+
+    def build(self, rows, related):
+        getters = [(field, getter) for field, getter
+                   in self.get_field_getters(related).items()
+                   if self.wants(field)]
+        return [{field: getter(row) for field, getter in getters}
+                for row in rows]
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        related = {name: list(queryset) for name, queryset
+                   in self.get_related(rows).items()}
+        return self.build(rows, related)
+
+    async def ato_representation(self, rows):
+        rows = [row async for row in rows]
+        querysets = self.get_related(rows)
+        results = await asyncio.gather(*map(alist, querysets.values()))
+        return self.build(rows, dict(zip(querysets, results)))
+
+
+class CategoryFastSerializer(FastListSerializer):
+    """Быстрый аналог CategorySerializer (depth = 5) по дереву категорий."""
+
+    fields = ('id', 'name', 'parent_category', 'child_categories')
+    value_fields = ('id',)
+    depth = 5
+
+    def get_related(self, rows):
+        return {'categories': Category.objects.values('id',
+                                                      'name',
+                                                      'parent_category_id')}
+
+    def build(self, rows, related):
+        ids = [row['id'] for row in rows]
+        categories = {}
+        children = defaultdict(list)
+        for category in related['categories']:
+            categories[category['id']] = category
+            children[category['parent_category_id']].append(category)
+
+        def nested(category, depth):
+            parent_id = category['parent_category_id']
+            if parent_id is not None and depth > 0:
+                parent = nested(categories[parent_id], depth - 1)
+            else:
+                parent = parent_id
+            return {'id': category['id'],
+                    'name': category['name'],
+                    'parent_category': parent}
+
+        def parent_category(category):
+            parent_id = category['parent_category_id']
+            if parent_id is None:
+                return None
+            return nested(categories[parent_id], self.depth - 1)
+
+        getters = [(field, getter) for field, getter in (
+            ('id', itemgetter('id')),
+            ('name', itemgetter('name')),
+            ('parent_category', parent_category),
+            ('child_categories', lambda category: [
+                nested(child, self.depth - 1)
+                for child in children[category['id']]
+            ]),
+        ) if self.wants(field)]
+        return [{field: getter(categories[category_id])
+                 for field, getter in getters}
+                for category_id in ids]
+
+
+class ReviewFastSerializer(FastListSerializer):
+    """Быстрый аналог ReviewSerializer для списка отзывов."""
+
+    author_fields = prefixed('author', CLIENT_PROFILE_FIELDS)
+    get_author = itemgetter(*author_fields)
+    fields = ('id',
+              'service_profile',
+              'author',
+              'text',
+              'score',
+              'pub_date',
+              'comments')
+    value_fields = ('id',
+                    'service_profile__name',
+                    'author_id',
+                    *author_fields,
+                    'text',
+                    'score',
+                    'pub_date')
+    field_values = {'service_profile': ('service_profile__name',),
+                    'author': ('author_id',),
+                    'text': ('text',),
+                    'score': ('score',),
+                    'pub_date': ('pub_date',)}
+    expandable_fields = ('author',)
+    expand_values = {'author': author_fields}
+
+    def get_related(self, rows):
+        ids = [row['id'] for row in rows]
+        comments = Comment.objects.filter(review_id__in=ids)
+        related = {}
+        if self.wants('comments'):
+            related['comments'] = comments.values_list(
+                'review_id', 'id', 'text', 'pub_date', *self.author_fields
+            )
+        return related
+
+    def get_field_getters(self, related):
+        comments = group_rows(related.get('comments', ()))
+        return {
+            'id': itemgetter('id'),
+            'service_profile': itemgetter('service_profile__name'),
+            'author': (
+                (lambda row: self.client_profile(self.get_author(row)))
+                if self.expands('author') else itemgetter('author_id')
+            ),
+            'text': itemgetter('text'),
+            'score': itemgetter('score'),
+            'pub_date': lambda row: format_date(row['pub_date']),
+            'comments': lambda row: [
+                {'id': comment_id,
+                 'review': row['id'],
+                 'text': text,
+                 'author': self.client_profile(author),
+                 'pub_date': format_date(pub_date)}
+                for comment_id, text, pub_date, *author
+                in comments[row['id']]
+            ],
+        }
+
+
+class ServiceProfileFastSerializer(FastListSerializer):
+    """Быстрый аналог ServiceProfileSerializer для списка профилей."""
+
+    owner_fields = ('owner_id',
+                    'owner__email',
+                    'owner__phone_number',
+                    'owner__is_master')
+    fields = ('id',
+              'name',
+              'categories',
+              'services',
+              'owner',
+              'description',
+              'owner_first_name',
+              'owner_last_name',
+              'profile_foto',
+              'profile_images',
+              'phone_number',
+              'site_address',
+              'social_network_contacts',
+              'created',
+              'employees',
+              'employees_count',
+              'reviews',
+              'rating',
+              'additions_in_favorite_count',
+              'is_favorited')
+    value_fields = ('id',
+                    'name',
+                    *owner_fields,
+                    'description',
+                    'owner_first_name',
+                    'owner_last_name',
+                    'profile_foto',
+                    'phone_number',
+                    'site_address',
+                    'social_network_contacts',
+                    'created',
+                    'rating')
+    field_values = {'name': ('name',),
+                    'owner': owner_fields,
+                    'description': ('description',),
+                    'owner_first_name': ('owner_first_name',),
+                    'owner_last_name': ('owner_last_name',),
+                    'profile_foto': ('profile_foto',),
+                    'phone_number': ('phone_number',),
+                    'site_address': ('site_address',),
+                    'social_network_contacts': ('social_network_contacts',),
+                    'created': ('created',),
+                    'rating': ('rating',)}
+    expandable_fields = ('employees.organization',)
+    expand_values = {'employees.organization': ('name',)}
+
+    def get_related(self, rows):
+        ids = [row['id'] for row in rows]
+        related = {}
+        if self.wants('categories'):
+            related['categories'] = ServiceProfileCategory.objects.filter(
+                service_profile_id__in=ids
+            ).order_by('category__name').values_list(
+                'service_profile_id', 'category_id',
+                'category__name', 'category__parent_category_id'
+            )
+        if self.wants('services') or self.expands('employees.organization'):
+            related['services'] = ServiceProfileService.objects.filter(
+                service_profile_id__in=ids
+            ).order_by('service__name').values_list(
+                'service_profile_id', 'service_id', 'service__name',
+                'service__category_id', 'service__duration',
+                'service__price'
+            )
+        if self.wants('profile_images'):
+            related['images'] = Image.objects.filter(
+                service_profile_id__in=ids
+            ).values_list('service_profile_id', 'id', 'image')
+        if self.wants('employees'):
+            related['employees'] = Employee.objects.filter(
+                organization_id__in=ids
+            ).values_list('organization_id', 'id', 'first_name',
+                          'last_name', 'phone_number')
+        elif self.wants('employees_count'):
+            related['employees_counts'] = count_by(
+                Employee.objects.filter(organization_id__in=ids),
+                'organization_id'
+            )
+        if self.wants('reviews'):
+            related['reviews'] = Review.objects.filter(
+                service_profile_id__in=ids
+            ).values_list('service_profile_id', 'id', 'text', 'score',
+                          'author_id', 'pub_date')
+        if self.wants('additions_in_favorite_count'):
+            related['favorites_counts'] = count_by(
+                Favorite.objects.filter(service_profile_id__in=ids),
+                'service_profile_id'
+            )
+        user = self.request.user
+        if (self.wants('is_favorited')
+                and not (user.is_anonymous or user.is_master)):
+            related['favorited_ids'] = Favorite.objects.filter(
+                client_profile_id=user.client_profile.pk,
+                service_profile_id__in=ids
+            ).values_list('service_profile_id', flat=True)
+        return related
+
+    def get_field_getters(self, related):
+        categories = group_rows(related.get('categories', ()))
+        services = group_rows(related.get('services', ()))
+        images = group_rows(related.get('images', ()))
+        employees = group_rows(related.get('employees', ()))
+        employees_counts = dict(related.get('employees_counts', ()))
+        reviews = group_rows(related.get('reviews', ()))
+        favorites_counts = dict(related.get('favorites_counts', ()))
+        favorited_ids = set(related.get('favorited_ids', ()))
+        foto_storage = ServiceProfile._meta.get_field('profile_foto').storage
+        image_storage = Image._meta.get_field('image').storage
+
+        def employees_list(row):
+            profile_id = row['id']
+            organization = profile_id
+            if self.expands('employees.organization'):
+                organization = {
+                    'id': profile_id,
+                    'name': row['name'],
+                    'services': [service[0]
+                                 for service in services[profile_id]],
+                }
+            return [{'id': employee_id,
+                     'first_name': first_name,
+                     'last_name': last_name,
+                     'phone_number': as_string(phone_number),
+                     'organization': organization}
+                    for employee_id, first_name, last_name, phone_number
+                    in employees[profile_id]]
+
+        def employees_count(row):
+            if 'employees' in related:
+                return 1 + len(employees[row['id']])
+            return 1 + employees_counts.get(row['id'], 0)
+
+        return {
+            'id': itemgetter('id'),
+            'name': itemgetter('name'),
+            'categories': lambda row: [
+                {'id': category_id,
+                 'name': name,
+                 'parent_category_id': parent_id}
+                for category_id, name, parent_id in categories[row['id']]
+            ],
+            'services': lambda row: [
+                {'id': service_id,
+                 'name': name,
+                 'category': category_id,
+                 'duration': duration,
+                 'price': price}
+                for service_id, name, category_id, duration, price
+                in services[row['id']]
+            ],
+            'owner': lambda row: {
+                'id': row['owner_id'],
+                'email': row['owner__email'],
+                'phone_number': as_string(row['owner__phone_number']),
+                'is_master': row['owner__is_master'],
+            },
+            'description': itemgetter('description'),
+            'owner_first_name': itemgetter('owner_first_name'),
+            'owner_last_name': itemgetter('owner_last_name'),
+            'profile_foto': lambda row: self.file_url(foto_storage,
+                                                      row['profile_foto']),
+            'profile_images': lambda row: [
+                {'id': image_id,
+                 'service_profile': row['id'],
+                 'image': self.file_url(image_storage, image)}
+                for image_id, image in images[row['id']]
+            ],
+            'phone_number': lambda row: as_string(row['phone_number']),
+            'site_address': itemgetter('site_address'),
+            'social_network_contacts': itemgetter('social_network_contacts'),
+            'created': lambda row: format_date(row['created']),
+            'employees': employees_list,
+            'employees_count': employees_count,
+            'reviews': lambda row: [
+                {'id': review_id,
+                 'text': text,
+                 'score': score,
+                 'author': author_id,
+                 'pub_date': format_date(pub_date)}
+                for review_id, text, score, author_id, pub_date
+                in reviews[row['id']]
+            ],
+            'rating': lambda row: (None if row['rating'] is None
+                                   else int(row['rating'])),
+            'additions_in_favorite_count': lambda row: favorites_counts.get(
+                row['id'], 0
+            ),
+            'is_favorited': lambda row: row['id'] in favorited_ids,
+        }
+
+
+class ScheduleFastSerializer(FastListSerializer):
+    """Быстрый аналог ScheduleSerializer для списка расписаний."""
+
+    fields = ('id', 'service_profile', 'date', 'start', 'end')
+    value_fields = ('id',
+                    'service_profile_id',
+                    'service_profile__name',
+                    'date',
+                    'start',
+                    'end')
+    field_values = {'service_profile': ('service_profile_id',),
+                    'date': ('date',),
+                    'start': ('start',),
+                    'end': ('end',)}
+    expandable_fields = ('service_profile',)
+    expand_values = {'service_profile': ('service_profile__name',)}
+
+    def get_related(self, rows):
+        if not self.expands('service_profile'):
+            return {}
+        return {'services': ServiceProfileService.objects.filter(
+            service_profile_id__in={row['service_profile_id']
+                                    for row in rows}
+        ).order_by('service__name').values_list(
+            'service_profile_id', 'service_id'
+        )}
+
+    def get_field_getters(self, related):
+        services = group_rows(related.get('services', ()))
+        return {
+            'id': itemgetter('id'),
+            'service_profile': (
+                (lambda row: {
+                    'id': row['service_profile_id'],
+                    'name': row['service_profile__name'],
+                    'services': [service_id for service_id, in services[
+                        row['service_profile_id']
+                    ]],
+                })
+                if self.expands('service_profile')
+                else itemgetter('service_profile_id')
+            ),
+            'date': lambda row: row['date'].isoformat(),
+            'start': lambda row: row['start'].isoformat(),
+            'end': lambda row: row['end'].isoformat(),
+        }
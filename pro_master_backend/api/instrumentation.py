@@ -0,0 +1,301 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import count_reused_connections, observe_request
+from .slow_queries import recorder
+from .tracing import span, start_trace
+
+
+logger = logging.getLogger(__name__)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+SPACES_RE = re.compile(r'\s+')
+# Управление транзакциями (atomic(), TestCase): не запросы к данным
+TRANSACTION_CONTROL_RE = re.compile(
+    r'\s*(?:SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b',
+    re.IGNORECASE
+)
+
+
+def fingerprint(sql):
+    """Нормализованный отпечаток SQL-запроса без значений параметров."""
+
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    sql = LITERAL_RE.sub('?', sql)
+    return SPACES_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """Статистика обращений к БД и фаз обработки одного запроса.
+
+    Запросы одного HTTP-запроса могут выполняться параллельно
+    в пуле потоков (api.fast_serializers.alist), поэтому счётчики
+    меняются под блокировкой.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.fingerprints = Counter()
+        self.phases = Counter()
+        self.route = None
+        self.request = None
+        self.trace = None
+
+    @property
+    def duplicates(self):
+        return {sql: count
+                for sql, count in self.fingerprints.items() if count > 1}
+
+    def record_query(self, sql, duration):
+        key = fingerprint(sql)
+        with self.lock:
+            self.query_count += 1
+            self.sql_time += duration
+            self.fingerprints[key] += 1
+
+    def add_phase(self, name, duration):
+        with self.lock:
+            self.phases[name] += duration
+
+    def as_dict(self):
+        return {'route': self.route,
+                'queries': self.query_count,
+                'sql_ms': round(self.sql_time * 1000, 2),
+                'duplicates': sum(self.duplicates.values()),
+                **{f'{name}_ms': round(duration * 1000, 2)
+                   for name, duration in self.phases.items()}}
+
+    def server_timing(self):
+        items = [f'db;dur={self.sql_time * 1000:.2f};'
+                 f'desc="{self.query_count} queries"']
+        items.extend(f'{name};dur={duration * 1000:.2f}'
+                     for name, duration in self.phases.items())
+        return ', '.join(items)
+
+
+@contextmanager
+def phase(name):
+    """Замер длительности фазы обработки запроса (сериализация и т.п.)."""
+
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        with span(f'drf.{name}'):
+            yield
+    finally:
+        metrics.add_phase(name, time.perf_counter() - started)
+
+
+def timed(name, func):
+    """func, выполняемая как фаза name."""
+
+    def wrapper(*args, **kwargs):
+        with phase(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка execute всех соединений с БД (см. install_query_wrapper).
+
+    Учитывает запрос в метриках текущего HTTP-запроса; вне запроса
+    (фоновые потоки, команды) и для команд управления транзакциями
+    (SAVEPOINT, RELEASE SAVEPOINT и т.п.) только открывает отрезок
+    трассы.
+    """
+
+    started = time.perf_counter()
+    connection = context['connection']
+    try:
+        with span('db.query',
+                  **{'db.system': connection.vendor,
+                     'db.alias': connection.alias}) as query_span:
+            if query_span is not None:
+                query_span.set_attribute('db.statement', fingerprint(sql))
+            return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics = current_metrics.get()
+        if metrics is not None and not TRANSACTION_CONTROL_RE.match(sql):
+            metrics.record_query(sql, duration)
+            threshold = settings.SLOW_QUERY_THRESHOLD_MS
+            if threshold is not None and duration * 1000 >= threshold:
+                recorder.capture(sql, fingerprint(sql), params, many,
+                                 duration, connection.alias,
+                                 metrics.request)
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    # Соединения создаются в потоке, где выполняется запрос к БД
+    # (в том числе в потоках sync_to_async при ASGI), поэтому обёртка
+    # ставится на каждое соединение, а метрики берутся из контекста
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def get_query_budget(route):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(route)
+
+
+class SQLInstrumentationMiddleware:
+    """Учёт SQL-запросов и времени сериализации для каждого запроса.
+
+    Пишет структурированную строку в лог `api.instrumentation`,
+    для персонала и в режиме DEBUG добавляет заголовок Server-Timing.
+    Метрики доступны в ответе как `response.request_metrics`
+    и накапливаются для выдачи в /metrics; запросы дольше
+    SLOW_QUERY_THRESHOLD_MS сохраняются в журнал SlowQuery.
+    При заданном TRACING_EXPORTER запрос трассируется (api.tracing).
+    Работает и в синхронном, и в асинхронном (ASGI) режиме.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.measure(request) as metrics:
+            response = self.get_response(request)
+            self.annotate_trace(request, response, metrics)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        with self.measure(request) as metrics:
+            response = await self.get_response(request)
+            self.annotate_trace(request, response, metrics)
+        return self.finish(request, response, metrics)
+
+    @contextmanager
+    def measure(self, request):
+        count_reused_connections()
+        metrics = RequestMetrics()
+        metrics.request = request
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with start_trace('http.request',
+                             request.headers.get('traceparent'),
+                             **{'http.method': request.method,
+                                'http.target': request.path}) as root:
+                metrics.trace = root
+                yield metrics
+        finally:
+            current_metrics.reset(token)
+            metrics.phases['total'] = time.perf_counter() - started
+
+    def annotate_trace(self, request, response, metrics):
+        root = metrics.trace
+        if root is None:
+            return
+        match = request.resolver_match
+        root.set_attribute('http.route', match.url_name if match else '')
+        root.set_attribute('http.status_code', response.status_code)
+        response['X-Trace-Id'] = root.trace_id
+
+    def finish(self, request, response, metrics):
+        match = request.resolver_match
+        metrics.route = match.url_name if match else None
+        response.request_metrics = metrics
+        observe_request(request, response, metrics)
+
+        log_data = {'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    **metrics.as_dict()}
+        budget = get_query_budget(metrics.route)
+        if budget is not None and metrics.query_count > budget:
+            logger.warning(json.dumps({**log_data, 'budget': budget}))
+        else:
+            logger.info(json.dumps(log_data))
+
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response['Server-Timing'] = metrics.server_timing()
+        return response
+
+
+class InstrumentedViewMixin:
+    """Миксин вьюсетов: замер фаз аутентификации, прав, выборки
+    и сериализации.
+
+    Фаза queryset - построение и фильтрация queryset и выполнение
+    запросов страницы пагинатором (count и строки страницы).
+    """
+
+    def perform_authentication(self, request):
+        with phase('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase('permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with phase('permissions'):
+            super().check_object_permissions(request, obj)
+
+    queryset_methods = ('get_queryset',
+                        'filter_queryset',
+                        'paginate_queryset')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Методы вьюсета (в том числе переопределённые в подклассах)
+        # оборачиваются после проверки прав: выборка в правах
+        # относится к фазе permissions
+        for name in self.queryset_methods:
+            setattr(self, name, timed('queryset', getattr(self, name)))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response,
+                                             *args, **kwargs)
+        render = getattr(response, 'render', None)
+        if render is None:
+            # Ответ без рендеринга (304 условного запроса)
+            return response
+
+        def timed_render():
+            with phase('render'):
+                return render()
+
+        response.render = timed_render
+        return response
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            with phase('serializer'):
+                return to_representation(instance)
+
+        serializer.to_representation = timed_to_representation
+        return serializer
@@ -0,0 +1,161 @@
+from django.db.models import Count
+
+from services.models import Employee, Favorite
+
+
+class BatchLoader:
+    """Пакетный загрузчик значений по ключам (DataLoader).
+
+    Ключи, запрошенные при сериализации страницы, собираются
+    и загружаются одним запросом (batch_load); значения запоминаются
+    до конца запроса. Загрузчик создаётся один раз на запрос
+    (for_context).
+
+    Загрузчики дают скалярные значения (счётчики, флаги) для LoaderField.
+    Вложенные сериализаторы и списки связей через загрузчики не идут:
+    их загружает вьюсет через select_related и prefetch_related
+    (SparseFieldsViewMixin), что проверяет NPlusOneTests
+    (api/tests/test_n_plus_one.py).
+    """
+
+    default = None
+
+    def __init__(self, context):
+        self.context = context
+        self.cache = {}
+        self.pending = set()
+
+    @classmethod
+    def for_context(cls, context):
+        request = context.get('request')
+        holder = getattr(request, '_request', request)
+        if holder is None:
+            loaders = context.setdefault('batch_loaders', {})
+        else:
+            if not hasattr(holder, 'batch_loaders'):
+                holder.batch_loaders = {}
+            loaders = holder.batch_loaders
+        if cls not in loaders:
+            loaders[cls] = cls(context)
+        return loaders[cls]
+
+    def batch_load(self, keys):
+        """Значения по ключам: {ключ: значение}, отсутствующие - default."""
+
+        raise NotImplementedError('.batch_load() must be overridden')
+
+    def defer(self, key):
+        """Значение или Deferred, если ключ ещё не загружен."""
+
+        if key in self.cache:
+            return self.cache[key]
+        self.pending.add(key)
+        return Deferred(self, key)
+
+    def dispatch(self):
+        if not self.pending:
+            return
+        keys, self.pending = self.pending, set()
+        values = self.batch_load(keys)
+        for key in keys:
+            self.cache[key] = values.get(key, self.default)
+
+    def load(self, key):
+        if key not in self.cache:
+            self.pending.add(key)
+            self.dispatch()
+        return self.cache[key]
+
+
+class Deferred:
+    """Значение загрузчика, подставляемое после загрузки страницы."""
+
+    __slots__ = ('loader', 'key', 'transform')
+
+    def __init__(self, loader, key, transform=None):
+        self.loader = loader
+        self.key = key
+        self.transform = transform
+
+    def resolve(self):
+        value = self.loader.load(self.key)
+        if self.transform is not None:
+            return self.transform(value)
+        return value
+
+
+def resolve_deferred(data):
+    """Загрузка отложенных значений и их подстановка в данные ответа."""
+
+    deferred = []
+
+    def collect(container, keys):
+        for key in keys:
+            value = container[key]
+            if isinstance(value, Deferred):
+                deferred.append((container, key, value))
+            elif isinstance(value, dict):
+                collect(value, list(value))
+            elif isinstance(value, list):
+                collect(value, range(len(value)))
+
+    collect({'data': data}, ['data'])
+    for loader in {value.loader for _, _, value in deferred}:
+        loader.dispatch()
+    for container, key, value in deferred:
+        container[key] = value.resolve()
+    return data
+
+
+class CountLoader(BatchLoader):
+    """Количество объектов `model` по значениям поля `field`."""
+
+    model = None
+    field = None
+    default = 0
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def batch_load(self, keys):
+        return dict(self.get_queryset().filter(
+            **{f'{self.field}__in': keys}
+        ).order_by().values(self.field).annotate(
+            count=Count('id')
+        ).values_list(self.field, 'count'))
+
+
+class FavoritesCountLoader(CountLoader):
+    """Количество профилей сервисов в избранном клиента."""
+
+    model = Favorite
+    field = 'client_profile_id'
+
+
+class AdditionsInFavoriteCountLoader(CountLoader):
+    """Количество добавлений профиля сервиса в избранное."""
+
+    model = Favorite
+    field = 'service_profile_id'
+
+
+class EmployeesCountLoader(CountLoader):
+    """Количество сотрудников организации."""
+
+    model = Employee
+    field = 'organization_id'
+
+
+class FavoritedLoader(BatchLoader):
+    """Наличие профиля сервиса в избранном пользователя запроса."""
+
+    default = False
+
+    def batch_load(self, keys):
+        user = self.context['request'].user
+        if user.is_anonymous or user.is_master:
+            return {}
+        return dict.fromkeys(Favorite.objects.filter(
+            client_profile_id=user.client_profile.pk,
+            service_profile_id__in=keys
+        ).values_list('service_profile_id', flat=True), True)
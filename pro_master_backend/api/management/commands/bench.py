@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import runner
+from api.benchmarks.scenarios import build_scenarios
+
+
+class Command(BaseCommand):
+    help = ('Замер p50/p95, количества запросов и размера ответа '
+            'для маршрутов API на сгенерированных данных (manage.py seed)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--profile', type=int,
+                            help='id профиля сервиса для детальных маршрутов')
+        parser.add_argument('--only', nargs='*',
+                            help='Имена сценариев для запуска')
+        parser.add_argument('--save', help='Сохранить результаты в JSON')
+        parser.add_argument('--compare',
+                            help='Сравнить с базовой линией из JSON')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимый рост времени и размера ответа')
+
+    def handle(self, *args, **options):
+        scenarios = build_scenarios(options['profile'])
+        if not scenarios:
+            raise CommandError('Нет данных, сначала выполните manage.py seed')
+        if options['only']:
+            scenarios = [scenario for scenario in scenarios
+                         if scenario.name in options['only']]
+
+        results = runner.run(scenarios,
+                             options['iterations'],
+                             options['warmup'])
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:40} p50 {result["p50_ms"]:9.2f} ms  '
+                f'p95 {result["p95_ms"]:9.2f} ms  '
+                f'{result["queries"]:4} queries  {result["bytes"]:9} B  '
+                f'[{result["status"]}]'
+            )
+
+        if options['save']:
+            runner.save(options['save'], results)
+        if options['compare']:
+            regressions = runner.compare(runner.load(options['compare']),
+                                         results,
+                                         options['threshold'])
+            if regressions:
+                raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий не найдено'))
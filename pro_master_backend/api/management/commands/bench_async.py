@@ -0,0 +1,67 @@
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.urls import get_resolver
+
+from api.benchmarks.asgi import QueryDelay, compare, run_load
+from services.models import ServiceProfile
+
+
+class Command(BaseCommand):
+    help = ('Пропускная способность одного ASGI-процесса на маршрутах '
+            'каталога: вьюсеты DRF в пуле потоков и асинхронные '
+            'обработчики (ASYNC_READ_VIEWS)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help='задержка каждого SQL-запроса, мс')
+
+    def get_paths(self):
+        profile = ServiceProfile.objects.order_by('id').first()
+        if profile is None:
+            raise CommandError('Нет профилей сервисов')
+        return ['/api/categories/',
+                '/api/service_profiles/',
+                f'/api/service_profiles/{profile.id}/',
+                f'/api/services/{profile.id}/reviews/',
+                f'/api/services/{profile.id}/schedules/']
+
+    def handle(self, *args, **options):
+        if not settings.ASYNC_READ_VIEWS:
+            raise CommandError('Запустите с переменной окружения '
+                               'ASYNC_READ_VIEWS=True')
+        paths = self.get_paths()
+        # Маршруты загружаются до переключения ASYNC_READ_VIEWS
+        get_resolver().url_patterns
+        # Лимиты частоты запросов отключаются на время замеров
+        rest_settings = {**settings.REST_FRAMEWORK,
+                         'DEFAULT_THROTTLE_RATES': {}}
+        with override_settings(REST_FRAMEWORK=rest_settings):
+            mismatches = compare(paths)
+            for path in mismatches:
+                self.stderr.write(f'Ответы отличаются: {path}')
+
+            application = ASGIHandler()
+            with QueryDelay(options['db_latency'] / 1000):
+                for enabled in (False, True):
+                    connections.close_all()
+                    with override_settings(ASYNC_READ_VIEWS=enabled):
+                        result = asyncio.run(run_load(
+                            application, paths,
+                            options['requests'], options['concurrency']
+                        ))
+                    self.stdout.write(
+                        f'{"async" if enabled else "drf":6} '
+                        f'{result["rps"]:8} rps  '
+                        f'p50 {result["p50_ms"]:8.2f} ms  '
+                        f'p95 {result["p95_ms"]:8.2f} ms  '
+                        f'статусы {result["statuses"]}'
+                    )
+        if mismatches:
+            raise CommandError('Ответы асинхронных обработчиков отличаются')
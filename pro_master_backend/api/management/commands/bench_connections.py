@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+
+from api.benchmarks.runner import percentile
+
+
+class Command(BaseCommand):
+    help = ('Время установки соединения с БД и задержка запроса '
+            'без постоянных соединений (CONN_MAX_AGE = 0) и с ними')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/categories/')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--conn-max-age', type=int, default=60)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        setup = []
+        for _ in range(options['iterations']):
+            connection.close()
+            started = time.perf_counter()
+            connection.ensure_connection()
+            setup.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'установка соединения ({connection.vendor}): '
+            f'p50 {percentile(setup, 50):.2f} ms, '
+            f'p95 {percentile(setup, 95):.2f} ms'
+        )
+
+        opened = []
+
+        def count(sender, **kwargs):
+            opened.append(1)
+
+        connection_created.connect(count)
+        original = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            for max_age in (0, options['conn_max_age']):
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                connection.close()
+                opened.clear()
+                timings = self.measure(options['path'],
+                                       options['iterations'])
+                self.stdout.write(
+                    f'CONN_MAX_AGE={max_age:<4} '
+                    f'p50 {percentile(timings, 50):8.2f} ms  '
+                    f'p95 {percentile(timings, 95):8.2f} ms  '
+                    f'соединений открыто: {len(opened)}'
+                )
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = original
+            connection_created.disconnect(count)
+
+    def measure(self, path, iterations):
+        client = Client(raise_request_exception=False)
+        timings = []
+        # Лимиты частоты запросов отключаются на время замеров
+        rest_settings = {**settings.REST_FRAMEWORK,
+                         'DEFAULT_THROTTLE_RATES': {}}
+        with override_settings(REST_FRAMEWORK=rest_settings):
+            for _ in range(iterations):
+                started = time.perf_counter()
+                # Тестовый клиент не закрывает соединения по сигналам
+                # request_started/request_finished, как обработчик WSGI
+                close_old_connections()
+                response = client.get(path)
+                close_old_connections()
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f'{path}: статус {response.status_code}'
+                    )
+        return timings
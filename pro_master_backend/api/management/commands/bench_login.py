@@ -0,0 +1,60 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import CustomTokenCreateSerializer
+
+
+User = get_user_model()
+
+EMAIL = 'bench-login@example.com'
+PHONE = '+79990000000'
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = 'Замер CPU и количества запросов на одну неудачную попытку входа'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=20)
+
+    def handle(self, *args, **options):
+        cases = (
+            ('unknown email', {'email': 'unknown@example.com'}),
+            ('wrong password (email)', {'email': EMAIL}),
+            ('wrong password (phone)', {'phone_number': PHONE}),
+        )
+        # Лимиты отключены, чтобы замерять именно стоимость проверки пароля
+        with override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {}}):
+            with transaction.atomic():
+                User.objects.create_user(email=EMAIL,
+                                         phone_number=PHONE,
+                                         password=PASSWORD)
+                for name, params in cases:
+                    self.measure(name, params, options['attempts'])
+                transaction.set_rollback(True)
+
+    def measure(self, name, params, attempts):
+        factory = RequestFactory()
+        data = {**params, 'password': 'wrong-password'}
+        cpu = 0
+        queries = 0
+        for _ in range(attempts):
+            request = factory.post('/api/auth/token/login/', data)
+            request.data = data
+            serializer = CustomTokenCreateSerializer(
+                data=data, context={'request': request}
+            )
+            with CaptureQueriesContext(connection) as context:
+                started = time.process_time()
+                serializer.is_valid()
+                cpu += time.process_time() - started
+            queries += len(context.captured_queries)
+        self.stdout.write(
+            f'{name}: {cpu / attempts * 1000:.1f} ms CPU, '
+            f'{queries / attempts:.1f} queries per attempt'
+        )
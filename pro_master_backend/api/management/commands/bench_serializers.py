@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import serializers
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Микробенчмарк ServiceProfileSerializer, ReviewSerializer, '
+            'CategorySerializer, ScheduleSerializer и сверка вывода '
+            'быстрых сериализаторов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--user', type=int,
+                            help='id пользователя в контексте запроса')
+        parser.add_argument('--serializer', action='append',
+                            help='имя сериализатора (можно повторять)')
+        parser.add_argument('--fields',
+                            help='поля ответа через запятую (?fields=)')
+        parser.add_argument('--omit',
+                            help='исключаемые поля через запятую (?omit=)')
+        parser.add_argument('--expand',
+                            help='раскрываемые связи через запятую (?expand=)')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user'] is not None:
+            user = User.objects.get(pk=options['user'])
+        params = {param: options[param]
+                  for param in ('fields', 'omit', 'expand')
+                  if options[param]}
+        results = serializers.run(options['rows'],
+                                  options['iterations'],
+                                  user,
+                                  params,
+                                  options['serializer'])
+        mismatches = []
+        for result in results:
+            self.stdout.write(
+                f'{result["name"]:26} {result["rows"]:5} rows  '
+                f'drf {result["drf_ms"]:9.2f} ms '
+                f'{result["drf_queries"]:5} queries  '
+                f'fast {result["fast_ms"]:9.2f} ms '
+                f'{result["fast_queries"]:3} queries  '
+                f'{"ok" if result["matches"] else "MISMATCH"}'
+            )
+            if not result['matches']:
+                mismatches.append(result['name'])
+        if mismatches:
+            raise CommandError(
+                'Вывод быстрых сериализаторов отличается: '
+                + ', '.join(mismatches)
+            )
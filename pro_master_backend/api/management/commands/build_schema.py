@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.schema import build_schema, get_code_version
+
+
+class Command(BaseCommand):
+    help = ('Построение схемы OpenAPI для текущей версии кода '
+            '(YAML, JSON и их gzip) для api/schema/')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='перестроить схему этой версии')
+
+    def handle(self, *args, **options):
+        paths = build_schema(options['force'])
+        version = get_code_version()
+        if not paths:
+            self.stdout.write(f'Схема версии {version} уже построена')
+            return
+        for path in paths:
+            self.stdout.write(f'{path}  {path.stat().st_size} B')
+        self.stdout.write(self.style.SUCCESS(
+            f'Схема версии {version} построена'
+        ))
@@ -0,0 +1,170 @@
+import re
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from appointments.models import Appointment
+from api.benchmarks.scenarios import get_auth_header, get_staff_user
+from api.serializers import ExpandableFieldsMixin
+from api.testing import NPlusOneDetector
+from api.urls import router
+from services.models import Comment, ServiceProfile
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Поиск N+1 на GET-маршрутах всех вьюсетов API (быстрые '
+            'сериализаторы списков и DRF) и списках '
+            'админки на сгенерированных данных (manage.py seed)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=int,
+                            help='минимальное число повторов запроса')
+        parser.add_argument('--allow', action='append', default=[],
+                            help='регулярное выражение допустимого случая '
+                                 '(можно повторять)')
+        parser.add_argument('--no-admin', action='store_true',
+                            help='не проверять списки админки')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.failures = []
+        # Лимиты частоты запросов, кеш ответов и журнал медленных
+        # запросов отключаются, изменения (пользователь админки)
+        # откатываются
+        rest_settings = {**settings.REST_FRAMEWORK,
+                         'DEFAULT_THROTTLE_RATES': {}}
+        with override_settings(REST_FRAMEWORK=rest_settings,
+                               RESPONSE_CACHE=False,
+                               SLOW_QUERY_THRESHOLD_MS=None):
+            with transaction.atomic():
+                self.run()
+                transaction.set_rollback(True)
+
+        if self.failures:
+            raise CommandError(
+                f'Найдены N+1 или ошибки на {len(self.failures)} '
+                f'маршрутах: ' + ', '.join(self.failures)
+            )
+        self.stdout.write(self.style.SUCCESS('N+1 не найдено'))
+
+    def run(self):
+        kwargs = self.get_url_kwargs()
+        client = User.objects.filter(
+            is_master=False, client_profile__isnull=False
+        ).order_by('id').first()
+        master = User.objects.filter(is_master=True).order_by('id').first()
+        if kwargs is None or client is None:
+            raise CommandError('Нет данных, сначала выполните manage.py seed')
+
+        roles = [('anonymous', {})]
+        for name, user in (('client', client), ('master', master)):
+            if user is not None:
+                roles.append(
+                    (name, {'Authorization': get_auth_header(user)})
+                )
+        # Списки проверяются с быстрыми сериализаторами и с DRF
+        for fast, serializers in ((True, 'fast'), (False, 'drf')):
+            with override_settings(FAST_LIST_SERIALIZERS=fast):
+                for role, headers in roles:
+                    http = Client(headers=headers,
+                                  raise_request_exception=False)
+                    for prefix, viewset, basename in router.registry:
+                        url_kwargs = {
+                            name: kwargs[name]
+                            for name in re.compile(prefix).groupindex
+                        }
+                        self.check_viewset(http, f'{role}/{serializers}',
+                                           viewset, basename, url_kwargs)
+
+        if not self.options['no_admin']:
+            http = Client(raise_request_exception=False)
+            http.force_login(get_staff_user())
+            for model in admin.site._registry:
+                opts = model._meta
+                self.inspect(http, 'admin', reverse(
+                    f'admin:{opts.app_label}_{opts.model_name}_changelist'
+                ))
+
+    def get_url_kwargs(self):
+        """Профиль с отзывами, комментариями, расписанием и записями."""
+
+        comment = Comment.objects.filter(
+            Exists(Appointment.objects.filter(
+                schedule__service_profile=OuterRef(
+                    'review__service_profile'
+                )
+            ))
+        ).select_related('review').order_by('id').first()
+        if comment is None:
+            return None
+        profile = ServiceProfile.objects.get(
+            pk=comment.review.service_profile_id
+        )
+        schedule = profile.schedules.filter(
+            appointments__isnull=False
+        ).order_by('id').first()
+        return {'profile_id': profile.pk,
+                'review_id': comment.review_id,
+                'schedule_id': schedule.pk}
+
+    def check_viewset(self, http, role, viewset, basename, url_kwargs):
+        list_url = reverse(f'api:{basename}-list', kwargs=url_kwargs)
+        response = self.inspect(http, role, list_url)
+        if response is None:
+            return
+
+        serializer_class = getattr(viewset, 'serializer_class', None)
+        if (serializer_class is not None
+                and issubclass(serializer_class, ExpandableFieldsMixin)):
+            expand = serializer_class.get_expandable_paths()
+            if expand:
+                self.inspect(http, role,
+                             f'{list_url}?expand={",".join(expand)}')
+
+        data = response.json()
+        if isinstance(data, dict):
+            data = data.get('results', [])
+        if data and isinstance(data[0], dict) and 'id' in data[0]:
+            self.inspect(http, role, reverse(
+                f'api:{basename}-detail',
+                kwargs={**url_kwargs, 'pk': data[0]['id']}
+            ))
+
+    def inspect(self, http, role, url):
+        """GET url под детектором; ответ или None при ошибке.
+
+        Ошибка сервера (5xx) считается проваленной проверкой; отказ
+        в доступе и другие ошибки клиента (4xx) пропускаются.
+        """
+
+        with NPlusOneDetector(self.options['threshold'],
+                              self.options['allow']) as detector:
+            response = http.get(url)
+        findings = detector.findings
+        label = f'{role:14} {url}'
+        if response.status_code >= 500:
+            self.failures.append(f'{role} {url} [{response.status_code}]')
+            self.stdout.write(self.style.ERROR(
+                f'{label}  [{response.status_code}]'
+            ))
+            return None
+        if response.status_code >= 400:
+            self.stdout.write(f'{label}  [{response.status_code}]')
+            return None
+        if not findings:
+            self.stdout.write(f'{label}  ok')
+            return response
+        self.failures.append(f'{role} {url}')
+        self.stdout.write(self.style.ERROR(
+            f'{label}  {len(findings)} N+1\n{detector.report()}'
+        ))
+        return response
@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import runner
+from api.benchmarks.load import (PROFILES,
+                                 LoadData,
+                                 LoadTest,
+                                 LocalServer,
+                                 LockSampler,
+                                 SERVERS)
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест: смешанный трафик виртуальных пользователей '
+            'против локально запущенного приложения. Создаёт записи и '
+            'отзывы, запускайте на данных manage.py seed')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=PROFILES, default='mixed',
+                            help='Профиль трафика')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Длительность в секундах')
+        parser.add_argument('--server', choices=SERVERS, default='runserver')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Воркеры gunicorn/uvicorn')
+        parser.add_argument('--url',
+                            help='host:port уже запущенного сервера')
+        parser.add_argument('--users', type=int, default=50,
+                            help='Количество авторизованных клиентов')
+        parser.add_argument('--schedules', type=int, default=5,
+                            help='Расписания, на которые идут записи')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--save', help='Сохранить отчёт в JSON')
+
+    def handle(self, *args, **options):
+        data = LoadData(users=options['users'],
+                        schedules=options['schedules'])
+        actions = PROFILES[options['profile']](data)
+        if not data.profile_ids or not actions:
+            raise CommandError('Нет данных, сначала выполните manage.py seed')
+
+        if options['url']:
+            host, _, port = options['url'].rpartition(':')
+            report = self.run(host, int(port), actions, data, options)
+        else:
+            try:
+                server = LocalServer(options['server'], options['workers'])
+                with server:
+                    report = self.run(server.host, server.port,
+                                      actions, data, options)
+            except RuntimeError as error:
+                raise CommandError(error)
+
+        self.stdout.write(
+            f'{report["requests"]} запросов за {report["duration_s"]} с: '
+            f'{report["rps"]} rps, p50 {report["p50_ms"]} ms, '
+            f'p95 {report["p95_ms"]} ms, p99 {report["p99_ms"]} ms, '
+            f'ошибки {report["error_rate"]:.2%}'
+        )
+        for name, result in report['actions'].items():
+            self.stdout.write(
+                f'{name:32} {result["requests"]:7}  '
+                f'p50 {result["p50_ms"]:9.2f}  p95 {result["p95_ms"]:9.2f}  '
+                f'p99 {result["p99_ms"]:9.2f} ms  '
+                f'{json.dumps(result["statuses"])}'
+            )
+        if report['lock_waits'] is None:
+            self.stdout.write('Ожидания блокировок: только для PostgreSQL')
+        else:
+            self.stdout.write(f'Ожидания блокировок: {report["lock_waits"]}')
+
+        if options['save']:
+            runner.save(options['save'], report)
+
+    def run(self, host, port, actions, data, options):
+        test = LoadTest(host, port, actions, data.headers,
+                        concurrency=options['concurrency'],
+                        duration=options['duration'],
+                        timeout=options['timeout'],
+                        random_seed=options['random_seed'])
+        with LockSampler() as sampler:
+            report = test.run()
+        report['lock_waits'] = sampler.as_dict()
+        return report
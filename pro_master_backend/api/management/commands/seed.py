@@ -0,0 +1,337 @@
+import datetime
+import itertools
+import multiprocessing
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from appointments.models import Appointment, Schedule
+from clients.models import ClientProfile
+from services.models import (Category,
+                             Comment,
+                             Employee,
+                             Favorite,
+                             Review,
+                             Service,
+                             ServiceProfile,
+                             ServiceProfileCategory,
+                             ServiceProfileService)
+
+
+User = get_user_model()
+
+SEED_PASSWORD = 'seed-password'
+WORDS = ('мастер', 'стрижка', 'маникюр', 'массаж', 'уход', 'окрашивание',
+         'отлично', 'быстро', 'аккуратно', 'рекомендую', 'дорого', 'уютно',
+         'вежливо', 'профессионально', 'вернусь', 'качественно')
+
+
+def zipf_cum_weights(size, skew):
+    """Накопленные веса распределения Ципфа для random.choices."""
+
+    return list(itertools.accumulate(
+        1 / (rank ** skew) for rank in range(1, size + 1)
+    ))
+
+
+def sample_unique_pairs(rng, left, left_weights, right, right_weights,
+                        count):
+    """Уникальные пары (left, right) с учётом весов популярности."""
+
+    if count > len(left) * len(right):
+        raise CommandError(f'Невозможно сгенерировать {count} уникальных пар')
+    pairs = set()
+    attempts = 0
+    while len(pairs) < count:
+        need = count - len(pairs)
+        batch = zip(rng.choices(left, cum_weights=left_weights, k=need),
+                    rng.choices(right, cum_weights=right_weights, k=need))
+        pairs.update(batch)
+        attempts += 1
+        if attempts > 100:
+            # Популярные пары исчерпаны - добираем равномерно
+            left_weights = right_weights = None
+    return list(pairs)
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def insert_chunk(args):
+    """Вставка пачки строк (выполняется и в дочерних процессах)."""
+
+    model, fields, rows = args
+    model.objects.bulk_create(
+        [model(**dict(zip(fields, row))) for row in rows],
+        batch_size=len(rows)
+    )
+    return len(rows)
+
+
+class Command(BaseCommand):
+    help = ('Генерация большого синтетического набора данных '
+            '(ожидает пустую БД)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10000)
+        parser.add_argument('--masters', type=int, default=1000)
+        parser.add_argument('--profiles', type=int, default=2000)
+        parser.add_argument('--category-depth', type=int, default=4)
+        parser.add_argument('--category-breadth', type=int, default=4)
+        parser.add_argument('--services', type=int, default=5000)
+        parser.add_argument('--services-per-profile', type=int, default=8)
+        parser.add_argument('--categories-per-profile', type=int, default=3)
+        parser.add_argument('--employees', type=int, default=3000)
+        parser.add_argument('--reviews', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--favorites', type=int, default=50000)
+        parser.add_argument('--schedules', type=int, default=2000)
+        parser.add_argument('--appointments', type=int, default=20000)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель распределения Ципфа')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Процессы для вставки (не для SQLite)')
+        parser.add_argument('--random-seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['random_seed'])
+        self.workers = options['workers']
+        if connection.vendor == 'sqlite' and self.workers > 1:
+            self.stdout.write('SQLite не поддерживает параллельную запись, '
+                              'используется один процесс')
+            self.workers = 1
+
+        started = time.perf_counter()
+        client_ids, client_profile_ids, master_ids = self.step(
+            'users', self.create_users
+        )
+        leaf_ids = self.step('categories', self.create_categories)
+        service_ids = self.step('services', self.create_services, leaf_ids)
+        profile_ids = self.step(
+            'service profiles', self.create_profiles,
+            master_ids, leaf_ids, service_ids
+        )
+        self.profile_weights = zipf_cum_weights(len(profile_ids),
+                                                options['skew'])
+        self.client_weights = zipf_cum_weights(len(client_profile_ids),
+                                               options['skew'])
+        self.step('employees', self.create_employees, profile_ids)
+        self.step('reviews', self.create_reviews,
+                  profile_ids, client_profile_ids)
+        self.step('comments', self.create_comments, client_profile_ids)
+        self.step('favorites', self.create_favorites,
+                  profile_ids, client_profile_ids)
+        self.step('schedules and appointments', self.create_schedules,
+                  profile_ids, client_profile_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с'
+        ))
+
+    def step(self, name, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f'{name}: {time.perf_counter() - started:.1f} с')
+        return result
+
+    def bulk_insert(self, model, fields, rows):
+        chunks = [(model, fields, chunk)
+                  for chunk in chunked(rows, self.options['chunk_size'])]
+        if self.workers > 1:
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(self.workers) as pool:
+                list(pool.imap_unordered(insert_chunk, chunks))
+        else:
+            with transaction.atomic():
+                for chunk in chunks:
+                    insert_chunk(chunk)
+
+    def bulk_create(self, model, objects):
+        with transaction.atomic():
+            return model.objects.bulk_create(
+                objects, batch_size=self.options['chunk_size']
+            )
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def create_users(self):
+        password = make_password(SEED_PASSWORD)
+        clients = self.options['clients']
+        masters = self.options['masters']
+        users = self.bulk_create(User, [
+            User(email=f'user{number}@seed.example',
+                 phone_number=f'+7900{number:07d}',
+                 password=password,
+                 is_master=number >= clients)
+            for number in range(clients + masters)
+        ])
+        client_ids = [user.id for user in users[:clients]]
+        master_ids = [user.id for user in users[clients:]]
+        profiles = self.bulk_create(ClientProfile, [
+            ClientProfile(client_id=client_id,
+                          profile_name=f'client{number}',
+                          first_name='Клиент',
+                          last_name=str(number))
+            for number, client_id in enumerate(client_ids)
+        ])
+        return client_ids, [profile.id for profile in profiles], master_ids
+
+    def create_categories(self):
+        level = self.bulk_create(Category, [
+            Category(name=f'Категория {number}')
+            for number in range(self.options['category_breadth'])
+        ])
+        for depth in range(1, self.options['category_depth']):
+            level = self.bulk_create(Category, [
+                Category(name=f'{parent.name}.{number}',
+                         parent_category_id=parent.id)
+                for parent in level
+                for number in range(self.options['category_breadth'])
+            ])
+        return [category.id for category in level]
+
+    def create_services(self, leaf_ids):
+        services = self.bulk_create(Service, [
+            Service(name=f'Услуга {number}',
+                    category_id=self.rng.choice(leaf_ids),
+                    duration=self.rng.choice((15, 30, 45, 60, 90, 120)),
+                    price=self.rng.randrange(300, 10000, 100))
+            for number in range(self.options['services'])
+        ])
+        return [service.id for service in services]
+
+    def create_profiles(self, master_ids, leaf_ids, service_ids):
+        profiles = self.bulk_create(ServiceProfile, [
+            ServiceProfile(name=f'Профиль {number}',
+                           owner_id=master_ids[number % len(master_ids)],
+                           owner_first_name='Мастер',
+                           owner_last_name=str(number),
+                           description=self.text(30),
+                           phone_number=f'+7902{number:07d}',
+                           is_organization=number % 5 == 0)
+            for number in range(self.options['profiles'])
+        ])
+        profile_ids = [profile.id for profile in profiles]
+        categories_count = min(self.options['categories_per_profile'],
+                               len(leaf_ids))
+        services_count = min(self.options['services_per_profile'],
+                             len(service_ids))
+        self.bulk_insert(
+            ServiceProfileCategory, ('service_profile_id', 'category_id'),
+            [(profile_id, category_id)
+             for profile_id in profile_ids
+             for category_id in self.rng.sample(leaf_ids, categories_count)]
+        )
+        self.bulk_insert(
+            ServiceProfileService, ('service_profile_id', 'service_id'),
+            [(profile_id, service_id)
+             for profile_id in profile_ids
+             for service_id in self.rng.sample(service_ids, services_count)]
+        )
+        return profile_ids
+
+    def create_employees(self, profile_ids):
+        organizations = profile_ids[::5] or profile_ids
+        self.bulk_insert(
+            Employee,
+            ('first_name', 'last_name', 'organization_id', 'phone_number'),
+            [('Сотрудник', str(number),
+              self.rng.choice(organizations), f'+7903{number:07d}')
+             for number in range(self.options['employees'])]
+        )
+
+    def create_reviews(self, profile_ids, client_profile_ids):
+        pairs = sample_unique_pairs(
+            self.rng,
+            profile_ids, self.profile_weights,
+            client_profile_ids, self.client_weights,
+            self.options['reviews']
+        )
+        self.bulk_insert(
+            Review, ('service_profile_id', 'author_id', 'text', 'score'),
+            [(profile_id, author_id,
+              self.text(self.rng.randint(3, 20)),
+              self.rng.choices((1, 2, 3, 4, 5), (1, 1, 2, 4, 8))[0])
+             for profile_id, author_id in pairs]
+        )
+
+    def create_comments(self, client_profile_ids):
+        review_ids = list(Review.objects.values_list('id', flat=True))
+        if not review_ids:
+            return
+        self.bulk_insert(
+            Comment, ('review_id', 'author_id', 'text'),
+            [(review_id, author_id, self.text(self.rng.randint(3, 12)))
+             for review_id, author_id in zip(
+                 self.rng.choices(review_ids, k=self.options['comments']),
+                 self.rng.choices(client_profile_ids,
+                                  cum_weights=self.client_weights,
+                                  k=self.options['comments']))]
+        )
+
+    def create_favorites(self, profile_ids, client_profile_ids):
+        pairs = sample_unique_pairs(
+            self.rng,
+            client_profile_ids, self.client_weights,
+            profile_ids, self.profile_weights,
+            self.options['favorites']
+        )
+        self.bulk_insert(Favorite,
+                         ('client_profile_id', 'service_profile_id'),
+                         pairs)
+
+    def create_schedules(self, profile_ids, client_profile_ids):
+        # Дата, начало и конец расписания уникальны в пределах всей таблицы
+        first_day = datetime.date(2024, 1, 1)
+        opening = datetime.datetime.combine(first_day, datetime.time(9))
+        closing = datetime.datetime.combine(first_day, datetime.time(18))
+        schedules = self.bulk_create(Schedule, [
+            Schedule(
+                service_profile_id=profile_id,
+                date=first_day + datetime.timedelta(days=number),
+                start=(opening
+                       + datetime.timedelta(microseconds=number)).time(),
+                end=(closing
+                     + datetime.timedelta(microseconds=number)).time()
+            )
+            for number, profile_id in enumerate(self.rng.choices(
+                profile_ids, cum_weights=self.profile_weights,
+                k=self.options['schedules']
+            ))
+        ])
+        if not schedules:
+            return
+
+        # Время записи уникально для каждого клиента
+        used = set()
+        rows = []
+        working_seconds = 9 * 3600
+        for schedule, client_profile_id in zip(
+            self.rng.choices(schedules, k=self.options['appointments']),
+            self.rng.choices(client_profile_ids,
+                             cum_weights=self.client_weights,
+                             k=self.options['appointments'])
+        ):
+            second = self.rng.randrange(working_seconds)
+            while (client_profile_id, second) in used:
+                second = (second + 1) % working_seconds
+            used.add((client_profile_id, second))
+            rows.append((
+                schedule.id,
+                client_profile_id,
+                (opening + datetime.timedelta(seconds=second)).time()
+            ))
+        self.bulk_insert(
+            Appointment,
+            ('schedule_id', 'client_profile_id', 'appointment_time'),
+            rows
+        )
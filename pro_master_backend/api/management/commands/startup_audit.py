@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import startup
+
+
+class Command(BaseCommand):
+    help = ('Время импорта модулей при запуске процесса (python -X '
+            'importtime) и первый запрос без прогрева и с прогревом')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/categories/',
+                            help='маршрут первого запроса')
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        result = startup.run(options['path'], options['top'])
+        imports = result['imports']
+
+        self.stdout.write(f'Импорт: {imports["total_ms"]:.2f} ms')
+        for package, duration in imports['packages']:
+            self.stdout.write(f'  {package:32} {duration:9.2f} ms')
+        self.stdout.write('Зависимости модулей проекта:')
+        for module, dependency, duration in imports['dependencies']:
+            self.stdout.write(
+                f'  {module:32} <- {dependency:40} {duration:9.2f} ms'
+            )
+        for name in ('cold', 'warm'):
+            run = result[name]
+            self.stdout.write(
+                f'{name:5} startup {run["startup_ms"]:9.2f} ms  '
+                f'warm-up {run["warmup_ms"]:9.2f} ms  '
+                f'first request {run["first_request_ms"]:9.2f} ms  '
+                f'[{run["status"]}]'
+            )
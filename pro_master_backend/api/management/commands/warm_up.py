@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Прогрев процесса (как в рабочем процессе gunicorn) с замером шагов'
+
+    def handle(self, *args, **options):
+        timings = warm_up()
+        for name, duration in timings.items():
+            self.stdout.write(f'{name:12} {duration:9.2f} ms')
+        self.stdout.write(f'{"total":12} {sum(timings.values()):9.2f} ms')
@@ -0,0 +1,272 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# Имя метрики: (тип, описание, границы корзин гистограммы)
+METRICS = {
+    'http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса по действию вьюсета',
+        LATENCY_BUCKETS
+    ),
+    'http_response_size_bytes': (
+        'histogram', 'Размер тела ответа по действию вьюсета', SIZE_BUCKETS
+    ),
+    'db_queries_per_request': (
+        'histogram', 'Количество SQL-запросов на запрос', QUERY_BUCKETS
+    ),
+    'http_requests_total': (
+        'counter', 'Количество запросов по действию и статусу', None
+    ),
+    'cache_requests_total': (
+        'counter', 'Обращения к кешам: попадания и промахи', None
+    ),
+    'auth_user_resolutions_total': (
+        'counter', 'Получение пользователя при аутентификации: '
+                   'из claims токена или из БД', None
+    ),
+    'booking_conflicts_total': (
+        'counter', 'Отклонённые из-за занятого времени записи', None
+    ),
+    'db_connections_opened_total': (
+        'counter', 'Новые соединения с БД (без повторного использования)',
+        None
+    ),
+    'db_connections_reused_total': (
+        'counter', 'Запросы, использовавшие уже открытое соединение с БД',
+        None
+    ),
+}
+
+
+class Registry:
+    """Счётчики и гистограммы процесса.
+
+    В многопроцессном режиме (задан METRICS_DIR) состояние процесса
+    не реже раза в METRICS_FLUSH_INTERVAL секунд сбрасывается в файл
+    `<pid>.json`, а при выдаче метрик файлы всех воркеров суммируются.
+    Файл завершённого воркера удаляет главный процесс gunicorn
+    (child_exit в gunicorn.conf.py); файлы процессов, которых уже нет,
+    пропускаются и удаляются при выдаче.
+    """
+
+    timer = time.monotonic
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = self.timer()
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self.lock:
+            self.counters[key] += value
+        self.maybe_flush()
+
+    def observe(self, name, value, labels=None):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Счётчики корзин (последняя - +Inf), сумма, количество
+                histogram = self.histograms[key] = [0] * (len(buckets) + 3)
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {'counters': [[name, labels, value] for (name, labels),
+                                 value in self.counters.items()],
+                    'histograms': [[name, labels, list(values)]
+                                   for (name, labels), values
+                                   in self.histograms.items()]}
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def maybe_flush(self):
+        if (self.directory
+                and self.timer() - self.flushed
+                >= settings.METRICS_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        self.flushed = self.timer()
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(dir=self.directory,
+                                            suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path, self.get_path(os.getpid()))
+
+    def get_path(self, pid):
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def remove(self, pid):
+        """Удаление файла метрик завершённого процесса."""
+
+        if self.directory:
+            try:
+                os.unlink(self.get_path(pid))
+            except FileNotFoundError:
+                pass
+
+    def collect(self):
+        """Состояние для выдачи: процесса или сумма по всем воркерам."""
+
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            pid, _, extension = name.partition('.')
+            if extension != 'json' or not pid.isdigit():
+                continue
+            if not pid_exists(int(pid)):
+                self.remove(pid)
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+def pid_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    items = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + items + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def exposition(snapshots):
+    """Текстовый формат Prometheus (version 0.0.4)."""
+
+    counters = defaultdict(lambda: defaultdict(float))
+    histograms = defaultdict(dict)
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name][tuple(map(tuple, labels))] += value
+        for name, labels, values in snapshot['histograms']:
+            labels = tuple(map(tuple, labels))
+            current = histograms[name].get(labels)
+            histograms[name][labels] = (
+                values if current is None
+                else [a + b for a, b in zip(current, values)]
+            )
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for labels, value in sorted(counters[name].items()):
+                lines.append(
+                    f'{name}{format_labels(labels)} {format_value(value)}'
+                )
+            continue
+        for labels, values in sorted(histograms[name].items()):
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), values):
+                cumulative += count
+                le = bound if bound == '+Inf' else format_value(bound)
+                lines.append(f'{name}_bucket'
+                             f'{format_labels((*labels, ("le", le)))} '
+                             f'{cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} '
+                         f'{format_value(values[-2])}')
+            lines.append(f'{name}_count{format_labels(labels)} '
+                         f'{values[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def observe_request(request, response, metrics):
+    """Метрики завершённого запроса (из SQLInstrumentationMiddleware)."""
+
+    renderer_context = getattr(response, 'renderer_context', None) or {}
+    labels = {'route': metrics.route or 'unmatched',
+              'action': getattr(renderer_context.get('view'), 'action', None)
+              or request.method.lower()}
+    registry.inc('http_requests_total',
+                 {**labels, 'status': response.status_code})
+    registry.observe('http_request_duration_seconds',
+                     metrics.phases['total'], labels)
+    registry.observe('db_queries_per_request', metrics.query_count, labels)
+    if not response.streaming:
+        registry.observe('http_response_size_bytes',
+                         len(response.content), labels)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    registry.inc('db_connections_opened_total',
+                 {'database': connection.alias})
+
+
+def count_reused_connections():
+    """Учёт соединений, открытых к началу запроса (CONN_MAX_AGE > 0)."""
+
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            registry.inc('db_connections_reused_total',
+                         {'database': connection.alias})
+
+
+def metrics_view(request):
+    """Выдача метрик по Bearer-токену METRICS_TOKEN.
+
+    Без заданного токена метрики доступны только персоналу
+    (сессия админки).
+    """
+
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        allowed = (request.headers.get('Authorization')
+                   == f'Bearer {token}')
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(exposition(registry.collect()),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+                ('fingerprint', models.TextField(verbose_name='Отпечаток запроса')),
+                ('sql', models.TextField(verbose_name='Запрос')),
+                ('duration_ms', models.FloatField(verbose_name='Длительность, мс')),
+                ('database', models.CharField(max_length=64, verbose_name='Псевдоним БД')),
+                ('view', models.CharField(blank=True, max_length=256, verbose_name='Маршрут')),
+                ('call_site', models.CharField(blank=True, max_length=512, verbose_name='Место вызова')),
+                ('plan', models.TextField(blank=True, verbose_name='План выполнения')),
+            ],
+            options={
+                'verbose_name': 'Slow query',
+                'verbose_name_plural': 'Slow queries',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
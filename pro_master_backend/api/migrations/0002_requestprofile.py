@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+                ('user_id', models.BigIntegerField(verbose_name='Пользователь')),
+                ('method', models.CharField(max_length=16, verbose_name='Метод')),
+                ('path', models.CharField(max_length=512, verbose_name='Путь')),
+                ('view', models.CharField(blank=True, max_length=256, verbose_name='Маршрут')),
+                ('status', models.PositiveSmallIntegerField(verbose_name='Статус ответа')),
+                ('duration_ms', models.FloatField(verbose_name='Длительность, мс')),
+                ('phases', models.JSONField(default=dict, verbose_name='Фазы обработки, мс')),
+                ('stats', models.TextField(verbose_name='Сводка cProfile')),
+                ('data', models.BinaryField(verbose_name='Файл профиля (pstats)')),
+            ],
+            options={
+                'verbose_name': 'Request profile',
+                'verbose_name_plural': 'Request profiles',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,278 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
+
+from rest_framework import permissions
+from rest_framework.response import Response
+
+from services.models import ServiceProfile
+
+from .conditional import conditional_response, make_etag, set_validators
+from .db_routers import choose_replica, is_sticky, read_alias
+from .instrumentation import phase
+from .response_cache import get_versions, make_key, response_cache
+from .utils import get_requested_expand, get_requested_fields
+
+
+class ServiceProfileNestedMixin:
+    """Миксин вьюсетов, вложенных в профиль сервиса.
+
+    Профиль из URL загружается один раз за запрос и используется
+    в get_queryset, perform_create, сериализаторах и проверке прав.
+    Объекты, полученные через его related-менеджеры, ссылаются на этот
+    же экземпляр профиля, поэтому `obj.service_profile.owner_id`
+    не требует дополнительных запросов.
+    """
+
+    @cached_property
+    def service_profile(self):
+        return get_object_or_404(
+            ServiceProfile,
+            pk=self.kwargs.get('profile_id')
+        )
+
+
+class FastListMixin:
+    """Миксин вьюсетов: список через быстрый сериализатор.
+
+    Используется, если задан `fast_serializer_class`
+    и включена настройка FAST_LIST_SERIALIZERS.
+    """
+
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if (self.fast_serializer_class is None
+                or not settings.FAST_LIST_SERIALIZERS):
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.fast_serializer_class(
+            context=self.get_serializer_context()
+        )
+        queryset = serializer.get_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        with phase('serializer'):
+            data = serializer.to_representation(
+                queryset if page is None else page
+            )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class SparseFieldsViewMixin:
+    """Миксин вьюсетов: запрос к БД по полям ответа (?fields=, ?omit=)
+    и раскрываемым связям (?expand=).
+
+    select_related, prefetch_related и аннотации из `field_select_related`,
+    `field_prefetch_related` и `field_annotations` ({поле ответа: ...})
+    добавляются к queryset, только если поле запрошено. Связи
+    `expand_prefetch_related` ({путь ?expand=: lookups}) загружаются
+    через prefetch_related: один запрос на тип связи для всей страницы
+    на любой глубине вложенности.
+
+    Каждое вложенное поле сериализатора (вложенный сериализатор
+    или список связанных объектов) должно быть указано
+    в `field_select_related` или `field_prefetch_related`: пакетные
+    загрузчики (api.loaders) вычисляют только скалярные значения.
+    """
+
+    field_select_related = {}
+    field_prefetch_related = {}
+    field_annotations = {}
+    expand_prefetch_related = {}
+
+    @classmethod
+    def select_fields(cls, queryset, fields=None, expand=()):
+        """queryset для полей fields (None - все поля) и связей expand."""
+
+        def wanted(mapping):
+            return [value for field, value in mapping.items()
+                    if fields is None or field in fields]
+
+        select_related = [name for names in wanted(cls.field_select_related)
+                          for name in names]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        prefetch_related = [lookup for lookups
+                            in wanted(cls.field_prefetch_related)
+                            for lookup in lookups]
+        for path in expand:
+            if fields is None or path.split('.')[0] in fields:
+                prefetch_related.extend(cls.expand_prefetch_related[path])
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        for annotations in wanted(cls.field_annotations):
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+    def get_requested_fields(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+        return get_requested_fields(
+            self.request, self.get_serializer_class().Meta.fields
+        )
+
+    def get_requested_expand(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return set()
+        return get_requested_expand(self.request,
+                                    self.expand_prefetch_related)
+
+    def select_requested(self, queryset):
+        return self.select_fields(queryset,
+                                  self.get_requested_fields(),
+                                  self.get_requested_expand())
+
+    def get_queryset(self):
+        return self.select_requested(super().get_queryset())
+
+
+class ReplicaReadMixin:
+    """Миксин вьюсетов: безопасные запросы читают с реплики БД.
+
+    Реплика выбирается после аутентификации, если пользователь
+    недавно не выполнял запись (см. ReplicaStickinessMiddleware)
+    и есть реплика с допустимым отставанием.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.read_alias_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.read_alias_token is not None:
+                read_alias.reset(self.read_alias_token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS
+                and request.method in permissions.SAFE_METHODS
+                and not is_sticky(request.user)):
+            self.read_alias_token = read_alias.set(choose_replica())
+
+
+class ConditionalGetMixin:
+    """Миксин вьюсетов: условные GET-запросы (ETag, Last-Modified).
+
+    `get_validators()` возвращает версию и дату изменения данных
+    действия (дата может быть None) или None. Если версия совпадает
+    с If-None-Match (If-Modified-Since) запроса, ответ 304 отдаётся
+    без загрузки и сериализации данных.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+    etag_per_user = False
+
+    def get_validators(self):
+        return None
+
+    def get_etag(self, version):
+        return make_etag(self.basename,
+                         version,
+                         self.request.accepted_renderer.format,
+                         self.request.user if self.etag_per_user else None)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        validators = None
+        if self.action in self.conditional_actions:
+            validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        version, last_modified = validators
+        etag = self.get_etag(version)
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified,
+                              self.etag_per_user)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class CachedResponseMixin:
+    """Миксин вьюсетов: кеш данных ответов list и retrieve.
+
+    Ключ - нормализованные параметры запроса и версии данных из
+    get_cache_versions() (api.response_cache), поэтому записи не
+    удаляются при изменениях. В кеше хранится ответ без данных
+    пользователя (strip_user_data), при выдаче они добавляются
+    (add_user_data). Используется при включённой настройке RESPONSE_CACHE.
+    """
+
+    data_versions = None
+
+    def get_cache_versions(self):
+        raise NotImplementedError('.get_cache_versions() must be overridden')
+
+    def get_data_versions(self):
+        """Версии данных из общего кеша (один раз за запрос).
+
+        Годятся и как ETag (ConditionalGetMixin): проверка условного
+        запроса тогда не обращается к БД.
+        """
+
+        if self.data_versions is None:
+            self.data_versions = get_versions(self.get_cache_versions())
+        return self.data_versions
+
+    def is_cacheable(self, request):
+        return settings.RESPONSE_CACHE
+
+    def strip_user_data(self, data):
+        return data
+
+    def add_user_data(self, data):
+        return data
+
+    def get_cache_key(self, request, kwargs):
+        return make_key(self.basename,
+                        self.action,
+                        request.accepted_renderer.format,
+                        request.build_absolute_uri(request.path),
+                        sorted(request.query_params.lists()),
+                        sorted(kwargs.items()),
+                        self.get_data_versions())
+
+    def cached(self, handler, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        response = None
+
+        def compute():
+            nonlocal response
+            # Промах читается с основной БД, чтобы отставание реплики
+            # не сохранилось в кеше до следующего изменения версии
+            token = read_alias.set(None)
+            try:
+                response = handler(request, *args, **kwargs)
+            finally:
+                read_alias.reset(token)
+            if response.status_code != 200:
+                return None
+            return self.strip_user_data(response.data)
+
+        data, level = response_cache.get_or_compute(
+            self.get_cache_key(request, kwargs), compute
+        )
+        if response is not None:
+            response['X-Cache'] = 'MISS'
+            return response
+        with phase('serializer'):
+            response = Response(self.add_user_data(data))
+        response['X-Cache'] = f'HIT {level}'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
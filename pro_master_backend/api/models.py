@@ -0,0 +1,80 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Модель медленного SQL-запроса (кольцевой буфер)."""
+
+    created = models.DateTimeField(
+        'Дата',
+        auto_now_add=True,
+        db_index=True
+    )
+    fingerprint = models.TextField('Отпечаток запроса')
+    sql = models.TextField('Запрос')
+    duration_ms = models.FloatField('Длительность, мс')
+    database = models.CharField(
+        'Псевдоним БД',
+        max_length=64
+    )
+    view = models.CharField(
+        'Маршрут',
+        max_length=256,
+        blank=True
+    )
+    call_site = models.CharField(
+        'Место вызова',
+        max_length=512,
+        blank=True
+    )
+    plan = models.TextField(
+        'План выполнения',
+        blank=True
+    )
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Slow query'
+        verbose_name_plural = 'Slow queries'
+
+    def __str__(self):
+        return f'{self.duration_ms:.0f} мс {self.fingerprint[:80]}'
+
+
+class RequestProfile(models.Model):
+    """Модель профиля запроса, снятого по запросу персонала."""
+
+    created = models.DateTimeField(
+        'Дата',
+        auto_now_add=True,
+        db_index=True
+    )
+    user_id = models.BigIntegerField('Пользователь')
+    method = models.CharField(
+        'Метод',
+        max_length=16
+    )
+    path = models.CharField(
+        'Путь',
+        max_length=512
+    )
+    view = models.CharField(
+        'Маршрут',
+        max_length=256,
+        blank=True
+    )
+    status = models.PositiveSmallIntegerField('Статус ответа')
+    duration_ms = models.FloatField('Длительность, мс')
+    phases = models.JSONField(
+        'Фазы обработки, мс',
+        default=dict
+    )
+    stats = models.TextField('Сводка cProfile')
+    data = models.BinaryField('Файл профиля (pstats)')
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Request profile'
+        verbose_name_plural = 'Request profiles'
+
+    def __str__(self):
+        return f'{self.method} {self.path} {self.duration_ms:.0f} мс'
@@ -1,6 +1,22 @@
+from django.core.exceptions import ObjectDoesNotExist
+
 from rest_framework import permissions
 
 
+def get_client_profile_id(user):
+    """id профиля клиента пользователя или None.
+
+    Права на объект сравнивают его внешний ключ (author_id,
+    client_profile_id) с этим значением, не загружая связанную запись
+    для каждого объекта.
+    """
+
+    try:
+        return user.client_profile.pk
+    except ObjectDoesNotExist:
+        return None
+
+
 class IsAdminOrMasterOrReadOnly(permissions.BasePermission):
 
     def has_permission(self, request, view):
@@ -10,10 +26,13 @@ class IsAdminOrMasterOrReadOnly(permissions.BasePermission):
                          or request.user.is_staff)))
 
     def has_object_permission(self, request, view, obj):
-        return (request.method in permissions.SAFE_METHODS
-                or request.user.is_staff
-                or obj.owner == request.user
-                or obj.service_profile.owner == request.user)
+        if (request.method in permissions.SAFE_METHODS
+                or request.user.is_staff):
+            return True
+        owner_id = getattr(obj, 'owner_id', None)
+        if owner_id is None:
+            owner_id = obj.service_profile.owner_id
+        return owner_id == request.user.id
 
 
 class IsAdminOrAuthorOrReadOnly(permissions.BasePermission):
@@ -23,10 +42,13 @@ class IsAdminOrAuthorOrReadOnly(permissions.BasePermission):
                 or request.user.is_authenticated)
 
     def has_object_permission(self, request, view, obj):
-        return (request.method in permissions.SAFE_METHODS
-                or request.user.is_staff
-                or obj.author == request.user)
-    
+        if (request.method in permissions.SAFE_METHODS
+                or request.user.is_staff):
+            return True
+        client_profile_id = get_client_profile_id(request.user)
+        return (client_profile_id is not None
+                and obj.author_id == client_profile_id)
+
 
 class IsAdminOrClientOrReadOnly(permissions.BasePermission):
 
@@ -37,6 +59,13 @@ class IsAdminOrClientOrReadOnly(permissions.BasePermission):
                          or not request.user.is_master)))
 
     def has_object_permission(self, request, view, obj):
-        return (request.method in permissions.SAFE_METHODS
-                or request.user.is_staff
-                or obj.client == request.user)
+        if (request.method in permissions.SAFE_METHODS
+                or request.user.is_staff):
+            return True
+        client_id = getattr(obj, 'client_id', None)
+        if client_id is not None:
+            return client_id == request.user.id
+        client_profile_id = get_client_profile_id(request.user)
+        return (client_profile_id is not None
+                and obj.client_profile_id == client_profile_id)
+
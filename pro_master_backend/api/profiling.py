@@ -0,0 +1,140 @@
+import cProfile
+import io
+import marshal
+import pstats
+import time
+
+from asgiref.sync import (iscoroutinefunction,
+                          markcoroutinefunction,
+                          sync_to_async)
+
+from django.conf import settings
+from django.urls import reverse
+
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .instrumentation import current_metrics
+from .models import RequestProfile
+
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = '_profile'
+
+
+def is_staff_request(request):
+    """Проверка персонала: сессия или аутентификация DRF до вызова вью."""
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    drf_request = Request(request, authenticators=[
+        authenticator() for authenticator
+        in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return drf_request.user.is_staff
+    except Exception:
+        return False
+
+
+class RequestProfilerMiddleware:
+    """Профилирование отдельного запроса персонала через cProfile.
+
+    Включается заголовком `X-Profile: 1` или параметром `?_profile=1`.
+    Профиль с разбивкой по фазам (аутентификация, права, БД,
+    сериализация, рендеринг) сохраняется в RequestProfile, ответ
+    получает заголовки X-Profile-Id и X-Profile-Url (выгрузка .prof
+    в админке).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def is_requested(request):
+        return bool(request.headers.get(PROFILE_HEADER)
+                    or request.GET.get(PROFILE_PARAM))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not (self.is_requested(request) and is_staff_request(request)):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+        return self.attach(request, response, profiler, duration)
+
+    async def __acall__(self, request):
+        if not (self.is_requested(request)
+                and await sync_to_async(is_staff_request)(request)):
+            return await self.get_response(request)
+
+        # В асинхронном режиме профилируется поток цикла событий
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+        return await sync_to_async(self.attach)(request, response,
+                                                profiler, duration)
+
+    def attach(self, request, response, profiler, duration):
+        # Сохранение профиля не учитывается в метриках запроса
+        metrics = current_metrics.get()
+        token = current_metrics.set(None)
+        try:
+            profile = self.save(request, response, profiler, duration,
+                                metrics)
+        finally:
+            current_metrics.reset(token)
+        response['X-Profile-Id'] = profile.id
+        response['X-Profile-Url'] = reverse(
+            'admin:api_requestprofile_download', args=(profile.id,)
+        )
+        return response
+
+    def save(self, request, response, profiler, duration, metrics):
+        profiler.create_stats()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(settings.REQUEST_PROFILE_STATS_LINES)
+
+        phases = {}
+        if metrics is not None:
+            phases = {name: round(value * 1000, 2)
+                      for name, value in metrics.phases.items()}
+            phases['db'] = round(metrics.sql_time * 1000, 2)
+
+        match = request.resolver_match
+        profile = RequestProfile.objects.create(
+            user_id=request.user.pk,
+            method=request.method,
+            path=request.get_full_path()[:512],
+            view=match.view_name if match else '',
+            status=response.status_code,
+            duration_ms=duration * 1000,
+            phases=phases,
+            stats=output.getvalue(),
+            data=marshal.dumps(profiler.stats)
+        )
+        RequestProfile.objects.filter(
+            id__lte=profile.id - settings.REQUEST_PROFILE_LOG_SIZE
+        ).delete()
+        return profile
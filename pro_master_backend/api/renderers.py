@@ -0,0 +1,134 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+
+
+def is_table(rows):
+    """Список однородных объектов: у всех одинаковые ключи в одном порядке."""
+
+    if not rows or not all(isinstance(row, dict) for row in rows):
+        return False
+    columns = list(rows[0])
+    return all(list(row) == columns for row in rows)
+
+
+def is_object_column(values):
+    """Значения столбца - объекты или списки объектов (и null)."""
+
+    values = [value for value in values if value is not None]
+    if not values:
+        return False
+    if all(isinstance(value, dict) for value in values):
+        return True
+    return (all(isinstance(value, list) for value in values)
+            and any(values)
+            and all(isinstance(item, dict)
+                    for value in values for item in value))
+
+
+class Dictionary:
+    """Уникальные объекты столбца; объект заменяется номером в словаре."""
+
+    def __init__(self):
+        self.objects = []
+        self.indexes = {}
+
+    def encode(self, value):
+        key = json.dumps(value, sort_keys=True, default=str)
+        if key not in self.indexes:
+            self.indexes[key] = len(self.objects)
+            self.objects.append(value)
+        return self.indexes[key]
+
+
+def encode_table(rows):
+    """Столбцовое представление списка объектов.
+
+    {"columns": [...], "rows": [[...], ...], "dictionaries": {...}}:
+    значения столбца с объектами (или списками объектов) - номера
+    (списки номеров) строк таблицы dictionaries[столбец], в которой
+    повторяющиеся объекты встречаются один раз. Таблицы словарей
+    кодируются так же, рекурсивно. Неоднородный список возвращается
+    без изменений.
+    """
+
+    if not is_table(rows):
+        return rows
+    columns = list(rows[0])
+    table = [list(row.values()) for row in rows]
+    dictionaries = {}
+    for index, column in enumerate(columns):
+        values = [row[index] for row in table]
+        if not is_object_column(values):
+            continue
+        dictionary = Dictionary()
+        for row in table:
+            value = row[index]
+            if isinstance(value, dict):
+                row[index] = dictionary.encode(value)
+            elif value is not None:
+                row[index] = [dictionary.encode(item) for item in value]
+        objects = encode_table(dictionary.objects)
+        if objects is dictionary.objects:
+            # Объекты столбца разнородны: значения остаются как есть
+            for row, value in zip(table, values):
+                row[index] = value
+            continue
+        dictionaries[column] = objects
+    return {'columns': columns, 'rows': table, 'dictionaries': dictionaries}
+
+
+def decode_table(data):
+    """Список объектов из encode_table (для клиентов и проверок)."""
+
+    if not isinstance(data, dict) or 'columns' not in data:
+        return data
+    dictionaries = {column: decode_table(table)
+                    for column, table in data['dictionaries'].items()}
+    rows = []
+    for values in data['rows']:
+        row = {}
+        for column, value in zip(data['columns'], values):
+            objects = dictionaries.get(column)
+            if objects is not None and value is not None:
+                if isinstance(value, list):
+                    value = [objects[index] for index in value]
+                else:
+                    value = objects[value]
+            row[column] = value
+        rows.append(row)
+    return rows
+
+
+def encode_compact(data):
+    """Столбцовый список или страница (results) ответа; остальное как есть."""
+
+    if isinstance(data, list):
+        return encode_table(data)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': encode_table(data['results'])}
+    return data
+
+
+def decode_compact(data):
+    if isinstance(data, dict) and 'results' in data:
+        return {**data, 'results': decode_table(data['results'])}
+    return decode_table(data)
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """Компактный JSON списков: имена столбцов один раз, строки -
+    массивы значений, повторяющиеся вложенные объекты (категории,
+    услуги профилей) - номера в словарях (encode_table).
+
+    Выбирается заголовком Accept или суффиксом формата
+    (?format=compact, .compact); работает с пагинацией и ?fields=.
+    Ответы, не являющиеся списком, не меняются.
+    """
+
+    media_type = 'application/vnd.promaster.compact+json'
+    format = 'compact'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(encode_compact(data), accepted_media_type,
+                              renderer_context)
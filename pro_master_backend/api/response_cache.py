@@ -0,0 +1,191 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.dispatch import receiver
+
+from services.signals import catalogue_changed, profiles_changed
+
+from .metrics import registry
+from .tracing import span
+
+
+# Версии данных в общем кеше: справочники и списки профилей,
+# отдельный профиль
+CATALOGUE = 'catalogue'
+SERVICE_PROFILES = 'service_profiles'
+
+
+def profile_version_name(profile_id):
+    return f'service_profile_{profile_id}'
+
+
+def version_key(name):
+    return f'response_version:{name}'
+
+
+def get_shared_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_versions(names):
+    """Текущие версии данных из общего кеша (без запросов к БД).
+
+    Отсутствующая (вытесненная) версия заменяется новым уникальным
+    значением, поэтому записи со старой версией становятся недоступны.
+    """
+
+    cache = get_shared_cache()
+    keys = [version_key(name) for name in names]
+    with span('cache.get_many', **{'cache.alias': 'versions'}):
+        found = cache.get_many(keys)
+        versions = []
+        for key in keys:
+            version = found.get(key)
+            if version is None:
+                cache.add(key, time.time_ns(), None)
+                version = cache.get(key)
+            versions.append(version)
+    return versions
+
+
+def bump_versions(names):
+    cache = get_shared_cache()
+    with span('cache.incr', **{'cache.alias': 'versions'}):
+        for key in map(version_key, names):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), None)
+
+
+@receiver(profiles_changed)
+def bump_profile_versions(sender, ids, **kwargs):
+    names = [SERVICE_PROFILES, *map(profile_version_name, ids)]
+    transaction.on_commit(lambda: bump_versions(names))
+
+
+@receiver(catalogue_changed)
+def bump_catalogue_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_versions([CATALOGUE]))
+
+
+def make_key(*parts):
+    digest = hashlib.md5(
+        '|'.join(map(str, parts)).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'response:{digest}'
+
+
+class ResponseCache:
+    """Кеш данных ответов: локальный LRU процесса (L1) перед общим (L2).
+
+    Ключи содержат версии данных, поэтому записи не удаляются явно,
+    а вытесняются по размеру и времени жизни. Вычисление промаха
+    выполняется одним запросом: в процессе - под блокировкой ключа,
+    между процессами - под блокировкой в общем кеше; остальные
+    запросы ждут результат.
+    """
+
+    def __init__(self):
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+        self.flights = {}
+
+    def get_local(self, key):
+        with self.lock:
+            item = self.local.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self.local.move_to_end(key)
+                return item[1]
+            return None
+
+    def set_local(self, key, value):
+        with self.lock:
+            self.local[key] = (
+                time.monotonic() + settings.RESPONSE_CACHE_TIMEOUT, value
+            )
+            self.local.move_to_end(key)
+            while len(self.local) > settings.RESPONSE_CACHE_LOCAL_SIZE:
+                self.local.popitem(last=False)
+
+    def get(self, key):
+        """Значение и уровень кеша (l1, l2) или (None, None)."""
+
+        value = self.get_local(key)
+        registry.inc('cache_requests_total',
+                     {'cache': 'response_l1',
+                      'result': 'miss' if value is None else 'hit'})
+        if value is not None:
+            return value, 'l1'
+        with span('cache.get', **{'cache.alias': 'response'}):
+            value = get_shared_cache().get(key)
+        registry.inc('cache_requests_total',
+                     {'cache': 'response_l2',
+                      'result': 'miss' if value is None else 'hit'})
+        if value is not None:
+            self.set_local(key, value)
+            return value, 'l2'
+        return None, None
+
+    def set(self, key, value):
+        with span('cache.set', **{'cache.alias': 'response'}):
+            get_shared_cache().set(key, value,
+                                   settings.RESPONSE_CACHE_TIMEOUT)
+        self.set_local(key, value)
+
+    def wait(self, key):
+        """Ожидание значения, вычисляемого другим процессом."""
+
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            value = get_shared_cache().get(key)
+            if value is not None:
+                self.set_local(key, value)
+                return value
+        return None
+
+    def get_or_compute(self, key, compute):
+        """Значение из кеша или compute(); None - значение не кешируется.
+
+        Возвращает (значение, уровень кеша или None при вычислении).
+        """
+
+        value, level = self.get(key)
+        if value is not None:
+            return value, level
+
+        with self.lock:
+            flight = self.flights.setdefault(key, threading.Lock())
+        try:
+            with flight:
+                value, level = self.get(key)
+                if value is not None:
+                    return value, level
+                lock_key = f'{key}:lock'
+                shared = get_shared_cache()
+                if shared.add(lock_key, 1,
+                              settings.RESPONSE_CACHE_LOCK_TIMEOUT):
+                    try:
+                        value = compute()
+                        if value is not None:
+                            self.set(key, value)
+                    finally:
+                        shared.delete(lock_key)
+                    return value, None
+                value = self.wait(key)
+                if value is not None:
+                    return value, 'l2'
+                return compute(), None
+        finally:
+            with self.lock:
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+
+
+response_cache = ResponseCache()
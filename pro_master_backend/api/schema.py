@@ -0,0 +1,173 @@
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+import drf_spectacular
+import rest_framework
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.views import SpectacularAPIView
+
+
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer(),
+    'json': OpenApiJsonRenderer(),
+}
+
+_build_lock = threading.Lock()
+
+
+class StatelessReadJWTScheme(SimpleJWTScheme):
+    """Bearer JWT в схеме для StatelessReadJWTAuthentication (USE_JWT)."""
+
+    target_class = 'api.authentication.StatelessReadJWTAuthentication'
+
+
+@cache
+def get_code_version():
+    """Версия кода, от которой зависит схема OpenAPI.
+
+    settings.CODE_VERSION (например, хеш коммита при сборке образа)
+    или хеш исходного кода проекта, версий DRF и drf-spectacular
+    и настроек, меняющих маршруты и схему.
+    """
+
+    if settings.CODE_VERSION:
+        return settings.CODE_VERSION
+    digest = hashlib.sha256()
+    for value in (drf_spectacular.__version__,
+                  rest_framework.VERSION,
+                  settings.USE_JWT,
+                  sorted(settings.SPECTACULAR_SETTINGS.items())):
+        digest.update(repr(value).encode())
+    base_dir = Path(settings.BASE_DIR)
+    for path in sorted(base_dir.rglob('*.py')):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def accepts_gzip(accept_encoding):
+    """Разрешает ли Accept-Encoding ответ в gzip (с учётом q-значений).
+
+    gzip;q=0 запрещает сжатие; gzip без явного значения разрешает
+    и '*' с ненулевым q.
+    """
+
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0)) > 0
+
+
+def get_schema_path(format, compressed=False):
+    path = Path(settings.OPENAPI_SCHEMA_DIR) / (
+        f'schema-{get_code_version()}.{format}'
+    )
+    return path.with_name(path.name + '.gz') if compressed else path
+
+
+def write_file(path, content):
+    """Атомарная запись: читатели видят старый или новый файл целиком."""
+
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent,
+                                             prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def generate_schema():
+    """Схема OpenAPI для всех маршрутов (как у SpectacularAPIView)."""
+
+    generator = SpectacularAPIView.generator_class(
+        urlconf=SpectacularAPIView.urlconf
+    )
+    return generator.get_schema(request=None,
+                                public=SpectacularAPIView.serve_public)
+
+
+def build_schema(force=False):
+    """Файлы схемы текущей версии кода: YAML, JSON и их gzip.
+
+    Файлы других версий удаляются. Возвращает пути созданных файлов
+    или пустой список, если схема этой версии уже построена.
+    """
+
+    with _build_lock:
+        paths = [get_schema_path(format, compressed)
+                 for format in RENDERERS for compressed in (False, True)]
+        if not force and all(path.exists() for path in paths):
+            return []
+        directory = Path(settings.OPENAPI_SCHEMA_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        schema = generate_schema()
+        for format, renderer in RENDERERS.items():
+            content = renderer.render(schema, renderer_context={})
+            write_file(get_schema_path(format), content)
+            write_file(get_schema_path(format, compressed=True),
+                       gzip.compress(content, mtime=0))
+        for path in directory.glob('schema-*'):
+            if path not in paths:
+                path.unlink(missing_ok=True)
+        return paths
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    """Схема OpenAPI из файла, построенного для текущей версии кода.
+
+    Файл строится командой build_schema при сборке образа или при
+    первом запросе и перестраивается только при смене версии кода.
+    Клиентам, принимающим gzip (accepts_gzip), отдаётся заранее
+    сжатый файл. ETag - версия кода, формат и кодирование тела: сжатое
+    и несжатое представления различаются. Запросы с ?lang= и ?version=
+    обрабатываются SpectacularAPIView.
+    """
+
+    def _get_schema_response(self, request):
+        if request.GET.get('lang') or request.GET.get('version'):
+            return super()._get_schema_response(request)
+
+        format = request.accepted_renderer.format
+        compressed = accepts_gzip(request.headers.get('Accept-Encoding', ''))
+        etag = '"{}-{}{}"'.format(get_code_version(), format,
+                                  '-gz' if compressed else '')
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            path = get_schema_path(format, compressed)
+            if not path.exists():
+                build_schema()
+            response = HttpResponse(path.read_bytes(),
+                                    content_type=request.accepted_media_type)
+            if compressed:
+                response['Content-Encoding'] = 'gzip'
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, None)}"'
+            )
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
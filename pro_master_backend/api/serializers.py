@@ -1,15 +1,12 @@
 import re
 
-from geopy import Yandex
-
 from django.conf import settings
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.shortcuts import get_object_or_404
 
 from drf_extra_fields.fields import Base64ImageField
 
-from rest_framework import serializers
+from rest_framework import permissions, serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
 
@@ -17,6 +14,8 @@ from djoser.serializers import (TokenCreateSerializer,
                                 UserSerializer,
                                 UserCreateSerializer)
 
+from rest_framework_simplejwt.tokens import RefreshToken
+
 from appointments.models import (Appointment,
                                  Schedule)
 
@@ -35,12 +34,156 @@ from services.models import (Category,
                              ServiceProfileCategory,
                              ServiceProfileService)
 
-from .utils import get_validated_field
+from .loaders import (AdditionsInFavoriteCountLoader,
+                      Deferred,
+                      EmployeesCountLoader,
+                      FavoritedLoader,
+                      FavoritesCountLoader,
+                      resolve_deferred)
+from .throttling import LoginThrottle
+from .tracing import span
+from .utils import (get_requested_expand,
+                    get_requested_fields,
+                    get_validated_field)
 
 
 User = get_user_model()
 
 
+class TracedBase64ImageField(Base64ImageField):
+    """Поле изображения base64 с отрезком трассы на декодирование."""
+
+    def to_internal_value(self, base64_data):
+        with span('image.decode', field=self.field_name or ''):
+            return super().to_internal_value(base64_data)
+
+
+class SparseFieldsSerializerMixin:
+    """Миксин сериализаторов: поля ответа по ?fields= и ?omit= запроса.
+
+    Невыбранные поля удаляются до сериализации и не вычисляются.
+    Применяется к корневому сериализатору безопасных запросов
+    (вложенные сериализаторы создаются без контекста).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return
+        fields = get_requested_fields(request, self.Meta.fields)
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class ExpandableFieldsMixin:
+    """Миксин сериализаторов: связи `expandable_fields` возвращаются как id.
+
+    Параметр ?expand= встраивает связь вложенным сериализатором; путь
+    связи вложенного сериализатора - через точку (employees.organization).
+    Связанные объекты страницы загружает вьюсет (SparseFieldsViewMixin,
+    `expand_prefetch_related`) - одним запросом на тип связи.
+    """
+
+    expandable_fields = ()
+
+    @classmethod
+    def get_expandable_paths(cls, prefix=''):
+        paths = []
+        for name, field in cls._declared_fields.items():
+            nested = getattr(field, 'child', field)
+            if name in cls.expandable_fields:
+                paths.append(prefix + name)
+            if isinstance(nested, ExpandableFieldsMixin):
+                paths.extend(nested.get_expandable_paths(f'{prefix}{name}.'))
+        return paths
+
+    def get_expand(self):
+        """Раскрываемые поля этого сериализатора по ?expand= запроса."""
+
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        root = getattr(node, 'child', node)
+        request = self.context.get('request')
+        if request is None or not isinstance(root, ExpandableFieldsMixin):
+            return set()
+        prefix = ''.join(f'{name}.' for name in reversed(names))
+        return {path[len(prefix):] for path in get_requested_expand(
+            request, root.get_expandable_paths()
+        ) if path.startswith(prefix)}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.get_expand()
+        for name in self.expandable_fields:
+            if name in fields and name not in expand:
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    source=fields[name].source, read_only=True
+                )
+        return fields
+
+
+class LoaderField(serializers.ReadOnlyField):
+    """Поле со значением пакетного загрузчика (api.loaders) по ключу объекта.
+
+    В сериализаторе с BatchLoadingMixin значения загружаются одним
+    запросом на загрузчик после обхода объекта или страницы, иначе -
+    сразу при сериализации объекта.
+    """
+
+    def __init__(self, loader_class, key='pk', transform=None, **kwargs):
+        self.loader_class = loader_class
+        self.key = key
+        self.transform = transform
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        loader = self.loader_class.for_context(self.context)
+        key = getattr(instance, self.key)
+        if not getattr(self.root, 'resolves_deferred', False):
+            value = loader.load(key)
+        else:
+            value = loader.defer(key)
+            if isinstance(value, Deferred):
+                value.transform = self.transform
+                return value
+        if self.transform is not None:
+            return self.transform(value)
+        return value
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    """Список с загрузкой значений LoaderField для всей страницы."""
+
+    resolves_deferred = True
+
+    def to_representation(self, data):
+        data = super().to_representation(data)
+        if self.parent is None:
+            return resolve_deferred(data)
+        return data
+
+
+class BatchLoadingMixin:
+    """Миксин сериализаторов: загрузка значений LoaderField объекта
+    (списка - в BatchListSerializer) одним запросом на загрузчик.
+    """
+
+    resolves_deferred = True
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.parent is None:
+            return resolve_deferred(data)
+        return data
+
+
 class RegisterUserSerializer(UserCreateSerializer):
     """Кастомный базовый сериализатор регистрации пользователя."""
 
@@ -75,28 +218,54 @@ class CustomTokenCreateSerializer(TokenCreateSerializer):
     def validate(self, data):
         password = data.get('password')
 
-        params = {}
         if self.context['request'].data.get(self.field):
             params = {self.field: data.get(self.field)}
         else:
             params = {self.alt_field: data.get(self.alt_field)}
-        self.user = authenticate(
-            request=self.context.get('request'), **params, password=password
-        )
 
-        if not self.user:
-            self.user = User.objects.filter(**params).first()
-            if self.user and not self.user.check_password(password):
-                raise serializers.ValidationError(
-                    'Некорректный пароль пользователя!'
-                )
+        throttle = LoginThrottle(self.context['request'],
+                                 *params.values())
+        throttle.check()
+
+        self.user = User.objects.filter(**params).first()
+        if self.user is None:
+            # Хеширование для выравнивания времени ответа
+            User().set_password(password)
+        elif not self.user.check_password(password):
+            throttle.failure()
+            raise serializers.ValidationError(
+                'Некорректный пароль пользователя!'
+            )
         if self.user and self.user.is_active:
             return data
+        throttle.failure()
         raise serializers.ValidationError(
             'Некорректные данные пользователя!'
         )
 
 
+class CustomTokenObtainPairSerializer(CustomTokenCreateSerializer):
+    """Сериализатор получения пары JWT-токенов по email/номеру телефона."""
+
+    def validate(self, data):
+        super().validate(data)
+        refresh = self.get_token(self.user)
+        return {'refresh': str(refresh),
+                'access': str(refresh.access_token)}
+
+    @classmethod
+    def get_token(cls, user):
+        token = RefreshToken.for_user(user)
+        token['is_master'] = user.is_master
+        token['is_staff'] = user.is_staff
+        token['client_profile_id'] = (
+            ClientProfile.objects.filter(client=user)
+            .values_list('id', flat=True)
+            .first()
+        )
+        return token
+
+
 class CustomUserSerializer(UserSerializer):
     """Кастомный базовый сериализатор всех типов пользователей."""
 
@@ -108,13 +277,15 @@ class CustomUserSerializer(UserSerializer):
                   'is_master')
 
 
-class ClientProfileSerializer(serializers.ModelSerializer):
+class ClientProfileSerializer(SparseFieldsSerializerMixin,
+                              BatchLoadingMixin,
+                              serializers.ModelSerializer):
     """Кастомный сериализатор Клиента."""
 
     client = CustomUserSerializer(
         default=serializers.CurrentUserDefault()
     )
-    favorites_count = serializers.SerializerMethodField()
+    favorites_count = LoaderField(FavoritesCountLoader)
 
     class Meta:
         model = ClientProfile
@@ -124,16 +295,34 @@ class ClientProfileSerializer(serializers.ModelSerializer):
                   'first_name',
                   'last_name',
                   'favorites_count')
+        list_serializer_class = BatchListSerializer
 
     @transaction.atomic
     def create(self, validated_data):
         return super().create(validated_data)
 
-    def get_favorites_count(self, profile):
-        return profile.favorite_services.all().count()
 
+class ClientProfileContextSerializer(serializers.ModelSerializer):
+    """Сериализатор Клиента - автора отзывов и комментариев.
 
-class CategorySerializer(serializers.ModelSerializer):
+    Без счётчиков клиента: ответы с отзывами проверяются по версиям
+    профиля и данных клиентов (review_validators), и счётчик избранного
+    менял бы их при каждом добавлении в избранное.
+    """
+
+    client = CustomUserSerializer(read_only=True)
+
+    class Meta:
+        model = ClientProfile
+        fields = ('id',
+                  'client',
+                  'profile_name',
+                  'first_name',
+                  'last_name')
+
+
+class CategorySerializer(SparseFieldsSerializerMixin,
+                         serializers.ModelSerializer):
     """Сериализатор Категории."""
 
     class Meta:
@@ -145,7 +334,8 @@ class CategorySerializer(serializers.ModelSerializer):
         depth = 5
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     """Сериализатор Услуги."""
     category = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.filter(child_categories=None)
@@ -172,10 +362,12 @@ class ServiceSerializer(serializers.ModelSerializer):
 #                   'point')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        BatchLoadingMixin,
+                        serializers.ModelSerializer):
     """Сериализатор Комментариев к Отзывам."""
 
-    author = ClientProfileSerializer(read_only=True)
+    author = ClientProfileContextSerializer(read_only=True)
     pub_date = serializers.DateTimeField(read_only=True, format='%d.%m.%Y')
 
     class Meta:
@@ -185,16 +377,22 @@ class CommentSerializer(serializers.ModelSerializer):
                   'text',
                   'author',
                   'pub_date')
+        list_serializer_class = BatchListSerializer
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsSerializerMixin,
+                       ExpandableFieldsMixin,
+                       BatchLoadingMixin,
+                       serializers.ModelSerializer):
     """Сериализатор Отзывов к Сервисам."""
 
+    expandable_fields = ('author',)
+
     service_profile = serializers.SlugRelatedField(
         slug_field='name',
         read_only=True
     )
-    author = ClientProfileSerializer(read_only=True)
+    author = ClientProfileContextSerializer(read_only=True)
     pub_date = serializers.DateTimeField(
         read_only=True,
         format='%d.%m.%Y'
@@ -213,23 +411,20 @@ class ReviewSerializer(serializers.ModelSerializer):
                   'score',
                   'pub_date',
                   'comments')
+        list_serializer_class = BatchListSerializer
 
     def validate(self, data):
         request = self.context['request']
-        author = request.user.client_profile
-        service_profile = get_object_or_404(
-            ServiceProfile,
-            pk=self.context['view'].kwargs.get('profile_id')
-        )
-        if author == service_profile.owner:
+        service_profile = self.context['view'].service_profile
+        if service_profile.owner_id == request.user.id:
             raise serializers.ValidationError(
                 'Запрещено оставлять отзыв о качестве собственных услуг'
             )
         if request.method == 'POST':
             if Review.objects.filter(
                 service_profile=service_profile,
-                author=author
-            ):
+                author__client_id=request.user.id
+            ).exists():
                 raise serializers.ValidationError(
                     'Можно оставить только один отзыв'
                 )
@@ -269,7 +464,8 @@ class ServiceProfileContextSerializer(serializers.ModelSerializer):
                   'services')
 
 
-class ImageSerializer(serializers.ModelSerializer):
+class ImageSerializer(SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
     """Сериализатор изображений профиля сервиса."""
 
     class Meta:
@@ -279,9 +475,12 @@ class ImageSerializer(serializers.ModelSerializer):
                   'image')
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(ExpandableFieldsMixin,
+                         serializers.ModelSerializer):
     """Сериализатор Сотрудника организации."""
 
+    expandable_fields = ('organization',)
+
     organization = ServiceProfileContextSerializer(read_only=True)
 
     class Meta:
@@ -293,7 +492,10 @@ class EmployeeSerializer(serializers.ModelSerializer):
                   'organization')
 
 
-class ServiceProfileSerializer(serializers.ModelSerializer):
+class ServiceProfileSerializer(SparseFieldsSerializerMixin,
+                               ExpandableFieldsMixin,
+                               BatchLoadingMixin,
+                               serializers.ModelSerializer):
     """Сериализатор профиля Сервиса."""
 
     owner = CustomUserSerializer(
@@ -305,13 +507,13 @@ class ServiceProfileSerializer(serializers.ModelSerializer):
     )
     services = ServiceSerializer(many=True)
     # locations = LocationSerializer(many=True)
-    profile_foto = Base64ImageField()
+    profile_foto = TracedBase64ImageField()
     profile_images = ImageSerializer(
         read_only=True,
         many=True
     )
     uploaded_images = serializers.ListField(
-        child=Base64ImageField(),
+        child=TracedBase64ImageField(),
         write_only=True
     )
     created = serializers.DateTimeField(
@@ -322,14 +524,15 @@ class ServiceProfileSerializer(serializers.ModelSerializer):
         read_only=True,
         many=True
     )
-    employees_count = serializers.SerializerMethodField()
+    employees_count = LoaderField(EmployeesCountLoader,
+                                  transform=lambda count: 1 + count)
     reviews = ReviewContextSerializer(
         read_only=True,
         many=True
     )
     rating = serializers.IntegerField(read_only=True)
-    additions_in_favorite_count = serializers.SerializerMethodField()
-    is_favorited = serializers.SerializerMethodField()
+    additions_in_favorite_count = LoaderField(AdditionsInFavoriteCountLoader)
+    is_favorited = LoaderField(FavoritedLoader)
 
     class Meta:
         model = ServiceProfile
@@ -356,6 +559,7 @@ class ServiceProfileSerializer(serializers.ModelSerializer):
                   'additions_in_favorite_count',
                   'is_favorited')
         depth = 5
+        list_serializer_class = BatchListSerializer
 
         validators = [
             UniqueTogetherValidator(
@@ -365,6 +569,8 @@ class ServiceProfileSerializer(serializers.ModelSerializer):
         ]
 
     # def get_location(self, location):
+    #     from geopy import Yandex
+    #
     #     if location.get('address'):
     #         location_data = Yandex(
     #             api_key=settings.API_KEY
@@ -449,29 +655,26 @@ class ServiceProfileSerializer(serializers.ModelSerializer):
 
         return instance
     
-    def get_employees_count(self, service_profile):
-        return 1 + service_profile.employees.count()
-
-    def get_is_favorited(self, service_profile):
-        user = self.context['request'].user
-        if user.is_anonymous or user.is_master:
-            return False
-        return user.client_profile.favorite_services.filter(
-            service_profile=service_profile
-        ).exists()
-    
-    def get_additions_in_favorite_count(self, service_profile):
-        return service_profile.in_favorite_for_clients.all().count()
-
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data['categories'] = instance.categories.values()
+        if 'categories' in data:
+            # Категории из prefetch_related вьюсета, без запроса на профиль
+            data['categories'] = [
+                {'id': category.id,
+                 'name': category.name,
+                 'parent_category_id': category.parent_category_id}
+                for category in instance.categories.all()
+            ]
         return data
 
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(SparseFieldsSerializerMixin,
+                         ExpandableFieldsMixin,
+                         serializers.ModelSerializer):
     """Сериализатор Расписания работы Сервиса."""
 
+    expandable_fields = ('service_profile',)
+
     service_profile = ServiceProfileContextSerializer(read_only=True)
 
     class Meta:
@@ -483,9 +686,14 @@ class ScheduleSerializer(serializers.ModelSerializer):
                   'end')
 
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(SparseFieldsSerializerMixin,
+                            ExpandableFieldsMixin,
+                            BatchLoadingMixin,
+                            serializers.ModelSerializer):
     """Сериализатор Расписания работы Сервиса."""
 
+    expandable_fields = ('client_profile',)
+
     client_profile = ClientProfileSerializer(read_only=True)
 
     class Meta:
@@ -494,3 +702,4 @@ class AppointmentSerializer(serializers.ModelSerializer):
                   'schedule',
                   'client_profile',
                   'appointment_time')
+        list_serializer_class = BatchListSerializer
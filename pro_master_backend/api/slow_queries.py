@@ -0,0 +1,138 @@
+import logging
+import queue
+import random
+import threading
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .models import SlowQuery
+from .tracing import capture_context, continue_trace
+
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+# Фактический план (SLOW_QUERY_EXPLAIN_ANALYZE): запрос выполняется повторно
+EXPLAIN_ANALYZE_PREFIXES = {
+    'postgresql': 'EXPLAIN (ANALYZE, BUFFERS) ',
+}
+SKIPPED_PATHS = ('/django/', '/rest_framework/', '/site-packages/')
+
+
+def get_call_site():
+    """Ближайший к запросу кадр стека из кода проекта."""
+
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        filename = frame.filename
+        if (not filename.startswith(base_dir)
+                or filename == __file__
+                or filename.endswith('instrumentation.py')
+                or any(path in filename for path in SKIPPED_PATHS)):
+            continue
+        relative = Path(filename).relative_to(base_dir)
+        return f'{relative}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def format_plan(vendor, rows):
+    if vendor == 'sqlite':
+        # id, parent, notused, detail
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(str(row[0]) for row in rows)
+
+
+class SlowQueryRecorder:
+    """Запись медленных запросов в кольцевой буфер SlowQuery.
+
+    EXPLAIN и вставка выполняются в фоновом потоке на отдельном
+    соединении, не задерживая запрос и не попадая в его метрики.
+    План строится только для SELECT: по умолчанию оценочный (EXPLAIN),
+    при SLOW_QUERY_EXPLAIN_ANALYZE для PostgreSQL - фактический
+    (EXPLAIN ANALYZE), для которого медленный запрос выполняется ещё раз.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=1000)
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def capture(self, sql, fingerprint, params, many, duration, alias,
+                request=None):
+        """Постановка запроса в очередь записи (из record_query)."""
+
+        view = ''
+        if request is not None:
+            match = request.resolver_match
+            view = match.view_name if match else request.path
+        explain = (not many
+                   and sql.lstrip()[:6].upper() == 'SELECT'
+                   and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE)
+        trace_context = capture_context()
+        try:
+            self.queue.put_nowait({
+                'trace_context': trace_context,
+                'sql': sql,
+                'fingerprint': fingerprint,
+                'params': params if explain else None,
+                'explain': explain,
+                'duration_ms': duration * 1000,
+                'database': alias,
+                'view': view[:256],
+                'call_site': get_call_site()[:512],
+            })
+        except queue.Full:
+            if trace_context is not None:
+                trace_context.finish()
+            return
+        self.ensure_thread()
+
+    def ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.work,
+                                               name='slow-queries',
+                                               daemon=True)
+                self.thread.start()
+
+    def work(self):
+        while True:
+            item = self.queue.get()
+            try:
+                with continue_trace(item.pop('trace_context'),
+                                    'slow_query.save'):
+                    self.save(**item)
+            except Exception:
+                logger.exception('Не удалось сохранить медленный запрос')
+            finally:
+                connections.close_all()
+
+    def explain(self, alias, sql, params):
+        connection = connections[alias]
+        prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+        if settings.SLOW_QUERY_EXPLAIN_ANALYZE:
+            prefix = EXPLAIN_ANALYZE_PREFIXES.get(connection.vendor, prefix)
+        if prefix is None:
+            return ''
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                return format_plan(connection.vendor, cursor.fetchall())
+        except DatabaseError as error:
+            return f'EXPLAIN не выполнен: {error}'
+
+    def save(self, sql, params, explain, **fields):
+        plan = self.explain(fields['database'], sql, params) if explain else ''
+        query = SlowQuery.objects.create(sql=sql, plan=plan, **fields)
+        SlowQuery.objects.filter(
+            id__lte=query.id - settings.SLOW_QUERY_LOG_SIZE
+        ).delete()
+
+
+recorder = SlowQueryRecorder()
@@ -0,0 +1,177 @@
+import re
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import fingerprint, get_query_budget
+
+
+# Кадры библиотек, внутри которых повторяющийся запрос считается
+# выполненным в цикле по объектам: сериализаторы DRF и списки админки
+LOOP_FRAMES = (
+    ('/rest_framework/serializers.py', 'to_representation'),
+    ('/rest_framework/fields.py', 'get_attribute'),
+    ('/rest_framework/relations.py', 'to_representation'),
+    ('/django/contrib/admin/templatetags/admin_list.py', 'items_for_result'),
+)
+
+
+def assert_query_budget(response, budget=None):
+    """Проверка, что запрос уложился в бюджет SQL-запросов своего маршрута.
+
+    Бюджеты задаются в settings.QUERY_BUDGETS по имени маршрута
+    (например, 'service_profiles-list'); response - ответ тестового
+    клиента, прошедший через SQLInstrumentationMiddleware.
+    """
+
+    metrics = response.request_metrics
+    if budget is None:
+        budget = get_query_budget(metrics.route)
+    if budget is None:
+        raise AssertionError(
+            f'Не задан бюджет запросов для маршрута {metrics.route}'
+        )
+    if metrics.query_count > budget:
+        duplicates = '\n'.join(
+            f'  {count} x {sql}'
+            for sql, count in metrics.duplicates.items()
+        )
+        raise AssertionError(
+            f'{metrics.route}: {metrics.query_count} запросов '
+            f'при бюджете {budget}\n{duplicates}'
+        )
+
+
+class NPlusOneFinding:
+    """Запрос, повторённый count раз из одного места в цикле."""
+
+    def __init__(self, fingerprint, stack, count):
+        self.fingerprint = fingerprint
+        self.stack = stack
+        self.count = count
+
+    @property
+    def call_site(self):
+        """Ближайший к запросу кадр кода проекта."""
+
+        return self.stack[-1] if self.stack else ''
+
+    def __str__(self):
+        frames = '\n'.join(f'    {frame}' for frame in self.stack)
+        return f'  {self.count} x {self.fingerprint}\n{frames}'
+
+
+class NPlusOneDetector:
+    """Поиск N+1: одинаковых запросов, выполненных в цикле.
+
+    Записывает отпечаток и стек вызовов каждого запроса ко всем БД.
+    Запросы с одинаковым отпечатком и одинаковым полным стеком
+    выполнены с одной строки кода; если их не меньше threshold
+    и стек проходит через сериализатор DRF, список админки
+    (LOOP_FRAMES) или цикл в коде проекта, это N+1.
+    Исключения - регулярные выражения settings.N_PLUS_ONE_ALLOWLIST
+    и allow, проверяемые по отпечатку запроса и кадрам проекта.
+
+        with NPlusOneDetector() as detector:
+            response = client.get(url)
+        detector.assert_no_n_plus_one()
+    """
+
+    def __init__(self, threshold=None, allow=()):
+        if threshold is None:
+            threshold = settings.N_PLUS_ONE_THRESHOLD
+        self.threshold = threshold
+        self.allow = [re.compile(pattern) for pattern in
+                      (*settings.N_PLUS_ONE_ALLOWLIST, *allow)]
+        self.queries = defaultdict(int)
+        self.stack = None
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for alias in connections:
+            self.stack.enter_context(
+                connections[alias].execute_wrapper(self.record)
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+        self.stack = None
+
+    def record(self, execute, sql, params, many, context):
+        frames = tuple(
+            (frame.filename, frame.lineno, frame.name)
+            for frame in traceback.extract_stack()[:-1]
+        )
+        key = (fingerprint(sql), frames)
+        self.queries[key] += 1
+        return execute(sql, params, many, context)
+
+    def is_loop(self, frames):
+        if any(map(is_loop_frame, frames)):
+            return True
+        # Цикл в коде проекта: запрос из генератора или списка
+        return any(name.startswith('<') and name.endswith('comp>')
+                   or name == '<genexpr>'
+                   for _, _, name in project_frames(frames))
+
+    def is_allowed(self, sql, stack):
+        return any(pattern.search(text) for pattern in self.allow
+                   for text in (sql, *stack))
+
+    @property
+    def findings(self):
+        findings = []
+        for (sql, frames), count in self.queries.items():
+            if count < self.threshold or not self.is_loop(frames):
+                continue
+            project = project_frames(frames)
+            stack = [format_frame(frame) for frame in frames
+                     if is_loop_frame(frame) or frame in project]
+            if not self.is_allowed(sql, stack):
+                findings.append(NPlusOneFinding(sql, stack, count))
+        return sorted(findings, key=lambda finding: -finding.count)
+
+    def report(self):
+        return '\n'.join(map(str, self.findings))
+
+    def assert_no_n_plus_one(self, label=''):
+        findings = self.findings
+        if findings:
+            raise AssertionError(
+                f'{label or "N+1"}: {len(findings)} повторяющихся запросов '
+                f'в цикле\n' + '\n'.join(map(str, findings))
+            )
+
+
+def is_loop_frame(frame):
+    filename, _, name = frame
+    return any(filename.endswith(path) and name == function
+               for path, function in LOOP_FRAMES)
+
+
+def project_frames(frames):
+    """Кадры стека из кода проекта (без библиотек и этого модуля)."""
+
+    base_dir = str(settings.BASE_DIR)
+    return [
+        frame for frame in frames
+        if frame[0].startswith(base_dir)
+        and frame[0] != __file__
+        and not frame[0].endswith(('instrumentation.py', 'manage.py'))
+        and '/site-packages/' not in frame[0]
+        and '/management/commands/' not in frame[0]
+    ]
+
+
+def format_frame(frame):
+    filename, lineno, name = frame
+    if '/site-packages/' in filename:
+        relative = filename.split('/site-packages/', 1)[1]
+    else:
+        relative = Path(filename).relative_to(settings.BASE_DIR)
+    return f'{relative}:{lineno} in {name}'
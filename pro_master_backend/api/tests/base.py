@@ -0,0 +1,73 @@
+import io
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from api.benchmarks.scenarios import get_auth_header
+from appointments.models import Appointment
+from services.models import Comment
+
+
+User = get_user_model()
+
+# Небольшой набор данных manage.py seed: на каждом маршруте несколько
+# объектов со всеми связями, чтобы повторяющиеся запросы были видны
+SEED_OPTIONS = {
+    'clients': 20,
+    'masters': 8,
+    'profiles': 10,
+    'category_depth': 2,
+    'category_breadth': 3,
+    'services': 20,
+    'services_per_profile': 3,
+    'categories_per_profile': 2,
+    'employees': 15,
+    'reviews': 60,
+    'comments': 40,
+    'favorites': 40,
+    'schedules': 15,
+    'appointments': 60,
+    'random_seed': 42,
+}
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK,
+                    'DEFAULT_THROTTLE_RATES': {}},
+    RESPONSE_CACHE=False,
+    SLOW_QUERY_THRESHOLD_MS=None,
+)
+class SeededTestCase(TestCase):
+    """Тесты на данных manage.py seed (SEED_OPTIONS).
+
+    Лимиты частоты запросов, кеш ответов и журнал медленных запросов
+    отключены. url_kwargs - профиль с отзывом, комментарием,
+    расписанием и записями для вложенных маршрутов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed', stdout=io.StringIO(), **SEED_OPTIONS)
+        cls.client_user = User.objects.filter(
+            is_master=False, client_profile__isnull=False
+        ).order_by('id').first()
+        cls.master_user = User.objects.filter(
+            is_master=True
+        ).order_by('id').first()
+
+        comment = Comment.objects.filter(
+            review__service_profile__schedules__appointments__isnull=False
+        ).select_related('review').order_by('id').first()
+        schedule = Appointment.objects.filter(
+            schedule__service_profile=comment.review.service_profile_id
+        ).order_by('id').first().schedule_id
+        cls.url_kwargs = {'profile_id': comment.review.service_profile_id,
+                          'review_id': comment.review_id,
+                          'schedule_id': schedule}
+
+    def get_client(self, user=None):
+        if user is None:
+            return Client()
+        return Client(headers={'Authorization': get_auth_header(user)})
@@ -0,0 +1,118 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import ClaimsUser, StatelessReadJWTAuthentication
+from api.management.commands.seed import SEED_PASSWORD
+from api.serializers import CustomTokenObtainPairSerializer
+from api.views import CategoryViewSet, ClientProfileViewSet
+
+from .base import SeededTestCase
+
+
+class StatelessReadJWTAuthenticationTests(SeededTestCase):
+
+    def get_request(self, method, user, view_class):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        request = getattr(APIRequestFactory(), method)(
+            '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        return Request(request, parser_context={'view': view_class()})
+
+    def test_token_claims(self):
+        for user, client_profile_id in (
+            (self.client_user, self.client_user.client_profile.pk),
+            (self.master_user, None),
+        ):
+            with self.subTest(user=user):
+                token = CustomTokenObtainPairSerializer.get_token(user)
+
+                for claims in (token, token.access_token):
+                    self.assertEqual(claims['user_id'], user.pk)
+                    self.assertEqual(claims['is_master'], user.is_master)
+                    self.assertEqual(claims['is_staff'], user.is_staff)
+                    self.assertEqual(claims['client_profile_id'],
+                                     client_profile_id)
+
+    def test_safe_read_without_queries(self):
+        request = self.get_request('get', self.client_user, CategoryViewSet)
+
+        with self.assertNumQueries(0):
+            user, _ = StatelessReadJWTAuthentication().authenticate(request)
+            client_profile_id = user.client_profile.pk
+
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, self.client_user.pk)
+        self.assertFalse(user.is_master)
+        self.assertEqual(client_profile_id,
+                         self.client_user.client_profile.pk)
+
+    def test_user_loaded_from_database(self):
+        for method, view_class in (('post', CategoryViewSet),
+                                   ('get', ClientProfileViewSet)):
+            with self.subTest(method=method, view=view_class.__name__):
+                request = self.get_request(method, self.client_user,
+                                           view_class)
+
+                with self.assertNumQueries(1):
+                    user, _ = StatelessReadJWTAuthentication().authenticate(
+                        request
+                    )
+
+                self.assertEqual(user, self.client_user)
+                self.assertNotIsInstance(user, ClaimsUser)
+
+
+@skipUnless(settings.USE_JWT, 'маршруты JWT подключаются при USE_JWT=True')
+class JWTEndpointTests(SeededTestCase):
+
+    def setUp(self):
+        self.http = Client()
+        response = self.http.post(
+            reverse('api:jwt-create'),
+            {'email': self.client_user.email, 'password': SEED_PASSWORD},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.tokens = response.json()
+
+    def refresh(self, refresh):
+        return self.http.post(reverse('api:jwt-refresh'),
+                              {'refresh': refresh},
+                              content_type='application/json')
+
+    def test_safe_read_without_auth_queries(self):
+        url = reverse('api:categories-list')
+        anonymous = self.http.get(url)
+
+        response = self.http.get(
+            url, headers={'Authorization': f'Bearer {self.tokens["access"]}'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.request_metrics.query_count,
+                         anonymous.request_metrics.query_count)
+
+    def test_refresh_rotates_and_blacklists(self):
+        response = self.refresh(self.tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()['refresh']
+        self.assertNotEqual(rotated, self.tokens['refresh'])
+
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code,
+                         401)
+        self.assertEqual(self.refresh(rotated).status_code, 200)
+
+    def test_blacklist(self):
+        response = self.http.post(reverse('api:jwt-blacklist'),
+                                  {'refresh': self.tokens['refresh']},
+                                  content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code,
+                         401)
@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase, override_settings
+
+from api.checks import check_replica_sticky_cache
+
+
+LOCMEM = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+REDIS = {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+         'LOCATION': 'redis://localhost:6379'}
+
+
+class ReplicaStickyCacheCheckTests(SimpleTestCase):
+
+    def get_ids(self):
+        return [error.id for error in check_replica_sticky_cache(None)]
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.get_ids(), [])
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'],
+                       REPLICA_STICKY_CACHE_ALIAS=None)
+    def test_alias_required(self):
+        self.assertEqual(self.get_ids(), ['api.E001'])
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'],
+                       REPLICA_STICKY_CACHE_ALIAS='sticky')
+    def test_unknown_alias(self):
+        self.assertEqual(self.get_ids(), ['api.E002'])
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'],
+                       REPLICA_STICKY_CACHE_ALIAS='default',
+                       CACHES={'default': LOCMEM})
+    def test_local_cache(self):
+        self.assertEqual(self.get_ids(), ['api.E003'])
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'],
+                       REPLICA_STICKY_CACHE_ALIAS='shared',
+                       CACHES={'default': LOCMEM, 'shared': REDIS})
+    def test_shared_cache(self):
+        self.assertEqual(self.get_ids(), [])
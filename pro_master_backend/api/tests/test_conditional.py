@@ -0,0 +1,53 @@
+from django.urls import reverse
+
+from services.models import Favorite, Review, ServiceProfile
+
+from .base import SeededTestCase
+
+
+class ProfileVersionTests(SeededTestCase):
+
+    def get_versions(self):
+        return dict(ServiceProfile.objects.values_list('id', 'version'))
+
+    def test_save_without_refresh_query(self):
+        profile = ServiceProfile.objects.order_by('id').first()
+        version = profile.version
+
+        with self.assertNumQueries(1):
+            profile.description = 'Новое описание'
+            profile.save()
+
+        self.assertEqual(profile.version, version + 1)
+
+    def test_favorite_touches_only_its_profile(self):
+        client_profile = self.client_user.client_profile
+        profile = ServiceProfile.objects.exclude(
+            in_favorite_for_clients__client_profile=client_profile
+        ).order_by('id').first()
+        versions = self.get_versions()
+
+        with self.assertNumQueries(2):
+            Favorite.objects.create(client_profile=client_profile,
+                                    service_profile=profile)
+
+        versions[profile.pk] += 1
+        self.assertEqual(self.get_versions(), versions)
+
+    def test_client_change_updates_review_etag(self):
+        client_profile = Review.objects.filter(
+            service_profile_id=self.url_kwargs['profile_id']
+        ).select_related('author').first().author
+        url = reverse('api:reviews-list',
+                      kwargs={'profile_id': self.url_kwargs['profile_id']})
+        http = self.get_client()
+        etag = http.get(url)['ETag']
+        versions = self.get_versions()
+
+        client_profile.first_name = 'Новое имя'
+        client_profile.save()
+        response = http.get(url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.get_versions(), versions)
@@ -0,0 +1,65 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from api.serializers import (ReviewSerializer,
+                             ScheduleSerializer,
+                             ServiceProfileSerializer)
+
+from .base import SeededTestCase
+
+
+class FastSerializerParityTests(SeededTestCase):
+    """Списки через быстрые сериализаторы совпадают с выводом DRF."""
+
+    def get_cases(self):
+        kwargs = self.url_kwargs
+        expand = ServiceProfileSerializer.get_expandable_paths()
+        return (
+            (reverse('api:service_profiles-list'), (
+                {},
+                {'fields': 'id,name,rating,is_favorited'},
+                {'omit': 'employees,reviews,profile_images'},
+                {'expand': ','.join(expand)},
+                {'fields': 'id,employees', 'expand': ','.join(expand)},
+                {'ordering': '-rating'},
+            )),
+            (reverse('api:reviews-list',
+                     kwargs={'profile_id': kwargs['profile_id']}), (
+                {},
+                {'fields': 'id,score,author'},
+                {'omit': 'comments'},
+                {'expand': ','.join(
+                    ReviewSerializer.get_expandable_paths()
+                )},
+            )),
+            (reverse('api:categories-list'), (
+                {},
+                {'fields': 'id,name'},
+                {'omit': 'child_categories'},
+            )),
+            (reverse('api:schedules-list',
+                     kwargs={'profile_id': kwargs['profile_id']}), (
+                {},
+                {'fields': 'id,date'},
+                {'omit': 'end'},
+                {'expand': ','.join(
+                    ScheduleSerializer.get_expandable_paths()
+                )},
+            )),
+        )
+
+    def test_fast_lists_match_drf(self):
+        for user in (None, self.client_user):
+            http = self.get_client(user)
+            for url, params_list in self.get_cases():
+                for params in params_list:
+                    with self.subTest(url=url, params=params,
+                                      user=getattr(user, 'pk', None)):
+                        with override_settings(FAST_LIST_SERIALIZERS=False):
+                            expected = http.get(url, params)
+                        with override_settings(FAST_LIST_SERIALIZERS=True):
+                            response = http.get(url, params)
+                        self.assertEqual(expected.status_code, 200)
+                        self.assertEqual(response.status_code, 200)
+                        self.assertTrue(response.json())
+                        self.assertEqual(response.json(), expected.json())
@@ -0,0 +1,88 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api.benchmarks.scenarios import get_auth_header
+from api.fast_serializers import fetch
+from api.instrumentation import RequestMetrics, current_metrics
+from services.models import Category
+
+
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE=False)
+class PhaseTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name='Категория')
+
+    def test_list_phases(self):
+        response = self.client.get('/api/categories/')
+
+        phases = response.request_metrics.phases
+        for name in ('auth', 'permissions', 'queryset', 'serializer',
+                     'render', 'total'):
+            self.assertIn(name, phases)
+
+    def test_queryset_phase_of_overridden_get_queryset(self):
+        # CustomUserViewSet переопределяет get_queryset
+        staff = User.objects.create_superuser(email='staff@example.com',
+                                              password=None)
+        response = self.client.get(
+            '/api/users/', headers={'Authorization': get_auth_header(staff)}
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        self.assertIn('queryset', response.request_metrics.phases)
+
+    def test_savepoints_not_counted(self):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            # Внутри транзакции TestCase atomic() создаёт SAVEPOINT
+            with transaction.atomic():
+                Category.objects.count()
+        finally:
+            current_metrics.reset(token)
+
+        self.assertEqual(metrics.query_count, 1)
+
+
+class RequestMetricsTests(SimpleTestCase):
+
+    def test_concurrent_record_query(self):
+        metrics = RequestMetrics()
+
+        def worker():
+            for _ in range(500):
+                metrics.record_query('SELECT 1', 0.001)
+                metrics.add_phase('serializer', 0.001)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(metrics.query_count, 4000)
+        self.assertEqual(metrics.fingerprints['SELECT ?'], 4000)
+        self.assertAlmostEqual(metrics.phases['serializer'], 4)
+
+
+class FetchTests(TestCase):
+
+    def test_connection_is_closed(self):
+        Category.objects.create(name='Категория')
+
+        with mock.patch('api.fast_serializers.connections') as connections:
+            rows = fetch(Category.objects.all())
+
+        self.assertEqual(len(rows), 1)
+        connections.__getitem__.assert_called_once_with('default')
+        connections['default'].close.assert_called_once_with()
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.test import override_settings
+
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.management.commands.seed import SEED_PASSWORD
+from api.serializers import CustomTokenCreateSerializer
+from api.throttling import get_store
+
+from .base import SeededTestCase
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK,
+                    'DEFAULT_THROTTLE_RATES': {'login_identifier': '3/min',
+                                               'login_ip': '10/min'}},
+    THROTTLE_STORE='api.throttling.LocalMemoryStore',
+)
+class CustomTokenCreateSerializerTests(SeededTestCase):
+
+    def setUp(self):
+        # Отдельное хранилище счётчиков для каждого теста
+        get_store.cache_clear()
+
+    def validate(self, email, password):
+        data = {'email': email, 'password': password}
+        request = Request(APIRequestFactory().post('/', data, format='json'),
+                          parsers=[JSONParser()])
+        serializer = CustomTokenCreateSerializer(data=data,
+                                                 context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return serializer.user
+
+    def count_hashes(self):
+        hasher_class = type(get_hasher())
+        return mock.patch.object(hasher_class, 'encode', autospec=True,
+                                 side_effect=hasher_class.encode)
+
+    def test_valid_login(self):
+        with self.count_hashes() as encode, self.assertNumQueries(1):
+            user = self.validate(self.client_user.email, SEED_PASSWORD)
+
+        self.assertEqual(user, self.client_user)
+        self.assertEqual(encode.call_count, 1)
+
+    def test_failure_single_query_and_hash(self):
+        for email in (self.client_user.email, 'unknown@example.com'):
+            with self.subTest(email=email):
+                with self.count_hashes() as encode, self.assertNumQueries(1):
+                    with self.assertRaises(ValidationError):
+                        self.validate(email, 'wrong-password')
+
+                self.assertEqual(encode.call_count, 1)
+
+    def test_repeated_failures_throttled(self):
+        for _ in range(3):
+            with self.assertRaises(ValidationError):
+                self.validate(self.client_user.email, 'wrong-password')
+
+        # Лимит проверяется до запроса пользователя и хеширования пароля
+        with self.count_hashes() as encode, self.assertNumQueries(0):
+            with self.assertRaises(Throttled):
+                self.validate(self.client_user.email.upper(), SEED_PASSWORD)
+        self.assertEqual(encode.call_count, 0)
+
+        self.assertEqual(self.validate(self.master_user.email,
+                                       SEED_PASSWORD),
+                         self.master_user)
+
+    def test_failures_throttled_by_ip(self):
+        for number in range(10):
+            with self.assertRaises(ValidationError):
+                self.validate(f'unknown{number}@example.com',
+                              'wrong-password')
+
+        with self.assertRaises(Throttled):
+            self.validate(self.client_user.email, SEED_PASSWORD)
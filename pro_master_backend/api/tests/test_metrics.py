@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from api.metrics import Registry
+
+
+User = get_user_model()
+
+
+class RegistryFilesTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write_snapshot(self, pid):
+        with open(os.path.join(self.directory, f'{pid}.json'), 'w') as file:
+            json.dump({'counters': [['http_requests_total', [], 1]],
+                       'histograms': []}, file)
+
+    def test_remove_deletes_worker_file(self):
+        registry = Registry()
+        registry.flush()
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        self.assertTrue(os.path.exists(path))
+
+        registry.remove(os.getpid())
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_collect_skips_dead_processes(self):
+        # PID завершившегося процесса
+        dead_pid = subprocess.run(
+            [sys.executable, '-c', 'import os; print(os.getpid())'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        self.write_snapshot(dead_pid)
+        registry = Registry()
+        registry.inc('http_requests_total')
+
+        snapshots = registry.collect()
+
+        self.assertEqual(len(snapshots), 1)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, f'{dead_pid}.json')
+        ))
+
+
+class MetricsViewTests(TestCase):
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_staff_only_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        user = User.objects.create_user(email='user@example.com',
+                                        password=None)
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get(
+            '/metrics', headers={'Authorization': 'Bearer secret'}
+        )
+        self.assertEqual(response.status_code, 200)
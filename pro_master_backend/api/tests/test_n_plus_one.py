@@ -0,0 +1,106 @@
+import io
+import re
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.serializers import BaseSerializer, ManyRelatedField
+
+from api.mixins import SparseFieldsViewMixin
+from api.serializers import ExpandableFieldsMixin
+from api.testing import NPlusOneDetector
+from api.urls import router
+
+from .base import SeededTestCase
+
+
+class NPlusOneTests(SeededTestCase):
+    """GET-маршруты всех вьюсетов API без N+1 для каждой роли
+    с быстрыми сериализаторами списков и с сериализаторами DRF."""
+
+    def get_routes(self):
+        """(basename, параметры адреса, вьюсет) маршрутов роутера."""
+
+        for prefix, viewset, basename in router.registry:
+            kwargs = {name: self.url_kwargs[name]
+                      for name in re.compile(prefix).groupindex}
+            yield basename, kwargs, viewset
+
+    def assert_no_n_plus_one(self, http, url):
+        with NPlusOneDetector() as detector:
+            response = http.get(url)
+        self.assertLess(response.status_code, 500, url)
+        detector.assert_no_n_plus_one(url)
+        return response
+
+    def test_routes(self):
+        roles = (('anonymous', None),
+                 ('client', self.client_user),
+                 ('master', self.master_user))
+        for fast in (True, False):
+            with override_settings(FAST_LIST_SERIALIZERS=fast):
+                for role, user in roles:
+                    with self.subTest(fast=fast, role=role):
+                        self.check_routes(self.get_client(user))
+
+    def check_routes(self, http):
+        for basename, kwargs, viewset in self.get_routes():
+            with self.subTest(route=basename):
+                url = reverse(f'api:{basename}-list', kwargs=kwargs)
+                response = self.assert_no_n_plus_one(http, url)
+                if response.status_code != 200:
+                    continue
+
+                serializer_class = getattr(viewset, 'serializer_class', None)
+                if (serializer_class is not None and issubclass(
+                        serializer_class, ExpandableFieldsMixin)):
+                    expand = serializer_class.get_expandable_paths()
+                    if expand:
+                        self.assert_no_n_plus_one(
+                            http, f'{url}?expand={",".join(expand)}'
+                        )
+
+                data = response.json()
+                if isinstance(data, dict):
+                    data = data.get('results', [])
+                if data and 'id' in data[0]:
+                    self.assert_no_n_plus_one(http, reverse(
+                        f'api:{basename}-detail',
+                        kwargs={**kwargs, 'pk': data[0]['id']}
+                    ))
+
+    def test_nested_fields_prefetched(self):
+        # Пакетные загрузчики вычисляют только скалярные поля, вложенные
+        # связи загружает вьюсет
+        for _, viewset, basename in router.registry:
+            if not issubclass(viewset, SparseFieldsViewMixin):
+                continue
+            with self.subTest(route=basename):
+                serializer_class = viewset.serializer_class
+                nested = {
+                    name for name, field in serializer_class().fields.items()
+                    if isinstance(field, (BaseSerializer, ManyRelatedField))
+                    and not field.write_only
+                }
+                self.assertLessEqual(nested,
+                                     {*viewset.field_select_related,
+                                      *viewset.field_prefetch_related})
+                if issubclass(serializer_class, ExpandableFieldsMixin):
+                    self.assertLessEqual(
+                        set(serializer_class.get_expandable_paths()),
+                        set(viewset.expand_prefetch_related)
+                    )
+
+    def test_anonymous_clients_list(self):
+        response = self.get_client().get(reverse('api:clients-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_command(self):
+        stdout = io.StringIO()
+
+        call_command('detect_n_plus_one', stdout=stdout)
+
+        self.assertIn('N+1 не найдено', stdout.getvalue())
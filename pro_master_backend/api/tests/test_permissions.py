@@ -0,0 +1,78 @@
+from django.urls import reverse
+
+from rest_framework.test import APIRequestFactory
+
+from api.permissions import (IsAdminOrAuthorOrReadOnly,
+                             IsAdminOrClientOrReadOnly)
+from appointments.models import Appointment
+from services.models import Review
+
+from .base import SeededTestCase
+
+
+class ObjectPermissionTests(SeededTestCase):
+
+    def get_request(self, user):
+        request = APIRequestFactory().patch('/')
+        request.user = user
+        # Профиль клиента пользователя загружается один раз за запрос
+        getattr(user, 'client_profile', None)
+        return request
+
+    def test_author_checked_without_loading_related_rows(self):
+        review = Review.objects.order_by('id').first()
+        author = review.author.client
+        other = Review.objects.exclude(
+            author=review.author
+        ).order_by('id').first().author.client
+        review = Review.objects.get(pk=review.pk)
+        permission = IsAdminOrAuthorOrReadOnly()
+
+        for user, allowed in ((author, True), (other, False),
+                              (self.master_user, False)):
+            with self.subTest(user=user):
+                request = self.get_request(user)
+                with self.assertNumQueries(0):
+                    self.assertIs(
+                        permission.has_object_permission(request, None,
+                                                         review),
+                        allowed
+                    )
+
+    def test_client_checked_without_loading_related_rows(self):
+        appointment = Appointment.objects.order_by('id').first()
+        client = appointment.client_profile.client
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        permission = IsAdminOrClientOrReadOnly()
+
+        for user, allowed in ((client, True), (self.master_user, False)):
+            with self.subTest(user=user):
+                request = self.get_request(user)
+                with self.assertNumQueries(0):
+                    self.assertIs(
+                        permission.has_object_permission(request, None,
+                                                         appointment),
+                        allowed
+                    )
+
+    def test_update_review(self):
+        review = Review.objects.select_related(
+            'author__client'
+        ).order_by('id').first()
+        url = reverse('api:reviews-detail',
+                      kwargs={'profile_id': review.service_profile_id,
+                              'pk': review.pk})
+
+        response = self.get_client(self.client_user).patch(
+            url, {'text': 'Изменённый отзыв'},
+            content_type='application/json'
+        )
+        self.assertEqual(
+            response.status_code,
+            200 if review.author.client == self.client_user else 403
+        )
+        response = self.get_client(review.author.client).patch(
+            url, {'text': 'Изменённый отзыв'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
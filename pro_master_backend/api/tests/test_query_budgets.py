@@ -0,0 +1,54 @@
+import re
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+
+from api.testing import assert_query_budget
+from api.urls import router
+
+from .base import SeededTestCase
+
+
+class QueryBudgetTests(SeededTestCase):
+    """Каждый маршрут settings.QUERY_BUDGETS укладывается в свой бюджет
+    с быстрыми сериализаторами списков и с сериализаторами DRF."""
+
+    def get_urls(self, http, basename):
+        """Адрес списка и адрес первого объекта списка (если он есть)."""
+
+        prefix = next(prefix for prefix, _, name in router.registry
+                      if name == basename)
+        kwargs = {name: self.url_kwargs[name]
+                  for name in re.compile(prefix).groupindex}
+        list_url = reverse(f'api:{basename}-list', kwargs=kwargs)
+        data = http.get(list_url).json()
+        if isinstance(data, dict):
+            data = data['results']
+        if not data:
+            return {'list': list_url, 'detail': None}
+        detail_url = reverse(f'api:{basename}-detail',
+                             kwargs={**kwargs, 'pk': data[0]['id']})
+        return {'list': list_url, 'detail': detail_url}
+
+    def test_routes_within_budget(self):
+        roles = (('anonymous', None),
+                 ('client', self.client_user),
+                 ('master', self.master_user))
+        for fast in (True, False):
+            with override_settings(FAST_LIST_SERIALIZERS=fast):
+                for role, user in roles:
+                    with self.subTest(fast=fast, role=role):
+                        self.check_routes(self.get_client(user))
+
+    def check_routes(self, http):
+        for route in settings.QUERY_BUDGETS:
+            basename, action = route.rsplit('-', 1)
+            with self.subTest(route=route):
+                url = self.get_urls(http, basename)[action]
+                if url is None:
+                    continue
+                response = http.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.request_metrics.route, route)
+                assert_query_budget(response)
@@ -0,0 +1,83 @@
+import json
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from api.renderers import CompactJSONRenderer, decode_compact, encode_compact
+
+from .base import SeededTestCase
+
+
+COMPACT = CompactJSONRenderer.media_type
+
+
+class EncodeCompactTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        category = {'id': 1, 'name': 'Стрижки'}
+        rows = [{'id': 1, 'categories': [category], 'owner': None},
+                {'id': 2, 'categories': [category, {'id': 2, 'name': 'Ногти'}],
+                 'owner': {'id': 5}},
+                {'id': 3, 'categories': [], 'owner': {'id': 5}}]
+
+        for data in (rows,
+                     {'count': 3, 'next': None, 'previous': None,
+                      'results': rows}):
+            with self.subTest(page='results' in data):
+                encoded = encode_compact(data)
+
+                self.assertEqual(decode_compact(encoded), data)
+
+        table = encode_compact(rows)
+        self.assertEqual(table['columns'], ['id', 'categories', 'owner'])
+        self.assertEqual(table['rows'][1], [2, [0, 1], 0])
+        self.assertEqual(len(table['dictionaries']['owner']['rows']), 1)
+
+    def test_not_table_unchanged(self):
+        for data in ({'id': 1}, [{'id': 1}, {'name': 'x'}], [1, 2], []):
+            with self.subTest(data=data):
+                self.assertEqual(encode_compact(data), data)
+
+
+class CompactJSONRendererTests(SeededTestCase):
+
+    def setUp(self):
+        self.http = self.get_client()
+        self.url = reverse('api:service_profiles-list')
+
+    def test_page_round_trip(self):
+        for params in ({}, {'fields': 'id,name,categories,services'}):
+            with self.subTest(params=params):
+                expected = self.http.get(self.url, params).json()
+
+                response = self.http.get(self.url, params,
+                                         headers={'Accept': COMPACT})
+                data = json.loads(response.content)
+
+                self.assertEqual(decode_compact(data), expected)
+                self.assertEqual(data['count'], expected['count'])
+                self.assertEqual(data['results']['columns'],
+                                 list(expected['results'][0]))
+                self.assertIn('services', data['results']['dictionaries'])
+
+    def test_negotiation(self):
+        for params, headers, media_type in (
+            ({}, {}, 'application/json'),
+            ({}, {'Accept': COMPACT}, COMPACT),
+            ({'format': 'compact'}, {}, COMPACT),
+            ({}, {'Accept': 'application/json'}, 'application/json'),
+        ):
+            with self.subTest(params=params, headers=headers):
+                response = self.http.get(self.url, params, headers=headers)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], media_type)
+
+    def test_detail_unchanged(self):
+        url = reverse('api:service_profiles-detail',
+                      kwargs={'pk': self.url_kwargs['profile_id']})
+
+        response = self.http.get(url, {'format': 'compact'})
+
+        self.assertEqual(json.loads(response.content),
+                         self.http.get(url).json())
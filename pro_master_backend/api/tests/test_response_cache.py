@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+
+from api.response_cache import response_cache
+from services.models import ServiceProfile
+
+from .base import SeededTestCase
+
+
+@override_settings(RESPONSE_CACHE=True)
+class ServiceProfileCacheTests(SeededTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        response_cache.local.clear()
+        self.profile = ServiceProfile.objects.order_by('id').first()
+        self.url = reverse('api:service_profiles-detail',
+                           kwargs={'pk': self.profile.pk})
+
+    def test_cache_hit_without_queries(self):
+        self.assertEqual(self.get_client().get(self.url)['X-Cache'], 'MISS')
+
+        # Аутентификация по токену DRF - один запрос (JWT - без запросов);
+        # данных профиля и версий для ETag из БД не читается
+        auth_queries = 0 if settings.USE_JWT else 1
+        for user, queries in ((None, 0), (self.master_user, auth_queries)):
+            with self.subTest(user=user):
+                response = self.get_client(user).get(self.url)
+
+                self.assertEqual(response['X-Cache'], 'HIT l1')
+                self.assertEqual(response.request_metrics.query_count,
+                                 queries)
+
+    def test_not_modified_without_queries(self):
+        http = self.get_client()
+        etag = http.get(self.url)['ETag']
+
+        response = http.get(self.url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.request_metrics.query_count, 0)
+
+    def test_etag_changes_with_profile(self):
+        http = self.get_client()
+        etag = http.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.description = 'Новое описание'
+            self.profile.save()
+        response = http.get(self.url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['description'], 'Новое описание')
@@ -0,0 +1,61 @@
+import gzip
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api.schema import accepts_gzip
+
+
+class AcceptsGzipTests(SimpleTestCase):
+
+    def test_accept_encoding(self):
+        cases = (
+            ('', False),
+            ('gzip', True),
+            ('gzip, deflate, br', True),
+            ('GZIP;q=0.5', True),
+            ('gzip;q=0', False),
+            ('gzip; q=0.0, identity', False),
+            ('deflate, *', True),
+            ('*;q=0', False),
+            ('gzip;q=0, *', False),
+            ('br, gzip;q=bad', False),
+        )
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertIs(accepts_gzip(value), expected)
+
+
+class PrecomputedSchemaViewTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(OPENAPI_SCHEMA_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_etag_per_encoding(self):
+        plain = self.client.get('/api/schema/')
+        compressed = self.client.get('/api/schema/',
+                                     headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(plain.status_code, 200)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(plain['ETag'], compressed['ETag'])
+
+        response = self.client.get(
+            '/api/schema/', headers={'Accept-Encoding': 'gzip;q=0',
+                                     'If-None-Match': compressed['ETag']}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['ETag'], plain['ETag'])
+
+        response = self.client.get(
+            '/api/schema/', headers={'Accept-Encoding': 'gzip',
+                                     'If-None-Match': compressed['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,31 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+from api.slow_queries import SlowQueryRecorder
+
+
+class ExplainTests(SimpleTestCase):
+
+    databases = {'default'}
+
+    def get_executed_sql(self, vendor):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchall.return_value = [('plan',)]
+        with mock.patch.object(connection, 'vendor', vendor), \
+                mock.patch.object(connection, 'cursor',
+                                  return_value=cursor):
+            SlowQueryRecorder().explain('default', 'SELECT 1', ())
+        return cursor.__enter__.return_value.execute.call_args[0][0]
+
+    def test_plain_explain_by_default(self):
+        self.assertEqual(self.get_executed_sql('postgresql'),
+                         'EXPLAIN SELECT 1')
+
+    @override_settings(SLOW_QUERY_EXPLAIN_ANALYZE=True)
+    def test_analyze_is_opt_in(self):
+        self.assertEqual(self.get_executed_sql('postgresql'),
+                         'EXPLAIN (ANALYZE, BUFFERS) SELECT 1')
+        self.assertEqual(self.get_executed_sql('sqlite'),
+                         'EXPLAIN QUERY PLAN SELECT 1')
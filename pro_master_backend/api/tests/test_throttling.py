@@ -0,0 +1,235 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import (CacheStore,
+                            EndpointActionThrottle,
+                            GCRAThrottle,
+                            IPActionThrottle,
+                            LocalMemoryStore,
+                            LockTimeout,
+                            SlidingWindowCounter,
+                            UserActionThrottle,
+                            get_store)
+
+
+LOCMEM = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'throttling-tests'},
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class CacheStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_concurrent_updates_are_not_lost(self):
+        store = CacheStore()
+
+        def step(value):
+            value = (value or 0) + 1
+            # Окно между чтением и записью, в котором без блокировки
+            # соседний поток прочитал бы то же значение
+            time.sleep(0.001)
+            return value, None
+
+        def worker():
+            for _ in range(10):
+                store.update('counter', step, 60)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(store.get('counter'), 80)
+        self.assertIsNone(store.cache.get('counter_lock'))
+
+    def test_update_returns_result_and_keeps_value(self):
+        store = CacheStore()
+        store.set('key', 5, 60)
+
+        self.assertEqual(store.update('key', lambda value: (None, value), 60),
+                         5)
+        self.assertEqual(store.get('key'), 5)
+
+    def test_stale_lock_expires(self):
+        store = CacheStore()
+        store.lock_timeout = 0.5
+        store.cache.set('key_lock', 'other', 0.05)
+
+        store.update('key', lambda value: (1, None), 60)
+
+        self.assertEqual(store.get('key'), 1)
+
+    def test_lock_timeout_raises(self):
+        store = CacheStore()
+        store.lock_timeout = 0.05
+        store.cache.set('key_lock', 'other', 60)
+
+        with self.assertRaises(LockTimeout):
+            store.update('key', lambda value: (1, None), 60)
+
+        self.assertIsNone(store.get('key'))
+
+    def test_incr(self):
+        store = CacheStore()
+
+        self.assertEqual(store.incr('counter', 1, 60), 1)
+        self.assertEqual(store.incr('counter', 2, 60), 3)
+        self.assertEqual(store.incr('counter', -1, 60), 2)
+
+
+class GetStoreTests(SimpleTestCase):
+
+    def test_override_settings_replaces_store(self):
+        with override_settings(
+            THROTTLE_STORE='api.throttling.LocalMemoryStore'
+        ):
+            self.assertIsInstance(get_store(), LocalMemoryStore)
+            self.assertIs(get_store(), get_store())
+        self.assertIsInstance(get_store(), CacheStore)
+
+
+def search_rates(**rates):
+    return override_settings(
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK,
+                        'DEFAULT_THROTTLE_RATES': rates},
+        THROTTLE_STORE='api.throttling.LocalMemoryStore',
+    )
+
+
+@search_rates(search_user='2/min', search_ip='3/min',
+              search_endpoint='4/min')
+class ActionThrottleTests(SimpleTestCase):
+
+    view = SimpleNamespace(action='list', throttle_scopes={'list': 'search'})
+
+    def setUp(self):
+        get_store.cache_clear()
+        self.now = 1200.0
+        for throttle_class in (GCRAThrottle, SlidingWindowCounter):
+            patcher = mock.patch.object(throttle_class, 'timer',
+                                        side_effect=lambda: self.now)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_request(self, user=None, ip='10.0.0.1'):
+        request = APIRequestFactory().get('/', REMOTE_ADDR=ip)
+        request.user = user or AnonymousUser()
+        return request
+
+    def get_user(self, pk):
+        return SimpleNamespace(pk=pk, is_authenticated=True)
+
+    def allow(self, throttle_class, request, view=None):
+        throttle = throttle_class()
+        return (throttle.allow_request(request, view or self.view),
+                throttle.wait())
+
+    def test_user_scope(self):
+        request = self.get_request(self.get_user(1))
+
+        self.assertEqual(self.allow(UserActionThrottle, request),
+                         (True, None))
+        self.assertEqual(self.allow(UserActionThrottle, request),
+                         (True, None))
+        self.assertEqual(self.allow(UserActionThrottle, request),
+                         (False, 30))
+        # Лимит на пользователя, а не на IP; аноним - по IP
+        self.assertTrue(self.allow(
+            UserActionThrottle, self.get_request(self.get_user(2))
+        )[0])
+        self.assertTrue(self.allow(UserActionThrottle,
+                                   self.get_request())[0])
+
+    def test_allowed_after_wait(self):
+        request = self.get_request(self.get_user(1))
+        for _ in range(2):
+            self.allow(UserActionThrottle, request)
+        allowed, wait = self.allow(UserActionThrottle, request)
+        self.assertFalse(allowed)
+
+        self.now += wait - 1
+        self.assertFalse(self.allow(UserActionThrottle, request)[0])
+        self.now += 1
+        self.assertTrue(self.allow(UserActionThrottle, request)[0])
+
+    def test_ip_scope(self):
+        for pk in range(3):
+            self.assertTrue(self.allow(
+                IPActionThrottle, self.get_request(self.get_user(pk))
+            )[0])
+
+        self.assertEqual(
+            self.allow(IPActionThrottle, self.get_request(self.get_user(3))),
+            (False, 20)
+        )
+        self.assertTrue(self.allow(IPActionThrottle,
+                                   self.get_request(ip='10.0.0.2'))[0])
+
+    def test_endpoint_scope(self):
+        for number in range(4):
+            self.assertTrue(self.allow(
+                EndpointActionThrottle,
+                self.get_request(ip=f'10.0.1.{number}')
+            )[0])
+        self.assertEqual(self.allow(EndpointActionThrottle,
+                                    self.get_request(ip='10.0.2.1')),
+                         (False, 60))
+
+        # Отклонённый запрос не учитывается: через полминуты следующего
+        # окна вес предыдущего - 0.5 (4 * 0.5), свободно ещё два места
+        self.now += 90
+        for _ in range(2):
+            self.assertTrue(self.allow(EndpointActionThrottle,
+                                       self.get_request())[0])
+        self.assertFalse(self.allow(EndpointActionThrottle,
+                                    self.get_request())[0])
+
+    def test_action_without_scope(self):
+        view = SimpleNamespace(action='retrieve',
+                               throttle_scopes={'list': 'search'})
+        request = self.get_request(self.get_user(1))
+
+        for _ in range(5):
+            self.assertEqual(self.allow(UserActionThrottle, request, view),
+                             (True, None))
+
+    @override_settings(THROTTLE_STORE='api.throttling.CacheStore',
+                       CACHES=LOCMEM)
+    def test_lock_timeout_rejects_request(self):
+        caches['default'].set('gcra_search_user_1_lock', 'other', 60)
+
+        with mock.patch.object(CacheStore, 'lock_timeout', 0.05):
+            self.assertEqual(
+                self.allow(UserActionThrottle,
+                           self.get_request(self.get_user(1))),
+                (False, 30)
+            )
+
+
+@search_rates(search_user='1/min')
+class ThrottledResponseTests(TestCase):
+
+    def test_retry_after(self):
+        url = reverse('api:service_profiles-list')
+        get_store.cache_clear()
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, 61))
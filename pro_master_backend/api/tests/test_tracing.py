@@ -0,0 +1,77 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api.tracing import InMemoryExporter, parse_traceparent, span, start_trace
+
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+class ParseTraceparentTests(SimpleTestCase):
+
+    def test_valid(self):
+        self.assertEqual(
+            parse_traceparent(f'00-{TRACE_ID}-{PARENT_ID}-01'),
+            (TRACE_ID, PARENT_ID)
+        )
+        # Поля будущих версий игнорируются
+        self.assertEqual(
+            parse_traceparent(f'01-{TRACE_ID}-{PARENT_ID}-01-extra'),
+            (TRACE_ID, PARENT_ID)
+        )
+
+    def test_invalid(self):
+        for value in (None,
+                      '',
+                      f'ff-{TRACE_ID}-{PARENT_ID}-01',
+                      f'00-{"0" * 32}-{PARENT_ID}-01',
+                      f'00-{TRACE_ID}-{"0" * 16}-01',
+                      f'00-{TRACE_ID.upper()}-{PARENT_ID}-01',
+                      f'00-{TRACE_ID}-{PARENT_ID}-1',
+                      f'00-{TRACE_ID}-{PARENT_ID}-zz',
+                      f'0-{TRACE_ID}-{PARENT_ID}-01',
+                      f'00-{TRACE_ID}-{PARENT_ID}-01-extra',
+                      f'00-{TRACE_ID[:-1]}g-{PARENT_ID}-01'):
+            with self.subTest(value=value):
+                self.assertEqual(parse_traceparent(value), (None, None))
+
+
+@override_settings(TRACING_EXPORTER='api.tracing.InMemoryExporter',
+                   TRACING_SAMPLE_RATE=1)
+class InMemoryExporterTests(TestCase):
+
+    def setUp(self):
+        InMemoryExporter.clear()
+        self.addCleanup(InMemoryExporter.clear)
+
+    def test_exports_finished_trace(self):
+        with start_trace('root', f'00-{TRACE_ID}-{PARENT_ID}-01') as root:
+            with span('child', key='value'):
+                pass
+
+        self.assertEqual(len(InMemoryExporter.traces), 1)
+        spans = {item['name']: item for item in InMemoryExporter.traces[0]}
+        self.assertEqual(spans['root']['trace_id'], TRACE_ID)
+        self.assertEqual(spans['root']['parent_id'], PARENT_ID)
+        self.assertEqual(spans['child']['parent_id'], root.span_id)
+        self.assertEqual(spans['child']['attributes'], {'key': 'value'})
+
+    def test_invalid_traceparent_starts_new_trace(self):
+        with start_trace('root', f'00-{"0" * 32}-{PARENT_ID}-01'):
+            pass
+
+        root, = InMemoryExporter.traces[0]
+        self.assertNotEqual(root['trace_id'], '0' * 32)
+        self.assertIsNone(root['parent_id'])
+
+    @override_settings(RESPONSE_CACHE=False)
+    def test_request_trace(self):
+        response = self.client.get(
+            '/api/categories/',
+            headers={'traceparent': f'00-{TRACE_ID}-{PARENT_ID}-01'}
+        )
+
+        self.assertEqual(response['X-Trace-Id'], TRACE_ID)
+        names = [item['name'] for item in InMemoryExporter.traces[0]]
+        self.assertIn('http.request', names)
+        self.assertIn('db.query', names)
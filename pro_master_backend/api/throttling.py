@@ -0,0 +1,381 @@
+import hashlib
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+from .tracing import span
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Разбор лимита вида 'количество/период' (например, '5/min')."""
+
+    if rate is None:
+        return None, None
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class LockTimeout(Exception):
+    """Блокировка ключа хранилища не получена за отведённое время."""
+
+
+class BaseStore:
+    """Хранилище состояния ограничителей частоты запросов."""
+
+    def get(self, key):
+        raise NotImplementedError('.get() must be overridden')
+
+    def set(self, key, value, timeout):
+        raise NotImplementedError('.set() must be overridden')
+
+    def get_many(self, keys):
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def incr(self, key, delta, timeout):
+        """Атомарно увеличивает значение ключа на delta и возвращает его.
+
+        Отсутствующий ключ создаётся со значением delta и временем
+        жизни timeout.
+        """
+
+        def step(value):
+            value = (value or 0) + delta
+            return value, value
+
+        return self.update(key, step, timeout)
+
+    def update(self, key, func, timeout):
+        """Применяет func к текущему значению ключа.
+
+        func возвращает пару (новое значение, результат); новое значение
+        None означает, что состояние не меняется.
+        """
+        value, result = func(self.get(key))
+        if value is not None:
+            self.set(key, value, timeout)
+        return result
+
+
+class LocalMemoryStore(BaseStore):
+    """Хранилище в памяти процесса (для тестов и одиночного воркера)."""
+
+    timer = time.time
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value, expires = self._data.get(key, (None, 0))
+        if expires <= self.timer():
+            return None
+        return value
+
+    def set(self, key, value, timeout):
+        self._data[key] = (value, self.timer() + timeout)
+
+    def update(self, key, func, timeout):
+        with self._lock:
+            return super().update(key, func, timeout)
+
+
+class CacheStore(BaseStore):
+    """Хранилище в общем кеше Django, разделяемое между воркерами.
+
+    update() выполняется под блокировкой ключа в том же кеше
+    (cache.add атомарен в общих бэкендах): иначе два воркера читают
+    одно значение и оба пропускают запрос сверх лимита. Блокировка
+    истекает через lock_timeout, если её владелец завершился; если её
+    не удалось получить за lock_timeout, update() возбуждает LockTimeout.
+    """
+
+    lock_timeout = 2
+    lock_delay = 0.002
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        with span('cache.get', **{'cache.alias': 'throttle'}):
+            value = self.cache.get(key)
+        registry.inc('cache_requests_total',
+                     {'cache': 'throttle',
+                      'result': 'miss' if value is None else 'hit'})
+        return value
+
+    def set(self, key, value, timeout):
+        with span('cache.set', **{'cache.alias': 'throttle'}):
+            self.cache.set(key, value, timeout)
+
+    def get_many(self, keys):
+        with span('cache.get_many', **{'cache.alias': 'throttle'}):
+            values = self.cache.get_many(keys)
+        for key in keys:
+            registry.inc('cache_requests_total',
+                         {'cache': 'throttle',
+                          'result': 'hit' if key in values else 'miss'})
+        return values
+
+    def incr(self, key, delta, timeout):
+        # cache.incr атомарен в общих бэкендах и не требует блокировки;
+        # cache.add создаёт ключ со временем жизни, если его ещё нет
+        with span('cache.incr', **{'cache.alias': 'throttle'}):
+            try:
+                return self.cache.incr(key, delta)
+            except ValueError:
+                if self.cache.add(key, delta, timeout):
+                    return delta
+                return self.cache.incr(key, delta)
+
+    def acquire(self, lock_key, token):
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(lock_key, token, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.lock_delay)
+        return True
+
+    def update(self, key, func, timeout):
+        lock_key = f'{key}_lock'
+        token = uuid.uuid4().hex
+        with span('cache.lock', **{'cache.alias': 'throttle'}):
+            locked = self.acquire(lock_key, token)
+        if not locked:
+            # Блокировка не освободилась за lock_timeout (например, кеш
+            # не удаляет истёкшие ключи): изменение без неё - та самая
+            # гонка, поэтому запрос не ждёт дольше и не выполняется
+            registry.inc('cache_requests_total',
+                         {'cache': 'throttle', 'result': 'lock_timeout'})
+            raise LockTimeout(key)
+        try:
+            return super().update(key, func, timeout)
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    return import_string(settings.THROTTLE_STORE)()
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    """Новое хранилище после override_settings(THROTTLE_STORE=...)."""
+
+    if setting == 'THROTTLE_STORE':
+        get_store.cache_clear()
+
+
+class SlidingWindowCounter:
+    """Счётчик скользящего окна в хранилище ограничителей (get_store()).
+
+    Хранит по одному счётчику на текущее и предыдущее фиксированные окна;
+    вес предыдущего окна убывает линейно по мере сдвига текущего.
+    Счётчики увеличиваются атомарно (BaseStore.incr), без блокировки.
+    """
+
+    timer = time.time
+    cache_format = 'sliding_%(scope)s_%(ident)s_%(window)s'
+
+    def __init__(self, scope, rate=None):
+        self.scope = scope
+        if rate is None:
+            rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        self.num_requests, self.duration = parse_rate(rate)
+
+    @property
+    def enabled(self):
+        return self.num_requests is not None
+
+    def get_cache_key(self, ident, window):
+        return self.cache_format % {'scope': self.scope,
+                                    'ident': ident,
+                                    'window': window}
+
+    def get_windows(self, ident):
+        """Ключи текущего и предыдущего окон и вес предыдущего окна."""
+
+        window, offset = divmod(self.timer(), self.duration)
+        return (self.get_cache_key(ident, int(window)),
+                self.get_cache_key(ident, int(window) - 1),
+                1 - offset / self.duration)
+
+    def count(self, ident):
+        current_key, previous_key, weight = self.get_windows(ident)
+        values = get_store().get_many([current_key, previous_key])
+        return (values.get(current_key, 0)
+                + values.get(previous_key, 0) * weight)
+
+    def is_exceeded(self, ident):
+        return self.enabled and self.count(ident) >= self.num_requests
+
+    def hit(self, ident):
+        if not self.enabled:
+            return
+        current_key, _, _ = self.get_windows(ident)
+        get_store().incr(current_key, 1, 2 * self.duration)
+
+    def acquire(self, ident):
+        """Учёт события, если лимит не превышен.
+
+        Счётчик увеличивается до проверки и уменьшается при отказе:
+        одновременные события не проходят сверх лимита и без блокировки.
+        """
+
+        if not self.enabled:
+            return True
+        current_key, previous_key, weight = self.get_windows(ident)
+        store = get_store()
+        current = store.incr(current_key, 1, 2 * self.duration)
+        previous = store.get(previous_key) or 0
+        if current + previous * weight <= self.num_requests:
+            return True
+        store.incr(current_key, -1, 2 * self.duration)
+        return False
+
+    def wait(self):
+        return self.duration
+
+
+class LoginThrottle:
+    """Ограничение неудачных попыток входа по идентификатору и по IP.
+
+    Проверка выполняется до обращения к БД и вычисления хеша пароля.
+    Счётчики хранятся в том же хранилище, что и состояние GCRAThrottle
+    (THROTTLE_STORE).
+    """
+
+    def __init__(self, request, identifier):
+        normalized = str(identifier or '').strip().lower()
+        self.checks = (
+            (SlidingWindowCounter('login_identifier'),
+             hashlib.sha256(normalized.encode()).hexdigest()),
+            (SlidingWindowCounter('login_ip'),
+             BaseThrottle().get_ident(request)),
+        )
+
+    def check(self):
+        for counter, ident in self.checks:
+            if counter.is_exceeded(ident):
+                raise Throttled(wait=counter.wait())
+
+    def failure(self):
+        for counter, ident in self.checks:
+            counter.hit(ident)
+
+
+class GCRAThrottle(BaseThrottle):
+    """Ограничитель частоты запросов по алгоритму GCRA.
+
+    Лимиты задаются для действий вьюсета атрибутом `throttle_scopes`
+    ({action: scope}) и ключами `<scope>_<kind>` в DEFAULT_THROTTLE_RATES.
+    Проверка выполняется до обращения к queryset вьюсета. Если состояние
+    ключа не удалось изменить (LockTimeout), запрос отклоняется.
+    """
+
+    kind = None
+    timer = time.time
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_client_key(self, request):
+        raise NotImplementedError('.get_client_key() must be overridden')
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scopes', {}).get(
+            getattr(view, 'action', None)
+        )
+        if scope is None:
+            return True
+        scope = f'{scope}_{self.kind}'
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+
+        self.wait_time = self.throttle(scope, rate,
+                                       self.get_client_key(request))
+        return self.wait_time is None
+
+    def throttle(self, scope, rate, ident):
+        """Учёт запроса: None, если он пропущен, иначе ожидание в секундах."""
+
+        num_requests, duration = parse_rate(rate)
+        interval = duration / num_requests
+        now = self.timer()
+
+        def step(tat):
+            tat = max(tat or now, now) + interval
+            if tat - now > duration:
+                return None, tat - now - duration
+            return tat, None
+
+        try:
+            return get_store().update(f'gcra_{scope}_{ident}', step,
+                                      duration)
+        except LockTimeout:
+            return interval
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserActionThrottle(GCRAThrottle):
+    """Лимит на пользователя (для анонимов - на IP)."""
+
+    kind = 'user'
+
+    def get_client_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+
+class IPActionThrottle(GCRAThrottle):
+    """Лимит на IP-адрес клиента."""
+
+    kind = 'ip'
+
+    def get_client_key(self, request):
+        return self.get_ident(request)
+
+
+class EndpointActionThrottle(GCRAThrottle):
+    """Общий лимит на действие вьюсета для всех клиентов.
+
+    Ключ один для всех воркеров: вместо GCRA под блокировкой ключа
+    используется скользящее окно на атомарном счётчике хранилища
+    (SlidingWindowCounter.acquire).
+    """
+
+    kind = 'endpoint'
+
+    def get_client_key(self, request):
+        return 'all'
+
+    def throttle(self, scope, rate, ident):
+        counter = SlidingWindowCounter(scope, rate)
+        if counter.acquire(ident):
+            return None
+        return counter.wait()
@@ -0,0 +1,284 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+current_span = ContextVar('current_span', default=None)
+
+# version-trace_id-parent_id-flags; версии после 00 могут добавлять поля
+TRACEPARENT_RE = re.compile(
+    r'(?P<version>[0-9a-f]{2})-(?P<trace_id>[0-9a-f]{32})-'
+    r'(?P<parent_id>[0-9a-f]{16})-(?P<flags>[0-9a-f]{2})(?P<rest>-.*)?'
+)
+
+
+def new_id(size):
+    return '%0*x' % (size * 2, random.getrandbits(size * 8))
+
+
+class Span:
+    """Отрезок трассы: имя, атрибуты, время начала и окончания в нс."""
+
+    def __init__(self, name, trace, parent_id=None, attributes=None):
+        self.name = name
+        self.trace = trace
+        self.span_id = new_id(8)
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+        self.kind = 'internal'
+
+    @property
+    def trace_id(self):
+        return self.trace.trace_id
+
+    def set_attribute(self, name, value):
+        self.attributes[name] = value
+
+    def finish(self):
+        self.end = time.time_ns()
+        self.trace.finish_span(self)
+
+    @property
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def as_dict(self):
+        return {'trace_id': self.trace_id,
+                'span_id': self.span_id,
+                'parent_id': self.parent_id,
+                'name': self.name,
+                'start': self.start,
+                'end': self.end,
+                'duration_ms': round((self.end - self.start) / 1e6, 3),
+                'attributes': self.attributes,
+                'error': self.error}
+
+
+class Trace:
+    """Трасса запроса.
+
+    Завершённые отрезки передаются экспортёру, когда закрыты все
+    открытые, включая отрезки фоновых задач.
+    """
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or new_id(16)
+        self.spans = []
+        self.open_spans = 0
+        self.lock = threading.Lock()
+
+    def start_span(self, name, parent_id=None, attributes=None):
+        with self.lock:
+            self.open_spans += 1
+        return Span(name, self, parent_id, attributes)
+
+    def finish_span(self, span):
+        with self.lock:
+            self.spans.append(span)
+            self.open_spans -= 1
+            finished = self.open_spans == 0
+        if finished:
+            exporter = get_exporter()
+            if exporter is not None:
+                try:
+                    exporter.export(self.spans)
+                except Exception:
+                    logger.exception('Не удалось экспортировать трассу')
+
+
+def parse_traceparent(value):
+    """trace_id и span_id родителя из заголовка W3C traceparent.
+
+    Недопустимый заголовок (версия ff, нулевые идентификаторы,
+    лишние поля в версии 00) даёт (None, None): начинается новая трасса.
+    """
+
+    match = TRACEPARENT_RE.fullmatch((value or '').strip())
+    if (match is None
+            or match['version'] == 'ff'
+            or (match['version'] == '00' and match['rest'])
+            or not match['trace_id'].strip('0')
+            or not match['parent_id'].strip('0')):
+        return None, None
+    return match['trace_id'], match['parent_id']
+
+
+def is_enabled():
+    return bool(getattr(settings, 'TRACING_EXPORTER', None))
+
+
+@contextmanager
+def span(name, **attributes):
+    """Отрезок внутри текущей трассы; вне трассы ничего не делает."""
+
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.trace.start_span(name, parent.span_id, attributes)
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as error:
+        child.error = repr(error)
+        raise
+    finally:
+        current_span.reset(token)
+        child.finish()
+
+
+@contextmanager
+def start_trace(name, traceparent=None, **attributes):
+    """Корневой отрезок новой трассы с учётом TRACING_SAMPLE_RATE."""
+
+    if (not is_enabled()
+            or random.random() >= settings.TRACING_SAMPLE_RATE):
+        yield None
+        return
+    trace_id, parent_id = parse_traceparent(traceparent)
+    root = Trace(trace_id).start_span(name, parent_id, attributes)
+    root.kind = 'server'
+    token = current_span.set(root)
+    try:
+        yield root
+    except BaseException as error:
+        root.error = repr(error)
+        raise
+    finally:
+        current_span.reset(token)
+        root.finish()
+
+
+def capture_context():
+    """Контекст для передачи в фоновую задачу (см. continue_trace).
+
+    Открывает отрезок-заглушку, чтобы трасса не экспортировалась
+    до завершения задачи.
+    """
+
+    parent = current_span.get()
+    if parent is None:
+        return None
+    return parent.trace.start_span('background.queued', parent.span_id)
+
+
+@contextmanager
+def continue_trace(context, name, **attributes):
+    """Отрезок фоновой задачи в трассе запроса, поставившего её в очередь."""
+
+    if context is None:
+        yield None
+        return
+    token = current_span.set(context)
+    try:
+        with span(name, **attributes) as child:
+            yield child
+    finally:
+        current_span.reset(token)
+        context.finish()
+
+
+class InMemoryExporter:
+    """Экспортёр в память процесса (для тестов и отладки)."""
+
+    traces = []
+
+    def export(self, spans):
+        self.traces.append([span.as_dict() for span in spans])
+
+    @classmethod
+    def clear(cls):
+        cls.traces.clear()
+
+
+class LogExporter:
+    """Экспортёр в лог `api.tracing`: одна JSON-строка на трассу."""
+
+    def export(self, spans):
+        logger.info(json.dumps([span.as_dict() for span in spans],
+                               ensure_ascii=False, default=str))
+
+
+class OTLPFileExporter:
+    """Экспортёр в файл TRACING_FILE в формате OTLP/JSON.
+
+    Каждая строка - ExportTraceServiceRequest, совместимый с
+    OpenTelemetry Collector (receiver otlpjsonfile).
+    """
+
+    lock = threading.Lock()
+    kinds = {'internal': 1, 'server': 2}
+
+    def __init__(self):
+        self.path = settings.TRACING_FILE
+
+    @staticmethod
+    def attribute(name, value):
+        if isinstance(value, bool):
+            converted = {'boolValue': value}
+        elif isinstance(value, int):
+            converted = {'intValue': str(value)}
+        elif isinstance(value, float):
+            converted = {'doubleValue': value}
+        else:
+            converted = {'stringValue': str(value)}
+        return {'key': name, 'value': converted}
+
+    def convert(self, span):
+        result = {'traceId': span.trace_id,
+                  'spanId': span.span_id,
+                  'name': span.name,
+                  'kind': self.kinds[span.kind],
+                  'startTimeUnixNano': str(span.start),
+                  'endTimeUnixNano': str(span.end),
+                  'attributes': [self.attribute(name, value)
+                                 for name, value in span.attributes.items()],
+                  'status': ({'code': 2, 'message': span.error}
+                             if span.error else {'code': 0})}
+        if span.parent_id is not None:
+            result['parentSpanId'] = span.parent_id
+        return result
+
+    def export(self, spans):
+        request = {'resourceSpans': [{
+            'resource': {'attributes': [
+                self.attribute('service.name', 'pro_master_backend'),
+                self.attribute('process.pid', os.getpid()),
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': 'api.tracing'},
+                'spans': [self.convert(span) for span in spans],
+            }],
+        }]}
+        line = json.dumps(request, ensure_ascii=False)
+        with self.lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+
+
+@lru_cache(maxsize=None)
+def get_exporter():
+    path = getattr(settings, 'TRACING_EXPORTER', None)
+    return import_string(path)() if path else None
+
+
+@receiver(setting_changed)
+def reset_exporter(setting, **kwargs):
+    if setting in ('TRACING_EXPORTER', 'TRACING_FILE'):
+        get_exporter.cache_clear()
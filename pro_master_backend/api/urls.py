@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 
 from rest_framework import routers
 
+from rest_framework_simplejwt.views import TokenBlacklistView
+
+from .async_views import async_read_patterns
 from .views import (AppointmentViewSet,
                     CategoryViewSet,
                     CommentViewSet,
@@ -18,10 +22,14 @@ app_name = 'api'
 router = routers.DefaultRouter()
 
 
-router.register('categories', CategoryViewSet)
+router.register('categories', CategoryViewSet, basename='categories')
 router.register('clients', ClientProfileViewSet, basename='clients')
-router.register('services', ServiceViewSet)
-router.register('service_profiles', ServiceProfileViewSet)
+router.register('services', ServiceViewSet, basename='services')
+router.register(
+    'service_profiles',
+    ServiceProfileViewSet,
+    basename='service_profiles'
+)
 router.register('users', CustomUserViewSet, basename='users')
 router.register(
     r'services/(?P<profile_id>\d+)/images',
@@ -49,8 +57,25 @@ router.register(
     basename='appointments'
 )
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_read_patterns(router_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     # path('auth/', include('djoser.urls')),
-    path('auth/', include('djoser.urls.authtoken')),
-]
\ No newline at end of file
+]
+
+if settings.USE_JWT:
+    urlpatterns += [
+        path('auth/', include('djoser.urls.jwt')),
+        path(
+            'auth/jwt/blacklist/',
+            TokenBlacklistView.as_view(),
+            name='jwt-blacklist'
+        ),
+    ]
+else:
+    urlpatterns += [
+        path('auth/', include('djoser.urls.authtoken')),
+    ]
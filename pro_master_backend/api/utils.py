@@ -10,11 +10,11 @@ def create_relation(request, model, model_relation, pk, serializer, field):
 
     model_obj = get_object_or_404(model, pk=pk)
     model_relation_obj = model_relation.objects.filter(
-        client=request.user.client_profile, **{field: model_obj}
+        client_profile=request.user.client_profile, **{field: model_obj}
     )
 
     if not model_relation_obj.exists():
-        model_relation.objects.create(client=request.user.client_profile,
+        model_relation.objects.create(client_profile=request.user.client_profile,
                                       **{field: model_obj})
         serializer = serializer(model_obj, context={'request': request})
         return Response(serializer.data,
@@ -30,7 +30,7 @@ def delete_relation(request, model, model_relation, pk, field):
 
     model_obj = get_object_or_404(model, pk=pk)
     model_relation_obj = model_relation.objects.filter(
-        client=request.user.client_profile, **{field: model_obj}
+        client_profile=request.user.client_profile, **{field: model_obj}
     )
 
     if model_relation_obj.exists():
@@ -61,3 +61,42 @@ def get_validated_field(values, model):
         )
 
     return values
+
+
+def get_names_param(request, param, available):
+    """Множество имён из параметра запроса через запятую.
+
+    Имя не из available - ошибка валидации.
+    """
+
+    names = {name.strip() for name in request.GET.get(param, '').split(',')
+             if name.strip()}
+    unknown = names - set(available)
+    if unknown:
+        raise ValidationError(
+            {param: 'Неизвестные поля: ' + ', '.join(sorted(unknown))}
+        )
+    return names
+
+
+def get_requested_fields(request, available):
+    """Поля ответа по параметрам ?fields= и ?omit= или None (все поля).
+
+    Поле id возвращается всегда, неизвестное поле - ошибка валидации.
+    """
+
+    params = {param: get_names_param(request, param, available)
+              for param in ('fields', 'omit')}
+    if not (params['fields'] or params['omit']):
+        return None
+
+    fields = (params['fields'] or set(available)) - params['omit']
+    if 'id' in available:
+        fields.add('id')
+    return fields
+
+
+def get_requested_expand(request, available):
+    """Раскрываемые связи по параметру ?expand= (пути через точку)."""
+
+    return get_names_param(request, 'expand', available)
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Prefetch
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 
 from djoser.conf import settings
@@ -11,25 +13,49 @@ from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import mixins, pagination, permissions, viewsets
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from appointments.models import (Appointment,
-                                 Schedule)
+from appointments.models import Appointment
 
 from clients.models import ClientProfile
 
 from services.models import (Category,
+                             Comment,
                              Favorite,
                              Image,
                              # Location,
                              Service,
-                             ServiceProfile,
-                             Review)
+                             ServiceProfile)
+
+from .conditional import (categories_validators,
+                          review_validators,
+                          service_profile_validators)
 
 from .filters import (CategoryFilterSet,
                       ServiceFilterSet,
                       ServiceProfileFilterSet)
 
+from .instrumentation import InstrumentedViewMixin
+
+from .metrics import registry
+
+from .response_cache import (CATALOGUE,
+                             SERVICE_PROFILES,
+                             profile_version_name)
+
+from .fast_serializers import (CategoryFastSerializer,
+                               ReviewFastSerializer,
+                               ScheduleFastSerializer,
+                               ServiceProfileFastSerializer)
+
+from .mixins import (CachedResponseMixin,
+                     ConditionalGetMixin,
+                     FastListMixin,
+                     ReplicaReadMixin,
+                     ServiceProfileNestedMixin,
+                     SparseFieldsViewMixin)
+
 from .permissions import (IsAdminOrMasterOrReadOnly,
                           IsAdminOrAuthorOrReadOnly,
                           IsAdminOrClientOrReadOnly)
@@ -52,6 +78,16 @@ from .utils import create_relation, delete_relation
 User = get_user_model()
 
 
+def category_parents(depth):
+    """select_related цепочки родительских категорий глубины depth."""
+
+    return '__'.join(['parent_category'] * depth)
+
+WRITE_THROTTLE_SCOPES = dict.fromkeys(
+    ('create', 'update', 'partial_update', 'destroy'), 'write'
+)
+
+
 @extend_schema(tags=['Пользователи'])
 @extend_schema_view(
     list=extend_schema(summary='Получение списка пользователей'),
@@ -61,7 +97,8 @@ User = get_user_model()
     partial_update=extend_schema(summary='Частичное изменение пользователя'),
     destroy=extend_schema(summary='Удаление пользователя'),
 )
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(InstrumentedViewMixin,
+                        UserViewSet):
     """Кастомный базовый вьюсет всех пользователей."""
 
     def get_permissions(self):
@@ -93,15 +130,19 @@ class CustomUserViewSet(UserViewSet):
     partial_update=extend_schema(summary='Частичное изменение профиля клиента'),
     destroy=extend_schema(summary='Удаление профиля клиента'),
 )
-class ClientProfileViewSet(viewsets.ModelViewSet):
+class ClientProfileViewSet(InstrumentedViewMixin,
+                           viewsets.ModelViewSet):
     """Кастомный вьюсет Клиента."""
 
     queryset = ClientProfile.objects.all()
     serializer_class = ClientProfileSerializer
     permission_classes = (IsAdminOrClientOrReadOnly,)
+    throttle_scopes = WRITE_THROTTLE_SCOPES
 
     def get_queryset(self):
         if self.action == 'list' and not self.request.user.is_staff:
+            if not self.request.user.is_authenticated:
+                return ClientProfile.objects.none()
             return ClientProfile.objects.filter(client=self.request.user)
         return super().get_queryset()
 
@@ -114,24 +155,44 @@ class ClientProfileViewSet(viewsets.ModelViewSet):
     list=extend_schema(summary='Список категорий'),
     retrieve=extend_schema(summary='Категория'),
 )
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(InstrumentedViewMixin,
+                      ReplicaReadMixin,
+                      ConditionalGetMixin,
+                      FastListMixin,
+                      viewsets.ReadOnlyModelViewSet):
     """Вьюсет Категории."""
 
-    queryset = Category.objects.all()
+    stateless_authentication = True
+    # Вложенные категории CategorySerializer (Meta.depth): родители
+    # категории и дочерние категории с их родителями
+    queryset = Category.objects.select_related(
+        category_parents(CategorySerializer.Meta.depth)
+    ).prefetch_related(Prefetch(
+        'child_categories',
+        queryset=Category.objects.select_related(
+            category_parents(CategorySerializer.Meta.depth - 1)
+        )
+    ))
     serializer_class = CategorySerializer
+    fast_serializer_class = CategoryFastSerializer
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = CategoryFilterSet
 
+    def get_validators(self):
+        return categories_validators()
+
 
 @extend_schema(tags=['Услуги'])
 @extend_schema_view(
     list=extend_schema(summary='Список услуг'),
     retrieve=extend_schema(summary='Услуга'),
 )
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(InstrumentedViewMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет Услуги."""
 
+    stateless_authentication = True
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     filter_backends = (DjangoFilterBackend,)
@@ -148,20 +209,81 @@ class ServiceViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary='Частичное изменение профиля сервиса'),
     destroy=extend_schema(summary='Удаление профиля сервиса'),
 )
-class ServiceProfileViewSet(viewsets.ModelViewSet):
+class ServiceProfileViewSet(InstrumentedViewMixin,
+                            ReplicaReadMixin,
+                            ConditionalGetMixin,
+                            CachedResponseMixin,
+                            FastListMixin,
+                            SparseFieldsViewMixin,
+                            viewsets.ModelViewSet):
     """Вьюсет Профиля Сервиса."""
 
-    queryset = ServiceProfile.objects.select_related(
-        'owner', 
-    ).prefetch_related(
-        'categories', 'services'
-    ).annotate(
-        rating=Avg('reviews__score')
-    ).all()
+    stateless_authentication = True
+    queryset = ServiceProfile.objects.order_by('-created')
+    field_select_related = {'owner': ('owner',)}
+    field_prefetch_related = {'categories': ('categories',),
+                              'services': ('services',),
+                              'profile_images': ('profile_images',),
+                              'employees': ('employees',),
+                              'reviews': ('reviews',)}
+    field_annotations = {'rating': {'rating': Avg('reviews__score')}}
+    expand_prefetch_related = {
+        'employees.organization': ('employees__organization__services',),
+    }
     serializer_class = ServiceProfileSerializer
+    fast_serializer_class = ServiceProfileFastSerializer
     permission_classes = (IsAdminOrMasterOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ServiceProfileFilterSet
+    throttle_scopes = {**WRITE_THROTTLE_SCOPES,
+                       'list': 'search',
+                       'favorite': 'favorite'}
+    conditional_actions = ('retrieve',)
+    etag_per_user = True
+
+    def get_validators(self):
+        if self.is_cacheable(self.request):
+            # Версии профиля из общего кеша меняются вместе с данными
+            # кеша ответов: попадание в кеш обходится без запросов к БД
+            return '.'.join(map(str, self.get_data_versions())), None
+        return service_profile_validators(self.kwargs['pk'])
+
+    def get_cache_versions(self):
+        if self.action == 'retrieve':
+            return [CATALOGUE, profile_version_name(self.kwargs['pk'])]
+        return [CATALOGUE, SERVICE_PROFILES]
+
+    def is_cacheable(self, request):
+        # Фильтр избранного зависит от пользователя
+        return super().is_cacheable(request) and not (
+            'is_favorited' in request.query_params
+            and request.user.is_authenticated
+        )
+
+    @staticmethod
+    def with_favorited(data, favorited_ids):
+        def mark(profile):
+            if 'is_favorited' not in profile:
+                return profile
+            return {**profile,
+                    'is_favorited': profile['id'] in favorited_ids}
+
+        if 'results' in data:
+            return {**data, 'results': list(map(mark, data['results']))}
+        return mark(data)
+
+    def strip_user_data(self, data):
+        return self.with_favorited(data, set())
+
+    def add_user_data(self, data):
+        user = self.request.user
+        if user.is_anonymous or user.is_master:
+            return data
+        profiles = data.get('results', [data])
+        return self.with_favorited(data, set(Favorite.objects.filter(
+            client_profile_id=user.client_profile.pk,
+            service_profile_id__in=[profile['id'] for profile in profiles]
+        ).values_list('service_profile_id', flat=True)))
 
     def perform_create(self, serializer):
         return serializer.save(owner=self.request.user)
@@ -190,9 +312,11 @@ class ServiceProfileViewSet(viewsets.ModelViewSet):
     list=extend_schema(summary='Получение списка изображений профиля сервиса'),
     retrieve=extend_schema(summary='Получение изображения профиля сервиса'),
 )
-class ImageViewSet(viewsets.ReadOnlyModelViewSet):
+class ImageViewSet(InstrumentedViewMixin,
+                   viewsets.ReadOnlyModelViewSet):
     """Вьюсет Отзывов к Сервисам."""
 
+    stateless_authentication = True
     queryset = Image.objects.all()
     serializer_class = ImageSerializer
     permission_classes = (IsAdminOrMasterOrReadOnly,)
@@ -207,27 +331,36 @@ class ImageViewSet(viewsets.ReadOnlyModelViewSet):
     partial_update=extend_schema(summary='Частичное изменение отзыва к услуге'),
     destroy=extend_schema(summary='Удаление отзыва к услуге'),
 )
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(InstrumentedViewMixin,
+                    ReplicaReadMixin,
+                    ConditionalGetMixin,
+                    FastListMixin,
+                    ServiceProfileNestedMixin,
+                    SparseFieldsViewMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет Отзывов к Сервисам."""
 
+    stateless_authentication = True
     serializer_class = ReviewSerializer
+    fast_serializer_class = ReviewFastSerializer
     permission_classes = (IsAdminOrAuthorOrReadOnly,)
+    throttle_scopes = WRITE_THROTTLE_SCOPES
+    field_prefetch_related = {'comments': (Prefetch(
+        'comments',
+        queryset=Comment.objects.select_related('author__client')
+    ),)}
+    expand_prefetch_related = {'author': ('author__client',)}
+
+    def get_validators(self):
+        return review_validators(self.kwargs['profile_id'])
 
     def get_queryset(self):
-        service_profile = get_object_or_404(
-            ServiceProfile,
-            pk=self.kwargs.get('profile_id')
-        )
-        return service_profile.reviews.select_related('author').all()
+        return self.select_requested(self.service_profile.reviews.all())
 
     def perform_create(self, serializer):
-        service_profile = get_object_or_404(
-            ServiceProfile,
-            pk=self.kwargs.get('profile_id')
-        )
         serializer.save(
             author=self.request.user.client_profile,
-            service_profile=service_profile
+            service_profile=self.service_profile
         )
 
 
@@ -240,29 +373,30 @@ class ReviewViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary='Частичное изменение комментария'),
     destroy=extend_schema(summary='Удаление комментария к отзыву'),
 )
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(InstrumentedViewMixin,
+                     ServiceProfileNestedMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет Комментариев к Отзывам."""
 
+    stateless_authentication = True
     serializer_class = CommentSerializer
     permission_classes = (IsAdminOrAuthorOrReadOnly,)
+    throttle_scopes = WRITE_THROTTLE_SCOPES
 
-    def get_queryset(self):
-        service_profile = get_object_or_404(
-            ServiceProfile,
-            pk=self.kwargs.get('profile_id')
+    @cached_property
+    def review(self):
+        return get_object_or_404(
+            self.service_profile.reviews,
+            pk=self.kwargs.get('review_id')
         )
-        review = service_profile.reviews.get(pk=self.kwargs.get('review_id'))
-        return review.comments.select_related('author').all()
+
+    def get_queryset(self):
+        return self.review.comments.select_related('author__client').all()
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            service=self.kwargs.get('profile_id')
-        )
         serializer.save(
             author=self.request.user.client_profile,
-            review=review
+            review=self.review
         )
 
 
@@ -275,25 +409,27 @@ class CommentViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary='Частичное изменение расписания сервиса'),
     destroy=extend_schema(summary='Удаление расписания сервиса'),
 )
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(InstrumentedViewMixin,
+                      FastListMixin,
+                      ServiceProfileNestedMixin,
+                      SparseFieldsViewMixin,
+                      viewsets.ModelViewSet):
     """Вьюсет Расписания Сервиса."""
 
+    stateless_authentication = True
     serializer_class = ScheduleSerializer
+    fast_serializer_class = ScheduleFastSerializer
     permission_classes = (IsAdminOrMasterOrReadOnly,)
+    throttle_scopes = WRITE_THROTTLE_SCOPES
+    expand_prefetch_related = {
+        'service_profile': ('service_profile__services',),
+    }
 
     def get_queryset(self):
-        service_profile = get_object_or_404(
-            ServiceProfile,
-            pk=self.kwargs.get('profile_id')
-        )
-        return service_profile.schedules.all()
+        return self.select_requested(self.service_profile.schedules.all())
 
     def perform_create(self, serializer):
-        service_profile = get_object_or_404(
-            ServiceProfile,
-            pk=self.kwargs.get('profile_id')
-        )
-        serializer.save(service_profile=service_profile)
+        serializer.save(service_profile=self.service_profile)
 
 
 @extend_schema(tags=['Записи'])
@@ -305,27 +441,39 @@ class ScheduleViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary='Частичное изменение записи на услугу'),
     destroy=extend_schema(summary='Удаление записи на услугу'),
 )
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(InstrumentedViewMixin,
+                         ServiceProfileNestedMixin,
+                         SparseFieldsViewMixin,
+                         viewsets.ModelViewSet):
     """Вьюсет Записи."""
 
     serializer_class = AppointmentSerializer
     permission_classes = (IsAdminOrClientOrReadOnly,)
+    throttle_scopes = WRITE_THROTTLE_SCOPES
+    expand_prefetch_related = {'client_profile': ('client_profile__client',)}
+
+    @cached_property
+    def schedule(self):
+        return get_object_or_404(
+            self.service_profile.schedules,
+            pk=self.kwargs.get('schedule_id')
+        )
 
     def get_queryset(self):
-        service_profile = get_object_or_404(
-            ServiceProfile,
-            pk=self.kwargs.get('profile_id')
-        )
-        schedule = service_profile.schedules.get(pk=self.kwargs.get('schedule_id'))
-        return schedule.appointments.all()
+        return self.select_requested(self.schedule.appointments.all())
 
     def perform_create(self, serializer):
-        schedule = get_object_or_404(
-            Schedule,
-            pk=self.kwargs.get('profile_id'),
-            schedule=self.kwargs.get('schedule_id')
-        )
-        serializer.save(
-            schedule=schedule,
-            client_profile=self.request.user.client_profile
-        )
+        # Уникальность времени записи клиента проверяет ограничение БД:
+        # параллельные запросы не должны приводить к ошибке 500
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    schedule=self.schedule,
+                    client_profile=self.request.user.client_profile
+                )
+        except IntegrityError:
+            registry.inc('booking_conflicts_total')
+            raise ValidationError(
+                {'appointment_time': 'Вы уже записаны на это время'}
+            )
+
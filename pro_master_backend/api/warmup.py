@@ -0,0 +1,117 @@
+import io
+import logging
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from django.apps import apps
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import get_resolver, resolve
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls():
+    """Таблицы reverse() и namespace всех URLconf."""
+
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for _, namespace_resolver in resolver.namespace_dict.values():
+        namespace_resolver.reverse_dict
+
+
+def warm_models():
+    """Кеши связей моделей (_meta.get_fields)."""
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def warm_serializers():
+    """Поля сериализаторов всех вьюсетов API, включая вложенные."""
+
+    from .urls import router
+
+    def build(serializer):
+        for field in serializer.fields.values():
+            nested = getattr(field, 'child', field)
+            if hasattr(nested, 'fields'):
+                build(nested)
+
+    for _, viewset, _ in router.registry:
+        serializer_class = getattr(viewset, 'serializer_class', None)
+        if serializer_class is not None:
+            build(serializer_class(context={}))
+
+
+def warm_schema():
+    """Версия кода для ETag схемы OpenAPI (хеш исходного кода)."""
+
+    from .schema import get_code_version
+
+    get_code_version()
+
+
+def make_request(path):
+    hosts = [host for host in settings.ALLOWED_HOSTS
+             if host != '*' and not host.startswith('.')]
+    return WSGIRequest({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': hosts[0] if hosts else 'localhost',
+        'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+    })
+
+
+def warm_requests():
+    """Анонимные GET settings.WARMUP_PATHS в обход middleware.
+
+    Открывают соединение с БД, загружают лениво импортируемый код
+    обработки запроса и заполняют локальные кеши процесса (кеш
+    ответов профилей сервисов при RESPONSE_CACHE).
+    """
+
+    for path in settings.WARMUP_PATHS:
+        match = resolve(path)
+        view = match.func
+        if iscoroutinefunction(view):
+            view = async_to_sync(view)
+        response = view(make_request(path), *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.status_code >= 400:
+            logger.warning('Прогрев %s: ответ %s', path, response.status_code)
+
+
+STEPS = (
+    ('urls', warm_urls),
+    ('models', warm_models),
+    ('serializers', warm_serializers),
+    ('schema', warm_schema),
+    ('requests', warm_requests),
+)
+
+
+def warm_up():
+    """Прогрев процесса перед приёмом запросов: {шаг: длительность, мс}.
+
+    Вызывается в каждом рабочем процессе gunicorn (post_worker_init
+    в gunicorn.conf.py) или командой warm_up. Ошибка шага
+    записывается в лог и не мешает запуску.
+    """
+
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Прогрев: ошибка шага %s', name)
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    logger.info('Прогрев завершён: %s', timings)
+    return timings
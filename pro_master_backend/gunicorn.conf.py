@@ -0,0 +1,20 @@
+# Настройки gunicorn (читаются из рабочего каталога при запуске)
+
+# Приложение импортируется один раз в главном процессе, рабочие
+# процессы создаются fork() с уже загруженными модулями
+preload_app = True
+
+
+def post_worker_init(worker):
+    # Соединения с БД и кеши создаются в рабочем процессе
+    # до приёма первого запроса
+    from api.warmup import warm_up
+
+    warm_up()
+
+
+def child_exit(server, worker):
+    # Счётчики завершённого воркера не суммируются в /metrics
+    from api.metrics import registry
+
+    registry.remove(worker.pid)
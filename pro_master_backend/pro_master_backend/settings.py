@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 import os
 
+from datetime import timedelta
+
 from dotenv import load_dotenv
 
 from pathlib import Path
@@ -33,6 +35,13 @@ DEBUG = bool(os.getenv('DEBUG') == 'True')
 
 ALLOWED_HOSTS = ['*']
 
+# Stateless JWT authentication mode instead of DRF tokens
+USE_JWT = bool(os.getenv('USE_JWT') == 'True')
+
+# GeoDjango (GDAL/GEOS) and the PostGIS backend, only needed for
+# geographic fields (the Location model is disabled)
+USE_GIS = bool(os.getenv('USE_GIS') == 'True')
+
 
 # Application definition
 
@@ -43,7 +52,6 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'django.contrib.gis',
     'rest_framework',
     'rest_framework.authtoken',
     'django_filters',
@@ -57,12 +65,20 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
 ]
 
+if USE_JWT:
+    INSTALLED_APPS += ['rest_framework_simplejwt.token_blacklist']
+
+if USE_GIS:
+    INSTALLED_APPS += ['django.contrib.gis']
+
 MIDDLEWARE = [
+    'api.instrumentation.SQLInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.profiling.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -101,15 +117,67 @@ if DEBUG:
 else:
     DATABASES = {
         'default': {
-            'ENGINE': 'django.contrib.gis.db.backends.postgis',
+            'ENGINE': ('django.contrib.gis.db.backends.postgis' if USE_GIS
+                       else 'django.db.backends.postgresql'),
             'NAME': os.getenv('POSTGRES_DB', 'django'),
             'USER': os.getenv('POSTGRES_USER', 'django'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
-            'PORT': os.getenv('DB_PORT', 5432)
+            'PORT': os.getenv('DB_PORT', 5432),
+            # Persistent connections: seconds to keep a connection open
+            # (0 closes it after every request) and a liveness check
+            # before it is reused by the next request
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': (
+                os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+            ),
+            # Required behind PgBouncer in transaction pooling mode
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS') == 'True'
+            ),
         }
     }
 
+# Read replicas: comma-separated hosts, each one becomes a replica_<n>
+# alias with the settings of the default database. With SQLite the
+# replicas point to the same file, which is enough for local checks.
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {**DATABASES['default'],
+                        'HOST': host.strip(),
+                        'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['api.db_routers.ReplicaRouter']
+    MIDDLEWARE += ['api.db_routers.ReplicaStickinessMiddleware']
+
+# Reads stick to the primary for this long after a user's write
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+# Cache alias shared by all workers (Redis, Memcached) for the sticky
+# flags; required with DB_REPLICA_HOSTS (check api.E001)
+REPLICA_STICKY_CACHE_ALIAS = os.getenv('REPLICA_STICKY_CACHE_ALIAS')
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 2))
+REPLICA_LAG_CHECK_INTERVAL = float(
+    os.getenv('REPLICA_LAG_CHECK_INTERVAL', 1)
+)
+
+
+# Cache
+# Counters of throttles are shared between workers through this cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -136,9 +204,147 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.CompactJSONRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.UserActionThrottle',
+        'api.throttling.IPActionThrottle',
+        'api.throttling.EndpointActionThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'login_identifier': os.getenv('LOGIN_IDENTIFIER_RATE', '5/min'),
+        'login_ip': os.getenv('LOGIN_IP_RATE', '30/min'),
+        'search_user': '60/min',
+        'search_ip': '120/min',
+        'search_endpoint': '3000/min',
+        'favorite_user': '30/min',
+        'write_user': '30/min',
+        'write_ip': '60/min',
+    },
+}
+
+# Лимиты отключаются для нагрузочного тестирования (manage.py load_test)
+if os.getenv('DISABLE_THROTTLING') == 'True':
+    REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
+
+# Хранилище лимитов GCRA и счётчиков неудачных попыток входа
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', 'api.throttling.CacheStore')
+
+# Списки профилей, отзывов и категорий через быстрые сериализаторы
+FAST_LIST_SERIALIZERS = os.getenv('FAST_LIST_SERIALIZERS', 'True') == 'True'
+
+# Асинхронные обработчики чтения каталога при запуске через ASGI
+# (api.async_views): профили, категории, отзывы и расписания.
+# Связанные запросы страницы выполняются параллельно в пуле потоков;
+# поток открывает соединение с БД на время запроса, поэтому соединений
+# не больше ASYNC_READ_DB_THREADS на воркер и только под нагрузкой
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+ASYNC_READ_DB_THREADS = int(os.getenv('ASYNC_READ_DB_THREADS', 32))
+
+# Кеш ответов списка и профилей сервисов (api.response_cache): общий кеш
+# (L2) и локальный LRU процесса (L1). При нескольких процессах
+# RESPONSE_CACHE_ALIAS должен указывать на общий кеш (Redis, Memcached)
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'False') == 'True'
+RESPONSE_CACHE_ALIAS = os.getenv('RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+RESPONSE_CACHE_LOCAL_SIZE = int(os.getenv('RESPONSE_CACHE_LOCAL_SIZE', 1000))
+RESPONSE_CACHE_LOCK_TIMEOUT = float(
+    os.getenv('RESPONSE_CACHE_LOCK_TIMEOUT', 5)
+)
+
+# Метрики Prometheus (/metrics). При нескольких воркерах gunicorn задаётся
+# общий каталог, через который воркеры суммируют свои значения (локальный
+# для сервера: файлы процессов, которых нет, удаляются). Без METRICS_TOKEN
+# метрики доступны только персоналу
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Журнал медленных запросов (админка, SlowQuery): порог в мс (пустое
+# значение отключает), доля запросов с EXPLAIN и размер кольцевого буфера
+SLOW_QUERY_THRESHOLD_MS = (float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+                           if os.getenv('SLOW_QUERY_THRESHOLD_MS') != ''
+                           else None)
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+# EXPLAIN ANALYZE вместо EXPLAIN (PostgreSQL): фактический план ценой
+# повторного выполнения медленного запроса
+SLOW_QUERY_EXPLAIN_ANALYZE = (
+    os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE', 'False') == 'True'
+)
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 500))
+
+# Профили запросов персонала (X-Profile: 1): строк сводки и размер журнала
+REQUEST_PROFILE_STATS_LINES = 40
+REQUEST_PROFILE_LOG_SIZE = int(os.getenv('REQUEST_PROFILE_LOG_SIZE', 100))
+
+# Трассировка (api.tracing): экспортёр - api.tracing.LogExporter,
+# api.tracing.OTLPFileExporter или api.tracing.InMemoryExporter
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', '')
+TRACING_SAMPLE_RATE = float(os.getenv('TRACING_SAMPLE_RATE', 1))
+TRACING_FILE = os.getenv('TRACING_FILE', BASE_DIR / 'traces.jsonl')
+
+# Прогрев рабочего процесса (api.warmup): GET-запросы до приёма трафика
+WARMUP_PATHS = [path for path in os.getenv(
+    'WARMUP_PATHS', '/api/categories/,/api/service_profiles/'
+).split(',') if path]
+
+# Максимальное количество SQL-запросов на действие вьюсета (имя маршрута),
+# включая запросы версий для условных запросов (api.conditional);
+# SAVEPOINT и другие команды управления транзакциями не считаются.
+# Измерено на данных api/tests/base.py: максимум для анонима, клиента
+# и мастера с аутентификацией по токену, с быстрыми сериализаторами
+# списков и с DRF (api/tests/test_query_budgets.py)
+QUERY_BUDGETS = {
+    'categories-list': 4,
+    'categories-detail': 4,
+    'services-list': 3,
+    'services-detail': 2,
+    'service_profiles-list': 12,
+    'service_profiles-detail': 13,
+    'images-list': 2,
+    'reviews-list': 7,
+    'reviews-detail': 6,
+    'comments-list': 5,
+    'comments-detail': 4,
+    'schedules-list': 4,
+    'schedules-detail': 3,
+    'appointments-list': 5,
+    'appointments-detail': 4,
+    'clients-list': 5,
+    'clients-detail': 4,
+}
+
+# Поиск N+1 (api.testing.NPlusOneDetector, manage.py detect_n_plus_one):
+# минимальное число повторов запроса в цикле и допустимые случаи -
+# регулярные выражения для отпечатка SQL или кадра стека
+# ('api/serializers.py:120 in to_representation')
+N_PLUS_ONE_THRESHOLD = 2
+N_PLUS_ONE_ALLOWLIST = []
+
+if USE_JWT:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = [
+        'api.authentication.StatelessReadJWTAuthentication',
+    ]
+
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_LIFETIME_MINUTES', 15))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_LIFETIME_DAYS', 7))
+    ),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.CustomTokenObtainPairSerializer',
+    'TOKEN_USER_CLASS': 'api.authentication.ClaimsUser',
 }
 
 
@@ -164,6 +370,13 @@ SPECTACULAR_SETTINGS = {
    'VERSION': '1.0.0',
 }
 
+# Заранее построенная схема OpenAPI (manage.py build_schema): каталог
+# файлов и версия кода (по умолчанию хеш исходного кода проекта)
+OPENAPI_SCHEMA_DIR = Path(
+    os.getenv('OPENAPI_SCHEMA_DIR', BASE_DIR / 'openapi_schema')
+)
+CODE_VERSION = os.getenv('CODE_VERSION', '')
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
@@ -174,6 +387,23 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
 
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -19,17 +19,19 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from drf_spectacular.views import (SpectacularAPIView,
-                                   SpectacularRedocView,
-                                   SpectacularSwaggerView)
+from api.metrics import metrics_view
+from api.schema import PrecomputedSchemaView
+
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls', namespace='api')),
+    path('metrics', metrics_view, name='metrics'),
 
     path(
         'api/schema/',
-        SpectacularAPIView.as_view(),
+        PrecomputedSchemaView.as_view(),
         name='schema'
     ),
     path(
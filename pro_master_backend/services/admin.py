@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 # from django.contrib.gis.admin import OSMGeoAdmin
 
 from .models import (Category,
@@ -33,6 +34,7 @@ class ServiceProfileToImage(admin.TabularInline):
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'parent_category')
     list_display_links = ('name',)
+    list_select_related = ('parent_category',)
     search_fields = ('name',)
     list_filter = ('name',)
     empty_value_display = '-пусто-'
@@ -82,9 +84,15 @@ class ServiceProfileAdmin(admin.ModelAdmin):
 
     inlines = [ServiceProfileToCategory, ServiceProfileToImage]
 
-    @admin.display(description='Количество добавлений в избранное')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            additions_in_favorite=Count('in_favorite_for_clients')
+        )
+
+    @admin.display(description='Количество добавлений в избранное',
+                   ordering='additions_in_favorite')
     def additions_in_favorite_count(self, service):
-        return service.in_favorite_for_clients.all().count()
+        return service.additions_in_favorite
 
 
 @admin.register(ServiceProfileCategory)
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+def create_catalogue_versions(apps, schema_editor):
+    CatalogueVersion = apps.get_model('services', 'CatalogueVersion')
+    for name in ('categories', 'services'):
+        CatalogueVersion.objects.get_or_create(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_alter_category_parent_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Справочник')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Версия')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Catalogue Version',
+                'verbose_name_plural': 'Catalogue Versions',
+            },
+        ),
+        migrations.AddField(
+            model_name='serviceprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='serviceprofile',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1, help_text='Увеличивается при изменении профиля, его отзывов, изображений, услуг, сотрудников и расписаний', verbose_name='Версия'),
+        ),
+        migrations.RunPython(create_catalogue_versions,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def create_clients_version(apps, schema_editor):
+    CatalogueVersion = apps.get_model('services', 'CatalogueVersion')
+    CatalogueVersion.objects.get_or_create(name='clients')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_serviceprofile_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_clients_version,
+                             migrations.RunPython.noop),
+    ]
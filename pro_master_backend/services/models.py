@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.contrib.gis.db import models as gismodels
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 # from colorfield.fields import ColorField
 
@@ -64,6 +64,9 @@ class Service(models.Model):
         return self.name
 
 
+# from django.contrib.gis.db import models as gismodels
+
+
 # class Location(gismodels.Model):
 #     """Модель Локации."""
 #     address = models.CharField(
@@ -81,6 +84,52 @@ class Service(models.Model):
 #         return self.address
 
 
+class CatalogueVersion(models.Model):
+    """Версия справочника (дерево категорий, услуги, данные клиентов).
+
+    Увеличивается при любом изменении справочника (services.signals)
+    и служит валидатором условных запросов.
+    """
+
+    CATEGORIES = 'categories'
+    SERVICES = 'services'
+    # Профили и учётные записи клиентов - авторов отзывов и комментариев
+    CLIENTS = 'clients'
+
+    name = models.CharField(
+        'Справочник',
+        max_length=64,
+        primary_key=True
+    )
+    version = models.PositiveBigIntegerField('Версия', default=1)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Catalogue Version'
+        verbose_name_plural = 'Catalogue Versions'
+
+    def __str__(self):
+        return f'{self.name} {self.version}'
+
+    @classmethod
+    def bump(cls, name):
+        updated = cls.objects.filter(name=name).update(
+            version=models.F('version') + 1,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            cls.objects.get_or_create(name=name)
+
+
+class ServiceProfileQuerySet(models.QuerySet):
+
+    def touch(self):
+        """Увеличение версии профилей после изменения их данных."""
+
+        return self.update(version=models.F('version') + 1,
+                           updated_at=timezone.now())
+
+
 class ServiceProfile(models.Model):
     """Модель Профиля сервиса."""
 
@@ -140,12 +189,24 @@ class ServiceProfile(models.Model):
         'Статус Организации',
         default=False
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+    version = models.PositiveBigIntegerField(
+        'Версия',
+        default=1,
+        help_text=('Увеличивается при изменении профиля, его отзывов, '
+                   'изображений, услуг, сотрудников и расписаний')
+    )
     # locations = models.ManyToManyField(
     #     Location,
     #     through='LocationService',
     #     verbose_name='Локации'
     # )
 
+    objects = ServiceProfileQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created']
         verbose_name = 'Service Profile'
@@ -154,6 +215,20 @@ class ServiceProfile(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+        if bump:
+            self.version = models.F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'],
+                                           'version', 'updated_at'}
+        super().save(*args, **kwargs)
+        if bump:
+            # Новая версия загружается при обращении к полю
+            # (отложенное поле), а не отдельным запросом на каждое
+            # сохранение
+            del self.__dict__['version']
+
 
 class Image(models.Model):
     """Модель Изображения."""
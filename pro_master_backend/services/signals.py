@@ -0,0 +1,149 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from clients.models import ClientProfile
+
+from .models import (Category,
+                     CatalogueVersion,
+                     Comment,
+                     Employee,
+                     Favorite,
+                     Image,
+                     Review,
+                     Service,
+                     ServiceProfile,
+                     ServiceProfileCategory,
+                     ServiceProfileService)
+
+
+User = get_user_model()
+
+# Изменение данных профилей (ids) и справочников (name) для кешей
+profiles_changed = Signal()
+catalogue_changed = Signal()
+
+# Удаляемые профили: каскадное удаление связанных объектов
+# не увеличивает их версию
+_deleting = threading.local()
+
+
+def deleting_profiles():
+    if not hasattr(_deleting, 'ids'):
+        _deleting.ids = set()
+    return _deleting.ids
+
+
+def touch_profile(profile_id):
+    if profile_id not in deleting_profiles():
+        ServiceProfile.objects.filter(pk=profile_id).touch()
+        profiles_changed.send(sender=ServiceProfile, ids=[profile_id])
+
+
+def touch_profiles(queryset):
+    ids = list(queryset.values_list('pk', flat=True).distinct())
+    if ids:
+        ServiceProfile.objects.filter(pk__in=ids).touch()
+        profiles_changed.send(sender=ServiceProfile, ids=ids)
+
+
+@receiver(pre_delete, sender=ServiceProfile)
+def mark_profile_deleting(sender, instance, **kwargs):
+    deleting_profiles().add(instance.pk)
+
+
+@receiver(post_delete, sender=ServiceProfile)
+def unmark_profile_deleting(sender, instance, **kwargs):
+    deleting_profiles().discard(instance.pk)
+    profiles_changed.send(sender=ServiceProfile, ids=[instance.pk])
+
+
+@receiver(post_save, sender=ServiceProfile)
+def profile_saved(sender, instance, **kwargs):
+    profiles_changed.send(sender=ServiceProfile, ids=[instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+@receiver(post_save, sender=ServiceProfileCategory)
+@receiver(post_delete, sender=ServiceProfileCategory)
+@receiver(post_save, sender=ServiceProfileService)
+@receiver(post_delete, sender=ServiceProfileService)
+@receiver(post_save, sender='appointments.Schedule')
+@receiver(post_delete, sender='appointments.Schedule')
+def touch_related_profile(sender, instance, **kwargs):
+    touch_profile(instance.service_profile_id)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def touch_employee_organization(sender, instance, **kwargs):
+    touch_profile(instance.organization_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_profile(sender, instance, **kwargs):
+    if not deleting_profiles():
+        touch_profiles(
+            ServiceProfile.objects.filter(reviews__id=instance.review_id)
+        )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def touch_favorite_profile(sender, instance, **kwargs):
+    # Счётчик добавлений в избранное профиля; счётчик избранного
+    # клиента в отзывы и комментарии не входит
+    touch_profile(instance.service_profile_id)
+
+
+@receiver(post_save, sender=ClientProfile)
+def bump_clients_version(sender, instance, created, **kwargs):
+    # Данные клиента в отзывах и комментариях: одна версия для всех
+    # клиентов вместо изменения всех профилей с его отзывами
+    if not created:
+        CatalogueVersion.bump(CatalogueVersion.CLIENTS)
+
+
+@receiver(post_save, sender=User)
+def touch_user_profiles(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    touch_profiles(ServiceProfile.objects.filter(owner_id=instance.pk))
+    if not instance.is_master:
+        CatalogueVersion.bump(CatalogueVersion.CLIENTS)
+
+
+@receiver(m2m_changed, sender=ServiceProfile.categories.through)
+@receiver(m2m_changed, sender=ServiceProfile.services.through)
+def touch_m2m_profiles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        touch_profile(instance.pk)
+    elif pk_set:
+        touch_profiles(ServiceProfile.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_categories_version(sender, **kwargs):
+    CatalogueVersion.bump(CatalogueVersion.CATEGORIES)
+    catalogue_changed.send(sender=CatalogueVersion,
+                           name=CatalogueVersion.CATEGORIES)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def bump_services_version(sender, **kwargs):
+    CatalogueVersion.bump(CatalogueVersion.SERVICES)
+    catalogue_changed.send(sender=CatalogueVersion,
+                           name=CatalogueVersion.SERVICES)